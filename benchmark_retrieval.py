@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Benchmark query latency of the retrieval engines behind RAGService.
+
+Uses synthetic normalized embeddings, looked up from a precomputed matrix, so
+only the index is measured, not the embedding backend. Example:
+
+    python benchmark_retrieval.py --chunks 20000 --dim 384 --queries 200
+    python benchmark_retrieval.py --chunks 1000000 --engines numpy,ivf --nprobe 16
+
+The int8, binary (quantized NumPy) and IVF engines also report recall@k against
+exact search on the same queries.
+"""
+
+import argparse
+import shutil
+import tempfile
+import time
+from typing import Callable, List
+
+import numpy as np
+from langchain_community.vectorstores import Chroma
+from langchain_core.embeddings import Embeddings
+
+from chatbot.services.vector_index import IVFVectorIndex, NumpyVectorIndex, normalize_rows
+
+class PrecomputedEmbeddings(Embeddings):
+    """Embedding function that looks texts up in the precomputed benchmark matrix"""
+
+    def __init__(self, texts: List[str], vectors: np.ndarray):
+        self.rows = {text: row for row, text in enumerate(texts)}
+        self.vectors = vectors
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.vectors[[self.rows[text] for text in texts]].tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.vectors[self.rows[text]].tolist()
+
+def chunk_texts(count: int) -> List[str]:
+    return [f"chunk {i}" for i in range(count)]
+
+def make_corpus(chunks: int, dim: int, clusters: int, seed: int) -> np.ndarray:
+    """Clustered unit vectors, closer to real embeddings than uniform noise"""
+    rng = np.random.default_rng(seed)
+    centers = normalize_rows(rng.standard_normal((clusters, dim)))
+    assignments = rng.integers(0, clusters, size=chunks)
+    return normalize_rows(centers[assignments] + 0.6 * rng.standard_normal((chunks, dim)) / np.sqrt(dim))
+
+def time_queries(search: Callable[[List[float]], list], queries: np.ndarray) -> dict:
+    latencies = []
+    for query in queries:
+        start = time.perf_counter()
+        search(query.tolist())
+        latencies.append((time.perf_counter() - start) * 1000)
+    latencies = np.array(latencies)
+    return {
+        "mean_ms": latencies.mean(),
+        "p50_ms": np.percentile(latencies, 50),
+        "p95_ms": np.percentile(latencies, 95),
+    }
+
+def benchmark_chroma(vectors: np.ndarray, queries: np.ndarray, k: int, workdir: str) -> dict:
+    texts = chunk_texts(len(vectors))
+    store = Chroma(persist_directory=workdir, embedding_function=PrecomputedEmbeddings(texts, vectors))
+    ids = [f"chunk-{i}" for i in range(len(vectors))]
+
+    start = time.perf_counter()
+    batch = 5000
+    for i in range(0, len(vectors), batch):
+        store._collection.add(
+            ids=ids[i:i + batch],
+            embeddings=vectors[i:i + batch].tolist(),
+            documents=texts[i:i + batch],
+            metadatas=[{"source_type": "benchmark"} for _ in range(i, min(i + batch, len(vectors)))]
+        )
+    build_seconds = time.perf_counter() - start
+
+    stats = time_queries(lambda q: store.similarity_search_by_vector_with_relevance_scores(q, k=k), queries)
+    stats["build_s"] = build_seconds
+    return stats
+
+def benchmark_numpy(vectors: np.ndarray, queries: np.ndarray, k: int, workdir: str, index: NumpyVectorIndex = None) -> dict:
+    texts = chunk_texts(len(vectors))
+    index = index or NumpyVectorIndex(workdir, PrecomputedEmbeddings(texts, vectors))
+    ids = [f"chunk-{i}" for i in range(len(vectors))]
+
+    start = time.perf_counter()
+    index.upsert_embeddings(
+        ids,
+        vectors,
+        texts,
+        [{"source_type": "benchmark"} for _ in ids]
+    )
+    index.persist()
+    build_seconds = time.perf_counter() - start
+
+    stats = time_queries(lambda q: index.similarity_search_by_vector_with_score(q, k=k), queries)
+    stats["build_s"] = build_seconds
+    return stats
+
+def benchmark_quantized(vectors: np.ndarray, queries: np.ndarray, k: int, workdir: str, quantization: str) -> dict:
+    index = NumpyVectorIndex(workdir, PrecomputedEmbeddings(chunk_texts(len(vectors)), vectors), quantization=quantization)
+    stats = benchmark_numpy(vectors, queries, k, workdir, index)
+    stats["recall"] = index.measure_recall(k=k, queries=queries)["recall_at_k"]
+    return stats
+
+def benchmark_ivf(vectors: np.ndarray, queries: np.ndarray, k: int, workdir: str, nlist: int = 0, nprobe: int = 16, quantization: str = "none") -> dict:
+    index = IVFVectorIndex(workdir, PrecomputedEmbeddings(chunk_texts(len(vectors)), vectors), quantization=quantization, nlist=nlist, nprobe=nprobe, min_train_size=1)
+    stats = benchmark_numpy(vectors, queries, k, workdir, index)
+    stats["recall"] = index.measure_recall(k=k, queries=queries)["recall_at_k"]
+    return stats
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare Chroma, NumPy and IVF index query latency")
+    parser.add_argument("--chunks", type=int, default=20000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=3)
+    parser.add_argument("--clusters", type=int, default=64)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--nlist", type=int, default=0, help="IVF lists (0 = sqrt(chunks))")
+    parser.add_argument("--nprobe", type=int, default=16, help="IVF lists scanned per query")
+    parser.add_argument("--quantization", default="none", choices=["none", "int8", "binary"], help="Search codes for the ivf engine")
+    parser.add_argument("--engines", default="chroma,numpy,int8,binary,ivf", help="Comma-separated engines to run")
+    args = parser.parse_args()
+
+    print(f"Retrieval benchmark: {args.chunks} chunks x {args.dim} dims, {args.queries} queries, k={args.k}")
+    print("=" * 70)
+
+    vectors = make_corpus(args.chunks, args.dim, args.clusters, args.seed)
+    queries = make_corpus(args.queries, args.dim, args.clusters, args.seed + 1)
+
+    engines = {
+        "chroma": benchmark_chroma,
+        "numpy": benchmark_numpy,
+        "int8": lambda v, q, k, w: benchmark_quantized(v, q, k, w, "int8"),
+        "binary": lambda v, q, k, w: benchmark_quantized(v, q, k, w, "binary"),
+        "ivf": lambda v, q, k, w: benchmark_ivf(v, q, k, w, args.nlist, args.nprobe, args.quantization),
+    }
+    for name in args.engines.split(","):
+        run = engines[name.strip()]
+        workdir = tempfile.mkdtemp(prefix=f"bench-{name}-")
+        try:
+            stats = run(vectors, queries, args.k, workdir)
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+        recall = f" | recall@{args.k} {stats['recall']:.3f}" if "recall" in stats else ""
+        print(f"{name:>8}: build {stats['build_s']:.2f}s | mean {stats['mean_ms']:.3f} ms | "
+              f"p50 {stats['p50_ms']:.3f} ms | p95 {stats['p95_ms']:.3f} ms{recall}")
+
+if __name__ == "__main__":
+    main()
@@ -1,17 +1,27 @@
 """
 Chat-related API routes
 """
-from fastapi import APIRouter, HTTPException
+import asyncio
+import json
+import time
+import uuid
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+from fastapi import APIRouter, HTTPException, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
 from chatbot.models.schemas import (
     ChatRequest, ChatResponse, SessionResponse, 
-    SessionHistoryResponse, SessionCleanupResponse
+    SessionHistoryResponse, SessionCleanupResponse, ResponseCacheStatsResponse,
+    CacheFlushResponse, CacheWarmResponse, QuestionAnalysis, SessionMemoryReportResponse
 )
-from chatbot.services.memory import chat_memory
+from chatbot.services.memory import ChatMessage, SessionStoreError, chat_memory
 from chatbot.services.rag import rag_service
 from chatbot.services.llm import llm_service
+from chatbot.services.response_cache import exact_response_cache, semantic_response_cache
+from chatbot.services.summarizer import conversation_summarizer
+from chatbot.utils.prompt_builder import prompt_builder
 from chatbot.utils.text_processing import (
-    analyze_question_type, create_system_prompt_with_rag,
-    create_system_prompt_general, clean_response_text, format_reasoning
+    analyze_question_type, clean_response_text, format_reasoning,
+    StreamingResponseCleaner
 )
 from chatbot.core.config import settings
 
@@ -20,106 +30,443 @@ router = APIRouter(prefix="/chat", tags=["chat"])
 @router.post("/session/new", response_model=SessionResponse)
 async def create_new_session():
     """Create a new chat session"""
-    session_id = chat_memory.create_session()
+    session_id = await chat_memory.run(chat_memory.create_session)
     return SessionResponse(
         session_id=session_id,
         message="New chat session created! I'm Readle, here to help with dyslexia support."
     )
 
+def _require_llm():
+    if not llm_service.is_available():
+        raise HTTPException(
+            status_code=500, 
+            detail="GROQ_API_KEY environment variable not set"
+        )
+
+async def _prepare_turn(
+    message: str,
+    chat_history: List[ChatMessage],
+    question_analysis: QuestionAnalysis,
+    first_turn: bool,
+    summary: str = ""
+) -> Dict:
+    """Retrieve context, check the semantic cache and build the LLM messages for one turn"""
+    # Check if RAG system should be used based on relevance
+    rag_result = await rag_service.retrieve_with_relevance_check(message)
+    
+    # Reuse the answer to a near-duplicate first question asked in the same context
+    query_vector = None
+    cached_answer = None
+    if first_turn and semantic_response_cache is not None:
+        query_vector = await rag_service.embed_query(message)
+        if query_vector is not None:
+            cached_answer = await rag_service.retrieval_pool.run(
+                semantic_response_cache.lookup,
+                query_vector, question_analysis, rag_result, llm_service.settings_fingerprint()
+            )
+    
+    if cached_answer:
+        print(f"🧠 Semantic cache hit ({cached_answer['similarity']:.3f}): {cached_answer['question']}")
+    
+    # System prompt, most relevant chunks and recent history packed into the token budget
+    messages = None if cached_answer else prompt_builder.build(message, chat_history, rag_result, question_analysis, summary)
+    
+    return {
+        "message": message,
+        "question_analysis": question_analysis,
+        "rag_result": rag_result,
+        "query_vector": query_vector,
+        "cached_answer": cached_answer,
+        "messages": messages
+    }
+
+async def _record_generated(turn: Dict, response_content: str):
+    """Count an LLM call and offer its answer to the semantic cache"""
+    if semantic_response_cache is None:
+        return
+    semantic_response_cache.record_llm_call()
+    # A reply made without the retrieval it should have had is not worth reusing
+    if turn["query_vector"] is not None and response_content and not turn["rag_result"].degraded:
+        await asyncio.to_thread(
+            semantic_response_cache.store,
+            turn["query_vector"], turn["message"], turn["question_analysis"], turn["rag_result"],
+            llm_service.settings_fingerprint(), response_content
+        )
+
+def _reply_fields(turn: Dict, response_content: str) -> Dict:
+    """ChatResponse fields other than session_id, plus the internal `degraded` flag"""
+    rag_result = turn["rag_result"]
+    
+    # Format reasoning for response metadata
+    reasoning = format_reasoning(rag_result.should_use_rag, rag_result.relevance_score)
+    if turn["cached_answer"]:
+        reasoning += " (cached answer)"
+    
+    return {
+        "response": response_content,
+        "degraded": rag_result.degraded,
+        "sources_used": rag_result.should_use_rag,
+        "relevance_score": rag_result.relevance_score if rag_result.relevance_score > 0 else None,
+        "reasoning": reasoning,
+        "response_type": turn["question_analysis"].type
+    }
+
+async def _generate_reply(
+    message: str,
+    chat_history: List[ChatMessage],
+    question_analysis: QuestionAnalysis,
+    first_turn: bool,
+    summary: str = ""
+) -> Dict:
+    """Retrieve context and produce a reply, reusing semantically equivalent first-turn answers"""
+    turn = await _prepare_turn(message, chat_history, question_analysis, first_turn, summary)
+    if turn["cached_answer"]:
+        return _reply_fields(turn, turn["cached_answer"]["response"])
+    
+    # Generate response using LLM
+    response_content = await llm_service.generate_response(turn["messages"], question_analysis)
+    
+    # Clean and validate the response
+    response_content = clean_response_text(response_content)
+    
+    await _record_generated(turn, response_content)
+    return _reply_fields(turn, response_content)
+
+def _exact_cache_key(message: str, question_analysis: QuestionAnalysis) -> Tuple:
+    return exact_response_cache.make_key(
+        message, question_analysis, rag_service.retrieval_state_digest(), llm_service.settings_fingerprint()
+    )
+
+async def _start_turn(request: ChatRequest) -> Dict:
+    """Resolve the session, record the user message and look up the exact response cache"""
+    # Create new session if none provided
+    session_id = request.session_id
+    if not session_id:
+        session_id = await chat_memory.run(chat_memory.create_session)
+    
+    # Get chat history and summary, and add the current user message, in one store round trip
+    # (the history is a snapshot, so it stays the same while compaction folds older turns away)
+    chat_history, summary = await chat_memory.run(chat_memory.start_turn, session_id, request.message)
+    
+    # Only first-turn answers are independent of the conversation, so only they are shared
+    first_turn = not chat_history and not summary
+    
+    # Analyze question type for response length and format
+    question_analysis = analyze_question_type(request.message)
+    
+    # Identical first questions skip retrieval and generation entirely
+    exact_key = _exact_cache_key(request.message, question_analysis) if first_turn else None
+    cached_reply = exact_response_cache.get(exact_key) if first_turn else None
+    if cached_reply is not None:
+        print(f"⚡ Exact response cache hit: {request.message}")
+    
+    return {
+        "session_id": session_id,
+        "chat_history": chat_history,
+        "summary": summary,
+        "first_turn": first_turn,
+        "question_analysis": question_analysis,
+        "exact_key": exact_key,
+        "cached_reply": cached_reply
+    }
+
+async def _finish_turn(started: Dict, reply: Dict) -> ChatResponse:
+    """Cache a fresh first-turn reply and add it to the session history"""
+    reply = dict(reply)
+    degraded = reply.pop("degraded", False)
+    if started["cached_reply"] is None and started["first_turn"] and reply["response"] and not degraded:
+        exact_response_cache.put(started["exact_key"], reply)
+    
+    # Add assistant response to history
+    await chat_memory.run(chat_memory.add_message, started["session_id"], "assistant", reply["response"])
+    
+    # Long sessions are compacted in the background, after this reply is on its way
+    if conversation_summarizer is not None:
+        await conversation_summarizer.maybe_schedule(started["session_id"])
+    
+    return ChatResponse(session_id=started["session_id"], **reply)
+
 @router.post("", response_model=ChatResponse)
 async def chat_with_readle(request: ChatRequest):
     """Main chat endpoint for conversing with Readle"""
     try:
         # Validate LLM service availability
-        if not llm_service.is_available():
-            raise HTTPException(
-                status_code=500, 
-                detail="GROQ_API_KEY environment variable not set"
+        _require_llm()
+        
+        started = await _start_turn(request)
+        reply = started["cached_reply"]
+        if reply is None:
+            reply = await _generate_reply(
+                request.message, started["chat_history"], started["question_analysis"], started["first_turn"],
+                started["summary"]
             )
         
-        # Create new session if none provided
-        session_id = request.session_id
-        if not session_id:
-            session_id = chat_memory.create_session()
+        return await _finish_turn(started, reply)
         
-        # Get chat history
-        chat_history = chat_memory.get_chat_history(session_id)
+    except (HTTPException, SessionStoreError):
+        raise
+    except Exception as e:
+        print(f"❌ Error in chat endpoint: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error generating response: {str(e)}")
+
+def _sse_event(event: str, data: Dict) -> str:
+    """One Server-Sent Event; JSON data keeps newlines inside the response text intact"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+async def _turn_events(request: ChatRequest, started: Dict) -> AsyncIterator[Tuple[str, Dict]]:
+    """Events for one turn: start, cleaned text deltas as token, then the full ChatResponse as done"""
+    yield "start", {"session_id": started["session_id"]}
+    try:
+        reply = started["cached_reply"]
+        streamed = False
+        if reply is None:
+            turn = await _prepare_turn(
+                request.message, started["chat_history"], started["question_analysis"], started["first_turn"],
+                started["summary"]
+            )
+            if turn["cached_answer"]:
+                reply = _reply_fields(turn, turn["cached_answer"]["response"])
+            else:
+                cleaner = StreamingResponseCleaner()
+                async for token in llm_service.stream_response(turn["messages"], turn["question_analysis"]):
+                    text = cleaner.feed(token)
+                    if text:
+                        yield "token", {"text": text}
+                text = cleaner.finish()
+                if text:
+                    yield "token", {"text": text}
+                
+                await _record_generated(turn, cleaner.text)
+                reply = _reply_fields(turn, cleaner.text)
+                streamed = True
         
-        # Add current user message to history
-        chat_memory.add_message(session_id, "user", request.message)
+        if not streamed:
+            # Cached replies arrive whole
+            yield "token", {"text": reply["response"]}
         
-        # Analyze question type for response length and format
-        question_analysis = analyze_question_type(request.message)
+        response = await _finish_turn(started, reply)
+        yield "done", response.model_dump()
         
-        # Check if RAG system should be used based on relevance
-        rag_result = await rag_service.retrieve_with_relevance_check(request.message)
+    except Exception as e:
+        print(f"❌ Error in chat stream: {str(e)}")
+        yield "error", {"detail": f"Error generating response: {str(e)}"}
+
+async def _stream_turn(request: ChatRequest, started: Dict) -> AsyncIterator[str]:
+    async for event, data in _turn_events(request, started):
+        yield _sse_event(event, data)
+
+@router.post("/stream")
+async def stream_chat_with_readle(request: ChatRequest):
+    """Chat endpoint that streams the reply as Server-Sent Events while it is generated"""
+    _require_llm()
+    started = await _start_turn(request)
+    return StreamingResponse(
+        _stream_turn(request, started),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+async def _resolve_session(session_id: Optional[str]) -> str:
+    """The client's session if it is still live, otherwise a new one"""
+    if session_id and await chat_memory.run(chat_memory.session_exists, session_id):
+        return session_id
+    return await chat_memory.run(chat_memory.create_session)
+
+class _ChatSocket:
+    """
+    One WebSocket connection bound to a chat session.
+    
+    Turns are queued and answered in order, so each sees the previous reply in
+    its history, while the receive loop stays free for pings, cancellations
+    and further messages. Every event carries the client's turn_id.
+    """
+    
+    def __init__(self, websocket: WebSocket, session_id: str):
+        self.websocket = websocket
+        self.session_id = session_id
+        self._send_lock = asyncio.Lock()
+        self._turn_lock = asyncio.Lock()
+        self._turns: Dict[str, asyncio.Task] = {}
+    
+    async def send(self, message: Dict):
+        async with self._send_lock:
+            await self.websocket.send_json(message)
+    
+    async def heartbeat(self):
+        """Keep idle connections open through proxies and let clients detect dead links"""
+        while True:
+            await asyncio.sleep(settings.WS_HEARTBEAT_SECONDS)
+            await self.send({"type": "heartbeat", "ts": time.time()})
+    
+    async def _run_turn(self, turn_id: str, message: str):
+        try:
+            async with self._turn_lock:
+                # The session may have expired while the connection sat idle
+                session_id = await _resolve_session(self.session_id)
+                if session_id != self.session_id:
+                    self.session_id = session_id
+                    await self.send({"type": "session", "session_id": session_id, "resumed": False})
+                request = ChatRequest(message=message, session_id=self.session_id)
+                started = await _start_turn(request)
+                async for event, data in _turn_events(request, started):
+                    await self.send({"type": event, "turn_id": turn_id, **data})
+        except SessionStoreError as e:
+            print(f"❌ Error in chat socket: {e}")
+            await self.send({"type": "error", "turn_id": turn_id, "detail": str(e)})
+        except asyncio.CancelledError:
+            await self.send({"type": "cancelled", "turn_id": turn_id})
+        finally:
+            self._turns.pop(turn_id, None)
+    
+    async def handle(self, payload: Dict):
+        kind = payload.get("type", "message")
+        turn_id = str(payload.get("turn_id") or uuid.uuid4())
         
-        # Choose appropriate system prompt
-        if rag_result.should_use_rag and rag_result.content:
-            system_prompt = create_system_prompt_with_rag(rag_result.content, question_analysis)
+        if kind == "ping":
+            await self.send({"type": "pong", "ts": time.time()})
+        elif kind == "cancel":
+            task = self._turns.get(turn_id)
+            if task is not None:
+                task.cancel()
+        elif kind == "message":
+            message = str(payload.get("message", "")).strip()
+            if not message:
+                await self.send({"type": "error", "turn_id": turn_id, "detail": "Empty message"})
+            elif turn_id in self._turns:
+                await self.send({"type": "error", "turn_id": turn_id, "detail": "Duplicate turn_id"})
+            elif len(self._turns) >= settings.WS_MAX_PENDING_TURNS:
+                await self.send({"type": "error", "turn_id": turn_id, "detail": "Too many pending turns"})
+            else:
+                self._turns[turn_id] = asyncio.create_task(self._run_turn(turn_id, message))
         else:
-            system_prompt = create_system_prompt_general(question_analysis)
-        
-        # Build conversation messages for LLM
-        messages = [{"role": "system", "content": system_prompt}]
-        
-        # Add chat history (limit to prevent token overflow)
-        for msg in chat_history[-8:]:  # Keep last 8 messages for context
-            if msg["role"] in ["user", "assistant"]:
-                messages.append({
-                    "role": msg["role"],
-                    "content": msg["content"]
-                })
-        
-        # Add current message
-        messages.append({"role": "user", "content": request.message})
-        
-        # Generate response using LLM
-        response_content = await llm_service.generate_response(messages, question_analysis)
-        
-        # Clean and validate the response
-        response_content = clean_response_text(response_content)
-        
-        # Add assistant response to history
-        chat_memory.add_message(session_id, "assistant", response_content)
-        
-        # Format reasoning for response metadata
-        reasoning = format_reasoning(rag_result.should_use_rag, rag_result.relevance_score)
+            await self.send({"type": "error", "turn_id": turn_id, "detail": f"Unknown message type '{kind}'"})
+    
+    async def close(self):
+        tasks = list(self._turns.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+@router.websocket("/ws")
+async def chat_websocket(websocket: WebSocket, session_id: Optional[str] = None):
+    """Persistent chat connection: send {"type": "message", "message": ..., "turn_id": ...} and receive streamed events"""
+    await websocket.accept()
+    if not llm_service.is_available():
+        await websocket.send_json({"type": "error", "detail": "GROQ_API_KEY environment variable not set"})
+        await websocket.close(code=1011)
+        return
+    
+    # Unknown or expired sessions get a fresh one, announced in the first frame
+    try:
+        socket = _ChatSocket(websocket, await _resolve_session(session_id))
+    except SessionStoreError as e:
+        print(f"❌ Error in chat socket: {e}")
+        await websocket.send_json({"type": "error", "detail": str(e)})
+        await websocket.close(code=1011)
+        return
+    await socket.send({"type": "session", "session_id": socket.session_id, "resumed": socket.session_id == session_id})
+    heartbeat = asyncio.create_task(socket.heartbeat())
+    try:
+        while True:
+            try:
+                payload = await websocket.receive_json()
+            except (ValueError, KeyError):
+                await socket.send({"type": "error", "detail": "Expected a JSON object"})
+                continue
+            if not isinstance(payload, dict):
+                await socket.send({"type": "error", "detail": "Expected a JSON object"})
+                continue
+            await socket.handle(payload)
+    except WebSocketDisconnect:
+        pass
+    finally:
+        heartbeat.cancel()
+        await socket.close()
+
+@router.get("/cache/stats", response_model=ResponseCacheStatsResponse)
+async def get_response_cache_stats():
+    """Response cache hit rates and the share of LLM calls avoided"""
+    return ResponseCacheStatsResponse(
+        exact=exact_response_cache.get_stats(),
+        semantic=semantic_response_cache.get_stats() if semantic_response_cache else None
+    )
+
+@router.delete("/cache", response_model=CacheFlushResponse)
+async def flush_response_cache():
+    """Drop every cached reply, e.g. after changing prompts or sources"""
+    exact_removed = exact_response_cache.clear()
+    semantic_removed = await asyncio.to_thread(semantic_response_cache.clear) if semantic_response_cache else 0
+    return CacheFlushResponse(
+        message=f"Flushed {exact_removed} exact and {semantic_removed} semantic cached replies",
+        exact_entries_removed=exact_removed,
+        semantic_entries_removed=semantic_removed
+    )
+
+@router.post("/cache/warm", response_model=CacheWarmResponse)
+async def warm_response_cache(questions: List[str]):
+    """Answer first-turn questions ahead of time, e.g. the frontend's suggested questions"""
+    _require_llm()
+    
+    warmed = already_cached = 0
+    failed = []
+    for question in dict.fromkeys(q for q in questions if q.strip()):
+        question_analysis = analyze_question_type(question)
+        key = _exact_cache_key(question, question_analysis)
+        if key in exact_response_cache:
+            already_cached += 1
+            continue
         
-        return ChatResponse(
-            response=response_content,
-            session_id=session_id,
-            sources_used=rag_result.should_use_rag,
-            relevance_score=rag_result.relevance_score if rag_result.relevance_score > 0 else None,
-            reasoning=reasoning,
-            response_type=question_analysis.type
-        )
+        try:
+            reply = await _generate_reply(question, [], question_analysis, first_turn=True)
+        except Exception as e:
+            print(f"❌ Error warming response cache for '{question}': {e}")
+            failed.append(question)
+            continue
         
-    except Exception as e:
-        print(f"❌ Error in chat endpoint: {str(e)}")
-        raise HTTPException(status_code=500, detail=f"Error generating response: {str(e)}")
+        degraded = reply.pop("degraded", False)
+        if degraded:
+            print(f"⚠️ Not warming '{question}': retrieval was unavailable")
+            failed.append(question)
+        elif reply["response"]:
+            exact_response_cache.put(key, reply)
+            warmed += 1
+    
+    return CacheWarmResponse(
+        message=f"Warmed {warmed} questions ({already_cached} already cached, {len(failed)} failed)",
+        warmed=warmed,
+        already_cached=already_cached,
+        failed=failed
+    )
 
 @router.get("/session/{session_id}/history", response_model=SessionHistoryResponse)
 async def get_session_history(session_id: str):
     """Get chat history for a session"""
-    history = chat_memory.get_chat_history(session_id)
+    history = await chat_memory.run(chat_memory.get_chat_history, session_id)
+    summary = await chat_memory.run(chat_memory.get_summary, session_id)
     return SessionHistoryResponse(
         session_id=session_id,
-        messages=history,
-        message_count=len(history)
+        messages=[message.to_dict() for message in history],
+        message_count=len(history),
+        summary=summary or None
     )
 
 @router.delete("/session/{session_id}")
 async def clear_session(session_id: str):
     """Clear a chat session"""
-    success = chat_memory.clear_session(session_id)
+    success = await chat_memory.run(chat_memory.clear_session, session_id)
     if success:
         return {"message": f"Session {session_id} cleared successfully"}
     else:
         raise HTTPException(status_code=404, detail="Session not found")
 
+@router.get("/sessions/memory", response_model=SessionMemoryReportResponse)
+async def get_session_memory_report(sample: int = 1000, target_sessions: int = 100000):
+    """Approximate bytes per session, projected to target_sessions for capacity planning"""
+    report = await chat_memory.run(chat_memory.memory_report, sample, target_sessions)
+    return SessionMemoryReportResponse(**report)
+
 @router.get("/sessions/cleanup", response_model=SessionCleanupResponse)
 async def cleanup_sessions():
     """Clean up expired sessions"""
-    cleaned = chat_memory.cleanup_expired_sessions()
+    cleaned = await chat_memory.run(chat_memory.cleanup_expired_sessions)
     return SessionCleanupResponse(message=f"Cleaned up {cleaned} expired sessions")
@@ -5,7 +5,8 @@ from fastapi import APIRouter, HTTPException
 from typing import Optional, List
 from chatbot.models.schemas import (
     RAGStatusResponse, RAGInitResponse, ThresholdUpdateResponse,
-    RAGTestResponse, QuestionAnalysisResponse
+    RAGTestResponse, QuestionAnalysisResponse, RAGRollbackResponse,
+    IndexRecallResponse, NprobeUpdateResponse, ProjectionReportResponse
 )
 from chatbot.services.rag import rag_service
 from chatbot.utils.text_processing import analyze_question_type
@@ -33,6 +34,40 @@ async def initialize_rag(urls: Optional[List[str]] = None):
             detail=f"Error initializing RAG system: {str(e)}"
         )
 
+@router.post("/rebuild", response_model=RAGInitResponse)
+async def rebuild_rag(urls: Optional[List[str]] = None):
+    """Rebuild the full index into a new version without taking the live one down"""
+    success = await rag_service.force_rebuild_vectorstore(urls)
+    if success:
+        return RAGInitResponse(
+            message=f"RAG index rebuilt as version {rag_service.index_version}",
+            status="success"
+        )
+    return RAGInitResponse(
+        message="Rebuild failed; the previous index is still live",
+        status="error"
+    )
+
+@router.post("/rollback", response_model=RAGRollbackResponse)
+async def rollback_rag(version: Optional[str] = None):
+    """Switch back to a previous index version (default: the one before the live version)"""
+    try:
+        restored = await rag_service.rollback_vectorstore(version)
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error rolling back RAG index: {str(e)}"
+        )
+    
+    if restored is None:
+        raise HTTPException(status_code=404, detail="No matching index version to roll back to")
+    
+    return RAGRollbackResponse(
+        message=f"RAG index rolled back to version {restored}",
+        status="success",
+        index_version=restored
+    )
+
 @router.get("/status", response_model=RAGStatusResponse)
 async def get_rag_status():
     """Get RAG system status"""
@@ -56,6 +91,52 @@ async def update_relevance_threshold(new_threshold: float):
         new_threshold=updated_threshold
     )
 
+@router.get("/index/recall", response_model=IndexRecallResponse)
+async def measure_index_recall(k: int = 3, samples: int = 100, nprobe: Optional[int] = None):
+    """Measure recall@k and latency of IVF/quantized search against exact search on the live index"""
+    if k < 1 or samples < 1 or (nprobe is not None and nprobe < 1):
+        raise HTTPException(status_code=400, detail="k, samples and nprobe must be positive")
+    
+    report = await rag_service.measure_index_recall(k, samples, nprobe)
+    if report is None:
+        raise HTTPException(
+            status_code=404,
+            detail="Recall check needs the numpy or ivf index engine and a ready index"
+        )
+    return IndexRecallResponse(**report)
+
+@router.put("/index/nprobe/{new_nprobe}", response_model=NprobeUpdateResponse)
+async def update_index_nprobe(new_nprobe: int):
+    """Update the number of IVF lists scanned per query"""
+    if new_nprobe < 1:
+        raise HTTPException(status_code=400, detail="nprobe must be at least 1")
+    
+    old_nprobe, updated_nprobe = rag_service.update_nprobe(new_nprobe)
+    
+    return NprobeUpdateResponse(
+        message=f"IVF nprobe updated from {old_nprobe} to {updated_nprobe}",
+        old_nprobe=old_nprobe,
+        new_nprobe=updated_nprobe
+    )
+
+@router.get("/projection/report", response_model=ProjectionReportResponse)
+async def get_projection_report(dims: str = "64,128,256,512,1024", k: int = 3, samples: int = 100):
+    """Compare recall@k and relevance-score drift of projection sizes against unreduced vectors"""
+    try:
+        dimensions = [int(d) for d in dims.split(",") if d.strip()]
+    except ValueError:
+        raise HTTPException(status_code=400, detail="dims must be a comma-separated list of integers")
+    if k < 1 or samples < 1 or not dimensions:
+        raise HTTPException(status_code=400, detail="k, samples and dims must be positive")
+    
+    report = await rag_service.projection_report(dimensions, k, samples)
+    if report is None:
+        raise HTTPException(
+            status_code=404,
+            detail="Projection report needs the numpy or ivf index engine and a ready index"
+        )
+    return ProjectionReportResponse(**report)
+
 @router.get("/test/{test_query}", response_model=RAGTestResponse)
 async def test_rag_relevance(test_query: str):
     """Test RAG system relevance scoring for a query"""
@@ -1,10 +1,11 @@
 """
 System health and utility API routes
 """
-from fastapi import APIRouter
-from chatbot.models.schemas import HealthResponse, QuestionAnalysisResponse
+from fastapi import APIRouter, Response
+from chatbot.models.schemas import HealthResponse, QuestionAnalysisResponse, ReadinessResponse
 from chatbot.services.memory import chat_memory
 from chatbot.services.rag import rag_service
+from chatbot.services.llm import llm_service
 from chatbot.utils.text_processing import analyze_question_type
 from chatbot.core.config import settings
 
@@ -19,20 +20,45 @@ async def root():
         "version": settings.API_VERSION
     }
 
+def is_startup_complete() -> bool:
+    """Startup work is done once the background index build has finished, successfully or not"""
+    return rag_service.index_state in ("ready", "failed", "disabled")
+
 @router.get("/health", response_model=HealthResponse)
 async def health_check():
     """Health check endpoint with system status"""
-    active_sessions = chat_memory.get_session_count()
+    sessions = await chat_memory.run(chat_memory.get_stats)
     
     return HealthResponse(
         status="healthy",
         service=f"{settings.API_TITLE} v{settings.API_VERSION} with Improved Response Handling",
-        active_sessions=active_sessions,
-        rag_initialized=rag_service.retriever is not None,
+        active_sessions=sessions["active_sessions"],
+        rag_initialized=rag_service.is_ready,
+        ready=is_startup_complete(),
+        rag_state=rag_service.index_state,
         relevance_threshold=rag_service.relevance_threshold,
         rag_disabled=str(settings.DISABLE_RAG).lower(),
         include_pdfs=str(settings.INCLUDE_PDFS).lower(),
-        chroma_dir=settings.CHROMA_DIR
+        chroma_dir=settings.CHROMA_DIR,
+        llm=llm_service.get_stats(),
+        sessions=sessions
+    )
+
+@router.get("/health/live", response_model=ReadinessResponse)
+async def liveness_check():
+    """Liveness probe: the process is up and serving requests"""
+    return ReadinessResponse(status="alive", ready=is_startup_complete(), rag_state=rag_service.index_state)
+
+@router.get("/health/ready", response_model=ReadinessResponse)
+async def readiness_check(response: Response):
+    """Readiness probe: 503 while the RAG index is still being built"""
+    ready = is_startup_complete()
+    if not ready:
+        response.status_code = 503
+    return ReadinessResponse(
+        status="ready" if ready else "starting",
+        ready=ready,
+        rag_state=rag_service.index_state
     )
 
 @router.get("/chat/test-question-analysis/{test_query}", response_model=QuestionAnalysisResponse)
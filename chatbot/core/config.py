@@ -2,7 +2,7 @@
 Configuration settings for the Readle Chatbot API
 """
 import os
-from typing import List
+from typing import Dict, List
 from dotenv import load_dotenv
 
 # Load environment variables
@@ -37,14 +37,53 @@ class Settings:
         extra_origins = os.getenv("ALLOWED_ORIGINS", "")
         if extra_origins:
             self.ALLOWED_ORIGINS.extend([o.strip() for o in extra_origins.split(",") if o.strip()])
+        
+        # Per-type prompt budgets from environment, e.g. "simple:1500,detailed:6000"
+        budget_overrides = os.getenv("PROMPT_TOKEN_BUDGETS", "")
+        for entry in budget_overrides.split(","):
+            if ":" in entry:
+                question_type, tokens = entry.split(":", 1)
+                self.PROMPT_TOKEN_BUDGETS[question_type.strip()] = int(tokens)
     
     # RAG Configuration
     RAG_THRESHOLD: float = float(os.getenv("RAG_THRESHOLD", "0.6"))
     DISABLE_RAG: bool = os.getenv("DISABLE_RAG", "false").lower() == "true"
     INCLUDE_PDFS: bool = os.getenv("INCLUDE_PDFS", "true").lower() == "true"
     OLLAMA_MODEL: str = os.getenv("OLLAMA_MODEL", "llama2")
+    
+    # Embedding provider: "ollama", "sentence-transformers" or "fake"
+    EMBEDDING_PROVIDER: str = os.getenv("EMBEDDING_PROVIDER", "ollama")
+    EMBEDDING_MODEL: str = os.getenv("EMBEDDING_MODEL", "sentence-transformers/all-MiniLM-L6-v2")
+    EMBEDDING_DEVICE: str = os.getenv("EMBEDDING_DEVICE", "cpu")
+    EMBEDDING_THREADS: int = int(os.getenv("EMBEDDING_THREADS", "0"))  # 0 = torch default
+    EMBEDDING_ACCELERATION: str = os.getenv("EMBEDDING_ACCELERATION", "none")  # none, onnx or int8
     CHROMA_DIR: str = os.getenv("CHROMA_DIR", "./chroma_db")
+    VECTOR_INDEX_ENGINE: str = os.getenv("VECTOR_INDEX_ENGINE", "chroma")  # chroma, numpy or ivf
+    # Quantized search codes for the numpy and ivf engines: none, int8 or binary
+    VECTOR_QUANTIZATION: str = os.getenv("VECTOR_QUANTIZATION", "none")
+    VECTOR_RESCORE_FACTOR: int = int(os.getenv("VECTOR_RESCORE_FACTOR", "10"))  # Candidates rescored per result
+    # Dimensionality reduction for the numpy and ivf engines: none, pca or truncate (Matryoshka)
+    VECTOR_PROJECTION: str = os.getenv("VECTOR_PROJECTION", "none")
+    VECTOR_PROJECTION_DIM: int = int(os.getenv("VECTOR_PROJECTION_DIM", "0"))
+    # IVF approximate search (VECTOR_INDEX_ENGINE=ivf)
+    IVF_NLIST: int = int(os.getenv("IVF_NLIST", "0"))  # 0 = sqrt(chunks)
+    IVF_NPROBE: int = int(os.getenv("IVF_NPROBE", "16"))  # Lists scanned per query
+    IVF_MIN_TRAIN_SIZE: int = int(os.getenv("IVF_MIN_TRAIN_SIZE", "4096"))  # Exact search below this
+    RAG_KEEP_VERSIONS: int = int(os.getenv("RAG_KEEP_VERSIONS", "3"))  # Index versions kept for rollback
+    # Seconds between checks for index versions published by another worker on this host
+    RAG_VERSION_POLL_SECONDS: float = float(os.getenv("RAG_VERSION_POLL_SECONDS", "10"))
     PDF_FOLDER: str = "./pdf"
+    # Worker processes for PDF extraction (0 = one per CPU, 1 = sequential)
+    PDF_WORKERS: int = int(os.getenv("PDF_WORKERS", "0"))
+    
+    # Embedding cache (stored under CHROMA_DIR/embedding_cache)
+    EMBEDDING_CACHE_ENABLED: bool = os.getenv("EMBEDDING_CACHE_ENABLED", "true").lower() == "true"
+    EMBEDDING_CACHE_MAX_MB: int = int(os.getenv("EMBEDDING_CACHE_MAX_MB", "512"))
+    
+    # Website fetching (shared aiohttp session)
+    WEB_FETCH_CONCURRENCY: int = int(os.getenv("WEB_FETCH_CONCURRENCY", "8"))
+    WEB_FETCH_LIMIT_PER_HOST: int = int(os.getenv("WEB_FETCH_LIMIT_PER_HOST", "4"))
+    WEB_FETCH_TIMEOUT: float = float(os.getenv("WEB_FETCH_TIMEOUT", "20"))
     
     # Default websites for RAG
     DEFAULT_WEBSITES: List[str] = [
@@ -54,17 +93,75 @@ class Settings:
     # Chat Configuration
     MAX_MESSAGES_PER_SESSION: int = 10
     SESSION_TIMEOUT_HOURS: int = 24
+    # Session store: "memory" (this process), "sqlite" (workers on one host) or "redis" (any worker or replica)
+    CHAT_MEMORY_BACKEND: str = os.getenv("CHAT_MEMORY_BACKEND", "memory")
+    CHAT_MEMORY_SQLITE_PATH: str = os.getenv("CHAT_MEMORY_SQLITE_PATH", "./chat_sessions.db")
+    REDIS_URL: str = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+    CHAT_MEMORY_REDIS_PREFIX: str = os.getenv("CHAT_MEMORY_REDIS_PREFIX", "readle:")
+    # Seconds a session store call may wait on a lock or socket before failing
+    CHAT_MEMORY_TIMEOUT: float = float(os.getenv("CHAT_MEMORY_TIMEOUT", "2"))
+    SESSION_MAX_BYTES: int = int(os.getenv("SESSION_MAX_BYTES", "65536"))  # Message text kept per session; oldest dropped first
+    MAX_SESSIONS: int = int(os.getenv("MAX_SESSIONS", "50000"))  # Least recently active sessions are evicted beyond this
+    SESSION_SWEEP_INTERVAL: float = float(os.getenv("SESSION_SWEEP_INTERVAL", "60"))  # Seconds between expiry sweeps
+    # Rolling summarization: older turns of long sessions are folded into a summary in the background
+    SUMMARY_ENABLED: bool = os.getenv("SUMMARY_ENABLED", "true").lower() == "true"
+    SUMMARY_TRIGGER_TOKENS: int = int(os.getenv("SUMMARY_TRIGGER_TOKENS", "1500"))  # History tokens that start compaction
+    SUMMARY_KEEP_MESSAGES: int = int(os.getenv("SUMMARY_KEEP_MESSAGES", "4"))  # Recent messages kept verbatim
+    SUMMARY_MAX_TOKENS: int = int(os.getenv("SUMMARY_MAX_TOKENS", "250"))
+    WS_HEARTBEAT_SECONDS: float = float(os.getenv("WS_HEARTBEAT_SECONDS", "20"))
+    WS_MAX_PENDING_TURNS: int = int(os.getenv("WS_MAX_PENDING_TURNS", "4"))  # Queued turns per WebSocket
     
     # LLM Configuration
     LLM_MODEL: str = "meta-llama/llama-4-scout-17b-16e-instruct"
     LLM_TEMPERATURE: float = 0.7
     LLM_TOP_P: float = 0.9
+    LLM_MAX_IN_FLIGHT: int = int(os.getenv("LLM_MAX_IN_FLIGHT", "16"))  # Concurrent Groq requests (and pooled connections)
+    LLM_TIMEOUT: float = float(os.getenv("LLM_TIMEOUT", "30"))  # Seconds per request
+    LLM_CONNECT_TIMEOUT: float = float(os.getenv("LLM_CONNECT_TIMEOUT", "5"))
+    LLM_MAX_RETRIES: int = int(os.getenv("LLM_MAX_RETRIES", "2"))
+    
+    # Prompt token budgets per question type (system prompt + RAG context + history + message)
+    PROMPT_TOKEN_BUDGETS: Dict[str, int] = {
+        "acknowledgment": 1000,
+        "simple": 2000,
+        "moderate": 2500,
+        "detailed": 4000,
+    }
+    PROMPT_TOKEN_BUDGET_DEFAULT: int = int(os.getenv("PROMPT_TOKEN_BUDGET_DEFAULT", "2500"))
+    PROMPT_CONTEXT_SHARE: float = float(os.getenv("PROMPT_CONTEXT_SHARE", "0.6"))  # Of the budget left after prompt and message
+    PROMPT_TOKENIZER: str = os.getenv("PROMPT_TOKENIZER", "cl100k_base")  # tiktoken encoding; approximate for Llama models
+    PROMPT_TOKEN_CACHE_SIZE: int = int(os.getenv("PROMPT_TOKEN_CACHE_SIZE", "4096"))  # Cached per-text token counts
     
     # Document Processing
     CHUNK_SIZE: int = 500
     CHUNK_OVERLAP: int = 50
     SIMILARITY_THRESHOLD: float = 0.5
     RETRIEVAL_K: int = 5
+    
+    # Query cache for retrieve_with_relevance_check (vectors and results, LRU with expiry)
+    QUERY_CACHE_SIZE: int = int(os.getenv("QUERY_CACHE_SIZE", "1024"))
+    QUERY_CACHE_TTL: float = float(os.getenv("QUERY_CACHE_TTL", "3600"))  # Seconds, 0 = no expiry
+    
+    # Thread pool for query embedding and vector search; calls beyond the queue limit skip RAG
+    RETRIEVAL_WORKERS: int = int(os.getenv("RETRIEVAL_WORKERS", "4"))
+    RETRIEVAL_QUEUE_SIZE: int = int(os.getenv("RETRIEVAL_QUEUE_SIZE", "64"))
+    
+    # Exact-match response cache for first-turn questions
+    EXACT_CACHE_SIZE: int = int(os.getenv("EXACT_CACHE_SIZE", "2048"))
+    EXACT_CACHE_TTL: float = float(os.getenv("EXACT_CACHE_TTL", "3600"))  # Seconds
+    
+    # Semantic response cache for first-turn questions (stored under CHROMA_DIR/response_cache)
+    SEMANTIC_CACHE_ENABLED: bool = os.getenv("SEMANTIC_CACHE_ENABLED", "true").lower() == "true"
+    SEMANTIC_CACHE_THRESHOLD: float = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.95"))  # Cosine similarity
+    SEMANTIC_CACHE_SIZE: int = int(os.getenv("SEMANTIC_CACHE_SIZE", "5000"))
+    SEMANTIC_CACHE_TTL: float = float(os.getenv("SEMANTIC_CACHE_TTL", "86400"))  # Seconds
+    
+    # Ingestion pipeline
+    EMBED_BATCH_SIZE: int = int(os.getenv("EMBED_BATCH_SIZE", "32"))  # Starting point, tuned at runtime
+    EMBED_BATCH_MIN: int = int(os.getenv("EMBED_BATCH_MIN", "4"))
+    EMBED_BATCH_MAX: int = int(os.getenv("EMBED_BATCH_MAX", "256"))
+    EMBED_MAX_IN_FLIGHT: int = int(os.getenv("EMBED_MAX_IN_FLIGHT", "2"))
+    INGEST_QUEUE_SIZE: int = int(os.getenv("INGEST_QUEUE_SIZE", "4"))
 
 # Create global settings instance
 settings = Settings()
@@ -95,6 +192,7 @@ def print_settings():
     print(f"  RAG Threshold: {settings.RAG_THRESHOLD}")
     print(f"  Include PDFs: {settings.INCLUDE_PDFS}")
     print(f"  Ollama Model: {settings.OLLAMA_MODEL}")
+    print(f"  Embedding Provider: {settings.EMBEDDING_PROVIDER}")
     print(f"  Chroma Directory: {settings.CHROMA_DIR}")
     print(f"  Allowed Origins: {len(settings.ALLOWED_ORIGINS)} configured")
     if settings.ALLOWED_ORIGIN_REGEX:
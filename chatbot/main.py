@@ -1,12 +1,17 @@
 """
 Main FastAPI application for Readle Chatbot
 """
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from contextlib import asynccontextmanager
 
 from chatbot.core.config import settings, validate_settings, print_settings
+from chatbot.services.memory import SessionStoreError, chat_memory
 from chatbot.services.rag import rag_service
+from chatbot.services.llm import llm_service
+from chatbot.services.response_cache import semantic_response_cache
+from chatbot.services.summarizer import conversation_summarizer
 from chatbot.api import chat, rag, system
 
 @asynccontextmanager
@@ -21,21 +26,26 @@ async def lifespan(app: FastAPI):
         print("❌ Configuration validation failed")
         exit(1)
     
-    # Initialize RAG system
-    print("🔧 Initializing RAG system...")
-    try:
-        await rag_service.initialize_vectorstore()
-        print("✅ RAG system initialized successfully")
-        print(f"🎯 Relevance threshold set to: {rag_service.relevance_threshold}")
-    except Exception as e:
-        print(f"⚠️ Failed to initialize RAG system: {e}")
-        print("🔄 Continuing without RAG capabilities")
+    # Build the RAG index in the background; chat uses general knowledge until it is ready
+    print("🔧 Initializing RAG system in the background...")
+    rag_service.start_background_initialization()
+    print(f"🎯 Relevance threshold set to: {rag_service.relevance_threshold}")
+    chat_memory.start_sweeper()
     
     print("✅ Readle Chatbot API started successfully!")
     yield
     
     # Shutdown
     print("🛑 Shutting down Readle Chatbot API...")
+    await rag_service.stop_background_initialization()
+    await chat_memory.stop_sweeper()
+    chat_memory.close()
+    if conversation_summarizer is not None:
+        await conversation_summarizer.stop()
+    await llm_service.close()
+    rag_service.retrieval_pool.shutdown()
+    if semantic_response_cache is not None:
+        semantic_response_cache.persist()
 
 # Create FastAPI application
 app = FastAPI(
@@ -45,6 +55,12 @@ app = FastAPI(
     lifespan=lifespan
 )
 
+@app.exception_handler(SessionStoreError)
+async def session_store_unavailable(request: Request, exc: SessionStoreError):
+    """A stalled or unreachable session store fails the request fast instead of hanging it"""
+    print(f"❌ {exc}")
+    return JSONResponse(status_code=503, content={"detail": str(exc)})
+
 # Configure CORS
 def setup_cors():
     """Setup CORS middleware based on configuration"""
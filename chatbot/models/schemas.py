@@ -35,6 +35,23 @@ class SessionHistoryResponse(BaseModel):
     session_id: str
     messages: List[MessageHistory]
     message_count: int
+    summary: Optional[str] = None  # Older turns compacted out of messages
+
+class SessionMemoryReportResponse(BaseModel):
+    """Response model for the chat session memory report"""
+    active_sessions: int
+    sampled_sessions: int
+    avg_bytes_per_session: int = 0
+    p95_bytes_per_session: int = 0
+    max_bytes_per_session: int = 0
+    avg_messages_per_session: float = 0.0
+    estimated_total_bytes: int = 0
+    target_sessions: int = 0
+    projected_bytes_at_target: int = 0
+    worst_case_bytes_per_session: int = 0
+    worst_case_bytes_at_target: int = 0
+    max_session_bytes: int
+    max_messages_per_session: int
 
 class HealthResponse(BaseModel):
     """Response model for health check"""
@@ -42,26 +59,91 @@ class HealthResponse(BaseModel):
     service: str
     active_sessions: int
     rag_initialized: bool
+    ready: bool = False
+    rag_state: str = "unknown"
     relevance_threshold: float
     rag_disabled: str
     include_pdfs: str
     chroma_dir: str
+    llm: Optional[Dict[str, Any]] = None
+    sessions: Optional[Dict[str, Any]] = None
+
+class ReadinessResponse(BaseModel):
+    """Response model for liveness and readiness probes"""
+    status: str
+    ready: bool
+    rag_state: str
 
 class RAGStatusResponse(BaseModel):
     """Response model for RAG status"""
     initialized: bool
+    index_state: str = "unknown"
+    index_engine: Optional[str] = None
+    index_version: Optional[str] = None
+    ivf_nprobe: Optional[int] = None
+    index_memory: Optional[Dict[str, Any]] = None
+    available_versions: List[str] = []
     vectorstore_available: bool
     relevance_threshold: float
     default_websites: List[str]
     pdf_folder: str
     pdf_files_found: List[str]
     total_pdf_files: int
+    embedding_cache: Optional[Dict[str, Any]] = None
+    query_cache: Optional[Dict[str, Any]] = None
+    ingestion: Optional[Dict[str, Any]] = None
+    retrieval_pool: Optional[Dict[str, Any]] = None
 
 class RAGInitResponse(BaseModel):
     """Response model for RAG initialization"""
     message: str
     status: str
 
+class RAGRollbackResponse(BaseModel):
+    """Response model for index rollback"""
+    message: str
+    status: str
+    index_version: Optional[str] = None
+
+class IndexRecallResponse(BaseModel):
+    """Response model for the recall check against exact search"""
+    k: int
+    quantization: str
+    nprobe: Optional[int] = None
+    nlist: Optional[int] = None
+    trained: Optional[bool] = None
+    chunks: int
+    queries: int
+    recall_at_k: float
+    exact_ms: float
+    ann_ms: float
+
+class ProjectionDimensionReport(BaseModel):
+    """Quality of one candidate projection size"""
+    dim: int
+    recall_at_k: float
+    mean_score_drift: float
+    max_score_drift: float
+    bytes_per_vector: int
+    threshold_agreement: Optional[float] = None
+
+class ProjectionReportResponse(BaseModel):
+    """Response model for the projection report"""
+    projection: str
+    input_dim: int
+    active_dim: Optional[int] = None
+    k: int
+    corpus_rows: int
+    queries: int
+    threshold: Optional[float] = None
+    dimensions: List[ProjectionDimensionReport]
+
+class NprobeUpdateResponse(BaseModel):
+    """Response model for IVF nprobe update"""
+    message: str
+    old_nprobe: int
+    new_nprobe: int
+
 class ThresholdUpdateResponse(BaseModel):
     """Response model for threshold update"""
     message: str
@@ -84,6 +166,24 @@ class QuestionAnalysisResponse(BaseModel):
     response_style: str
     word_count: int
 
+class ResponseCacheStatsResponse(BaseModel):
+    """Response model for response cache statistics"""
+    exact: Dict[str, Any]
+    semantic: Optional[Dict[str, Any]] = None
+
+class CacheFlushResponse(BaseModel):
+    """Response model for flushing the response caches"""
+    message: str
+    exact_entries_removed: int
+    semantic_entries_removed: int
+
+class CacheWarmResponse(BaseModel):
+    """Response model for warming the response caches"""
+    message: str
+    warmed: int
+    already_cached: int
+    failed: List[str] = []
+
 class SessionCleanupResponse(BaseModel):
     """Response model for session cleanup"""
     message: str
@@ -107,3 +207,6 @@ class RAGResult(BaseModel):
     content: str
     should_use_rag: bool
     relevance_score: float
+    context_digest: str = ""  # Identifies the retrieved context, empty when RAG is not used
+    chunks: List[str] = []  # Formatted chunks making up content, most relevant first
+    degraded: bool = False  # Retrieval failed or the index is not built yet, so replies must not be cached
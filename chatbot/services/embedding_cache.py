@@ -0,0 +1,264 @@
+"""
+Persistent, content-addressed cache for document embeddings
+"""
+import hashlib
+import json
+import mmap
+import os
+import threading
+import time
+import uuid
+from array import array
+from typing import Dict, List, Optional
+
+from langchain_core.embeddings import Embeddings
+
+FLOAT_SIZE = array('f').itemsize
+VECTORS_PREFIX = "vectors-"
+VECTORS_SUFFIX = ".f32"
+
+class EmbeddingCache:
+    """
+    Embedding vectors keyed by hash(model, text).
+
+    Vectors are appended as raw float32 to a single file that is read through a
+    memory map; a JSON index maps each key to its offset, dimension and last use.
+    When the vector file grows past max_bytes, the least recently used entries are
+    dropped and the file is compacted.
+
+    The vector file is named after a generation ID that the index records.
+    Compaction writes a new generation, publishes the index that points at it
+    and only then deletes the old file, so an index is never read against a
+    vector file it does not describe.
+
+    Worker processes on one host share the directory, but only one writes at a
+    time: RAGService only embeds documents while holding the index build lock,
+    and calls reload() first to pick up what the previous builder wrote.
+    Appends are placed at the file's actual end, so bytes left unindexed by a
+    crashed writer are skipped rather than misread; compaction reclaims them.
+    """
+
+    def __init__(self, cache_dir: str, max_bytes: int, flush_every: int = 256):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.flush_every = flush_every
+        self.index_file = os.path.join(cache_dir, "index.json")
+        self.generation = ""
+        self.vectors_file = ""
+
+        # key -> [offset in floats, dim, last used timestamp]
+        self.entries: Dict[str, List] = {}
+        self.size_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self._lock = threading.Lock()
+        self._mmap: Optional[mmap.mmap] = None
+        self._mapped_size = 0
+        self._unflushed = 0
+
+        os.makedirs(cache_dir, exist_ok=True)
+        self._load()
+
+    @staticmethod
+    def make_key(model: str, text: str) -> str:
+        """Content address for a chunk of text embedded by a given model"""
+        return hashlib.blake2b(f"{model}\0{text}".encode("utf-8"), digest_size=16).hexdigest()
+
+    def _vectors_path(self, generation: str) -> str:
+        return os.path.join(self.cache_dir, f"{VECTORS_PREFIX}{generation}{VECTORS_SUFFIX}")
+
+    def _load(self):
+        """Load the index; the file is never truncated, since another process may be appending to it"""
+        index = {}
+        if os.path.exists(self.index_file):
+            try:
+                with open(self.index_file, 'r') as f:
+                    index = json.load(f)
+            except Exception as e:
+                print(f"⚠️ Embedding cache index unreadable, starting empty: {e}")
+
+        generation = index.get("generation")
+        if generation and os.path.exists(self._vectors_path(generation)):
+            self.generation = generation
+            self.entries = index.get("entries", {})
+        else:
+            # Offsets are only meaningful in the vector file they were written to
+            if index.get("entries"):
+                print("⚠️ Embedding cache index does not match any vector file, starting empty")
+            self.generation = uuid.uuid4().hex
+            self.entries = {}
+        self.vectors_file = self._vectors_path(self.generation)
+        self.size_bytes = os.path.getsize(self.vectors_file) if os.path.exists(self.vectors_file) else 0
+
+        # Entries pointing past the end of a vector file cut short (e.g. on a full disk) cannot be read
+        self.entries = {
+            key: entry for key, entry in self.entries.items()
+            if (entry[0] + entry[1]) * FLOAT_SIZE <= self.size_bytes
+        }
+
+    def reload(self):
+        """Re-read the index and vectors written by other processes since this one loaded them"""
+        with self._lock:
+            if self._mmap is not None:
+                self._mmap.close()
+                self._mmap = None
+            self._mapped_size = 0
+            self._unflushed = 0
+            self._load()
+
+    def _remap(self):
+        """Refresh the read-only memory map after the vector file grew or was rewritten"""
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+        self._mapped_size = self.size_bytes
+        if self.size_bytes:
+            with open(self.vectors_file, 'rb') as f:
+                self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def _read(self, offset: int, dim: int) -> List[float]:
+        if self._mapped_size < (offset + dim) * FLOAT_SIZE:
+            self._remap()
+        vector = array('f')
+        vector.frombytes(self._mmap[offset * FLOAT_SIZE:(offset + dim) * FLOAT_SIZE])
+        return vector.tolist()
+
+    def get_many(self, keys: List[str]) -> List[Optional[List[float]]]:
+        """Look up vectors for keys, returning None for misses"""
+        now = time.time()
+        results = []
+        with self._lock:
+            for key in keys:
+                entry = self.entries.get(key)
+                if entry is None:
+                    self.misses += 1
+                    results.append(None)
+                    continue
+                entry[2] = now
+                self.hits += 1
+                results.append(self._read(entry[0], entry[1]))
+        return results
+
+    def put_many(self, keys: List[str], vectors: List[List[float]]):
+        """Append new vectors to the cache and evict if it grew past its budget"""
+        now = time.time()
+        with self._lock:
+            with open(self.vectors_file, 'ab') as f:
+                # Offsets come from the file itself, not from this instance's idea of its size
+                self.size_bytes = os.fstat(f.fileno()).st_size
+                # Pad past a vector cut short by a crashed writer
+                padding = -self.size_bytes % FLOAT_SIZE
+                if padding:
+                    f.write(bytes(padding))
+                    self.size_bytes += padding
+                for key, vector in zip(keys, vectors):
+                    if key in self.entries:
+                        continue
+                    data = array('f', vector)
+                    f.write(data.tobytes())
+                    self.entries[key] = [self.size_bytes // FLOAT_SIZE, len(data), now]
+                    self.size_bytes += len(data) * FLOAT_SIZE
+                    self._unflushed += 1
+
+            if self.size_bytes > self.max_bytes:
+                self._evict()
+            if self._unflushed >= self.flush_every:
+                self._flush_locked()
+
+    def _evict(self):
+        """Drop least recently used entries down to 80% of the budget and compact the file"""
+        target = int(self.max_bytes * 0.8)
+        kept, kept_bytes = [], 0
+        for key, entry in sorted(self.entries.items(), key=lambda item: item[1][2], reverse=True):
+            entry_bytes = entry[1] * FLOAT_SIZE
+            if kept_bytes + entry_bytes > target:
+                continue
+            kept.append((key, entry))
+            kept_bytes += entry_bytes
+
+        if self._mapped_size < self.size_bytes:
+            self._remap()
+
+        # The compacted vectors go to a new generation; the index switches to it when flushed
+        generation = uuid.uuid4().hex
+        new_entries, offset = {}, 0
+        with open(self._vectors_path(generation), 'wb') as f:
+            for key, (old_offset, dim, last_used) in kept:
+                f.write(self._mmap[old_offset * FLOAT_SIZE:(old_offset + dim) * FLOAT_SIZE])
+                new_entries[key] = [offset, dim, last_used]
+                offset += dim
+
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+
+        self.evictions += len(self.entries) - len(new_entries)
+        self.generation = generation
+        self.vectors_file = self._vectors_path(generation)
+        self.entries = new_entries
+        self.size_bytes = offset * FLOAT_SIZE
+        self._mapped_size = 0
+        self._flush_locked()
+
+    def _flush_locked(self):
+        tmp_file = f"{self.index_file}.tmp"
+        with open(tmp_file, 'w') as f:
+            json.dump({"generation": self.generation, "size_bytes": self.size_bytes, "entries": self.entries}, f)
+        os.replace(tmp_file, self.index_file)
+        self._unflushed = 0
+        self._remove_stale_generations()
+
+    def _remove_stale_generations(self):
+        """Delete vector files the published index no longer points at (old or left by a crashed writer)"""
+        for name in os.listdir(self.cache_dir):
+            # "vectors" also matches the unversioned vectors.f32 of earlier releases
+            if name.startswith("vectors") and name.endswith(VECTORS_SUFFIX) and \
+                    os.path.join(self.cache_dir, name) != self.vectors_file:
+                try:
+                    os.remove(os.path.join(self.cache_dir, name))
+                except OSError:
+                    pass
+
+    def flush(self):
+        """Persist the offset index"""
+        with self._lock:
+            self._flush_locked()
+
+    def get_stats(self) -> dict:
+        """Hit/miss counters and size information"""
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self.entries),
+            "size_bytes": self.size_bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions
+        }
+
+class CachedEmbeddings(Embeddings):
+    """Embeddings wrapper that only sends uncached document texts to the backend"""
+
+    def __init__(self, underlying: Embeddings, cache: EmbeddingCache, model_id: str):
+        self.underlying = underlying
+        self.cache = cache
+        self.model_id = model_id
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        keys = [EmbeddingCache.make_key(self.model_id, text) for text in texts]
+        vectors = self.cache.get_many(keys)
+
+        missing = [i for i, vector in enumerate(vectors) if vector is None]
+        if missing:
+            computed = self.underlying.embed_documents([texts[i] for i in missing])
+            self.cache.put_many([keys[i] for i in missing], computed)
+            for i, vector in zip(missing, computed):
+                vectors[i] = vector
+
+        return vectors
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.underlying.embed_query(text)
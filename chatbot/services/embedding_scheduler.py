@@ -0,0 +1,151 @@
+"""
+Adaptive, concurrent batch scheduler for embedding requests during index builds
+"""
+import asyncio
+import time
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from langchain_core.embeddings import Embeddings
+
+class EmbeddingScheduler:
+    """
+    Keeps several embedding batches in flight and tunes the batch size from
+    measured throughput.
+
+    Throughput is measured over windows of completed batches as chunks per second
+    of wall-clock time, so it reflects both batch size and concurrency. After each
+    window the batch size keeps moving in the same direction (doubling or halving)
+    while throughput improves, and turns around when it drops.
+    """
+
+    def __init__(
+        self,
+        embeddings: Embeddings,
+        on_batch: Callable[[List[str], List[str], List[List[float]], List[Dict]], Awaitable[None]],
+        batch_size: int = 32,
+        min_batch_size: int = 4,
+        max_batch_size: int = 256,
+        max_in_flight: int = 2,
+        window_batches: int = 3
+    ):
+        self.embeddings = embeddings
+        self.on_batch = on_batch
+        self.min_batch_size = max(1, min_batch_size)
+        self.max_batch_size = max(self.min_batch_size, max_batch_size)
+        self.batch_size = min(max(batch_size, self.min_batch_size), self.max_batch_size)
+        self.max_in_flight = max(1, max_in_flight)
+        self.window_batches = max(1, window_batches)
+
+        self._slots = asyncio.Semaphore(self.max_in_flight)
+        self._tasks: set = set()
+        self._error: Optional[BaseException] = None
+
+        # Tuning state
+        self._direction = 1
+        self._last_window_throughput = 0.0
+        self._window_started = 0.0
+        self._window_chunks = 0
+        self._window_count = 0
+
+        # Telemetry
+        self.started_at = 0.0
+        self.chunks_embedded = 0
+        self.batches_completed = 0
+        self.in_flight = 0
+        self.current_throughput = 0.0
+        self.batch_size_history: List[int] = [self.batch_size]
+
+    async def submit(self, ids: List[str], texts: List[str], metadatas: List[Dict]):
+        """Queue a batch for embedding, waiting while max_in_flight batches are running"""
+        self._raise_if_failed()
+        await self._slots.acquire()
+        self._raise_if_failed()
+
+        now = time.time()
+        if not self.started_at:
+            self.started_at = now
+        if not self._window_started:
+            self._window_started = now
+
+        self.in_flight += 1
+        task = asyncio.create_task(self._run_batch(ids, texts, metadatas))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def join(self):
+        """Wait for every in-flight batch and re-raise the first failure"""
+        while self._tasks:
+            await asyncio.gather(*list(self._tasks), return_exceptions=True)
+        self._raise_if_failed()
+
+    def cancel(self):
+        for task in list(self._tasks):
+            task.cancel()
+
+    async def _run_batch(self, ids: List[str], texts: List[str], metadatas: List[Dict]):
+        try:
+            vectors = await asyncio.to_thread(self.embeddings.embed_documents, texts)
+            self._record(len(texts))
+            await self.on_batch(ids, texts, vectors, metadatas)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            if self._error is None:
+                self._error = e
+        finally:
+            self.in_flight -= 1
+            self._slots.release()
+
+    def _raise_if_failed(self):
+        if self._error is not None:
+            raise self._error
+
+    def _record(self, chunk_count: int):
+        self.chunks_embedded += chunk_count
+        self.batches_completed += 1
+        self._window_chunks += chunk_count
+        self._window_count += 1
+
+        if self._window_count >= self.window_batches:
+            self._tune()
+
+    def _tune(self):
+        """Hill-climb the batch size on the throughput of the window that just finished"""
+        now = time.time()
+        elapsed = max(now - self._window_started, 1e-6)
+        throughput = self._window_chunks / elapsed
+        self.current_throughput = throughput
+
+        if self._last_window_throughput and throughput < self._last_window_throughput * 0.95:
+            self._direction = -self._direction
+
+        if self._direction > 0:
+            new_size = min(self.batch_size * 2, self.max_batch_size)
+        else:
+            new_size = max(self.batch_size // 2, self.min_batch_size)
+
+        # Bounce off the limits instead of sitting on them
+        if new_size == self.batch_size:
+            self._direction = -self._direction
+        else:
+            self.batch_size = new_size
+            self.batch_size_history.append(new_size)
+
+        self._last_window_throughput = throughput
+        self._window_started = now
+        self._window_chunks = 0
+        self._window_count = 0
+
+    def get_stats(self) -> dict:
+        """Running telemetry for status reporting and progress output"""
+        elapsed = time.time() - self.started_at if self.started_at else 0.0
+        return {
+            "chunks_embedded": self.chunks_embedded,
+            "batches_completed": self.batches_completed,
+            "batch_size": self.batch_size,
+            "in_flight": self.in_flight,
+            "max_in_flight": self.max_in_flight,
+            "chunks_per_second": round(self.chunks_embedded / elapsed, 2) if elapsed else 0.0,
+            "recent_chunks_per_second": round(self.current_throughput, 2),
+            "batch_size_history": self.batch_size_history[-10:]
+        }
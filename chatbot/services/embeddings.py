@@ -0,0 +1,114 @@
+"""
+Embedding provider registry and the in-process sentence-transformers backend
+"""
+import threading
+from typing import Callable, Dict, List, Tuple
+
+from langchain_core.embeddings import Embeddings
+
+from chatbot.core.config import settings
+
+# Factories return the embeddings object and a model ID used for cache keys and
+# index fingerprints, so switching models never mixes incompatible vectors
+EmbeddingFactory = Callable[[], Tuple[Embeddings, str]]
+
+EMBEDDING_PROVIDERS: Dict[str, EmbeddingFactory] = {}
+
+def register_embedding_provider(name: str) -> Callable[[EmbeddingFactory], EmbeddingFactory]:
+    """Register an embedding factory under a name selectable via EMBEDDING_PROVIDER"""
+    def decorator(factory: EmbeddingFactory) -> EmbeddingFactory:
+        EMBEDDING_PROVIDERS[name] = factory
+        return factory
+    return decorator
+
+def create_embeddings(name: str) -> Tuple[Embeddings, str]:
+    """Instantiate a registered embedding provider"""
+    if name not in EMBEDDING_PROVIDERS:
+        available = ", ".join(sorted(EMBEDDING_PROVIDERS))
+        raise ValueError(f"Unknown embedding provider '{name}' (available: {available})")
+    return EMBEDDING_PROVIDERS[name]()
+
+class SentenceTransformerEmbeddings(Embeddings):
+    """
+    Small-model embeddings computed in-process on the CPU.
+
+    Batches are encoded directly by sentence-transformers with normalized
+    outputs. `threads` caps the torch intra-op thread pool, and `acceleration`
+    selects the ONNX Runtime backend ("onnx") or dynamic int8 quantization of
+    the linear layers ("int8"). Calls are serialized because parallel encodes
+    only compete for the same cores.
+    """
+
+    def __init__(
+        self,
+        model_name: str,
+        device: str = "cpu",
+        threads: int = 0,
+        acceleration: str = "none",
+        encode_batch_size: int = 32
+    ):
+        from sentence_transformers import SentenceTransformer
+
+        if threads > 0:
+            import torch
+            torch.set_num_threads(threads)
+
+        if acceleration == "onnx":
+            self.model = SentenceTransformer(model_name, device=device, backend="onnx")
+        else:
+            self.model = SentenceTransformer(model_name, device=device)
+            if acceleration == "int8":
+                import torch
+                self.model = torch.quantization.quantize_dynamic(
+                    self.model, {torch.nn.Linear}, dtype=torch.qint8
+                )
+            elif acceleration != "none":
+                raise ValueError(f"Unknown embedding acceleration '{acceleration}'")
+
+        self.model_name = model_name
+        self.encode_batch_size = encode_batch_size
+        self._lock = threading.Lock()
+
+    def _encode(self, texts: List[str]) -> List[List[float]]:
+        with self._lock:
+            vectors = self.model.encode(
+                texts,
+                batch_size=self.encode_batch_size,
+                convert_to_numpy=True,
+                normalize_embeddings=True,
+                show_progress_bar=False
+            )
+        return vectors.tolist()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        if not texts:
+            return []
+        return self._encode(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._encode([text])[0]
+
+@register_embedding_provider("ollama")
+def _create_ollama_embeddings() -> Tuple[Embeddings, str]:
+    from langchain_community.embeddings import OllamaEmbeddings
+
+    # GPU acceleration is used if Ollama itself is configured with CUDA
+    embeddings = OllamaEmbeddings(model=settings.OLLAMA_MODEL)
+    return embeddings, f"ollama:{settings.OLLAMA_MODEL}"
+
+@register_embedding_provider("sentence-transformers")
+def _create_sentence_transformer_embeddings() -> Tuple[Embeddings, str]:
+    embeddings = SentenceTransformerEmbeddings(
+        model_name=settings.EMBEDDING_MODEL,
+        device=settings.EMBEDDING_DEVICE,
+        threads=settings.EMBEDDING_THREADS,
+        acceleration=settings.EMBEDDING_ACCELERATION
+    )
+    return embeddings, f"sentence-transformers:{settings.EMBEDDING_MODEL}:{settings.EMBEDDING_ACCELERATION}"
+
+@register_embedding_provider("fake")
+def _create_fake_embeddings() -> Tuple[Embeddings, str]:
+    from langchain.embeddings import FakeEmbeddings
+
+    # Deterministic-size vectors for API compatibility when nothing else is available
+    return FakeEmbeddings(size=384), "fake:384"
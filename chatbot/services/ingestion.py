@@ -0,0 +1,204 @@
+"""
+Streaming ingestion pipeline: load → split → embed → write with bounded queues
+"""
+import asyncio
+import time
+from typing import AsyncIterator, Callable, Dict, List, Optional, Tuple
+
+from langchain.schema import Document
+from langchain_core.embeddings import Embeddings
+
+from chatbot.services.embedding_scheduler import EmbeddingScheduler
+
+# Marks the end of a stage's output
+_DONE = object()
+
+# (chunk IDs, chunk documents, stale chunk IDs to delete)
+SplitResult = Tuple[List[str], List[Document], List[str]]
+
+class IngestionPipeline:
+    """
+    Runs the ingestion stages concurrently, connected by bounded asyncio queues.
+
+    Every queue is bounded, so a slow stage applies backpressure to the ones
+    before it and memory stays bounded no matter how large the corpus is.
+    Embedding is delegated to an EmbeddingScheduler that keeps several batches in
+    flight; other blocking work (splitting, store writes) runs in worker threads so
+    the event loop stays responsive.
+    """
+
+    def __init__(
+        self,
+        embeddings: Embeddings,
+        split_source: Callable[[str, List[Document]], SplitResult],
+        write_chunks: Callable[[List[str], List[str], List[List[float]], List[Dict]], None],
+        delete_chunks: Callable[[List[str]], None],
+        batch_size: int = 32,
+        min_batch_size: int = 4,
+        max_batch_size: int = 256,
+        max_in_flight: int = 2,
+        queue_size: int = 4
+    ):
+        self.split_source = split_source
+        self.write_chunks = write_chunks
+        self.delete_chunks = delete_chunks
+        self.queue_size = max(1, queue_size)
+        self._writes_queue: Optional[asyncio.Queue] = None
+        self.scheduler = EmbeddingScheduler(
+            embeddings,
+            on_batch=self._queue_write,
+            batch_size=batch_size,
+            min_batch_size=min_batch_size,
+            max_batch_size=max_batch_size,
+            max_in_flight=max_in_flight
+        )
+
+        self.sources_loaded = 0
+        self.chunks_written = 0
+        self.started_at = 0.0
+
+    async def run(self, sources: AsyncIterator[Tuple[str, List[Document]]]) -> dict:
+        """Consume (source_key, documents) pairs until exhausted and return run statistics"""
+        self.started_at = time.time()
+        documents_queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        chunks_queue: asyncio.Queue = asyncio.Queue(maxsize=self.scheduler.max_batch_size * self.queue_size)
+        writes_queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        self._writes_queue = writes_queue
+
+        tasks = [
+            asyncio.create_task(self._load_stage(sources, documents_queue)),
+            asyncio.create_task(self._split_stage(documents_queue, chunks_queue)),
+            asyncio.create_task(self._embed_stage(chunks_queue, writes_queue)),
+            asyncio.create_task(self._write_stage(writes_queue)),
+        ]
+
+        try:
+            done, pending = await asyncio.wait(tasks, return_when=asyncio.FIRST_EXCEPTION)
+            for task in done:
+                if task.exception():
+                    raise task.exception()
+        finally:
+            self.scheduler.cancel()
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+        if self.chunks_written:
+            print()  # New line after progress updates
+
+        return self.get_stats()
+
+    async def _load_stage(self, sources, documents_queue: asyncio.Queue):
+        async for source_key, docs in sources:
+            self.sources_loaded += 1
+            await documents_queue.put((source_key, docs))
+        await documents_queue.put(_DONE)
+
+    async def _split_stage(self, documents_queue: asyncio.Queue, chunks_queue: asyncio.Queue):
+        while True:
+            item = await documents_queue.get()
+            if item is _DONE:
+                break
+
+            source_key, docs = item
+            ids, chunks, stale_ids = await asyncio.to_thread(self.split_source, source_key, docs)
+
+            if stale_ids:
+                await chunks_queue.put(("delete", stale_ids))
+            for chunk_id, chunk in zip(ids, chunks):
+                await chunks_queue.put(("chunk", (chunk_id, chunk)))
+        await chunks_queue.put(_DONE)
+
+    async def _queue_write(self, ids, texts, vectors, metadatas):
+        await self._writes_queue.put(("write", (ids, texts, vectors, metadatas)))
+
+    async def _embed_stage(self, chunks_queue: asyncio.Queue, writes_queue: asyncio.Queue):
+        batch: List[Tuple[str, Document]] = []
+
+        async def flush():
+            if not batch:
+                return
+            ids = [chunk_id for chunk_id, _ in batch]
+            texts = [chunk.page_content for _, chunk in batch]
+            metadatas = [chunk.metadata for _, chunk in batch]
+            batch.clear()
+            await self.scheduler.submit(ids, texts, metadatas)
+
+        while True:
+            item = await chunks_queue.get()
+            if item is _DONE:
+                break
+
+            kind, payload = item
+            if kind == "delete":
+                # Stale IDs never overlap chunks still being embedded, so order is safe
+                await writes_queue.put(item)
+                continue
+
+            batch.append(payload)
+            if len(batch) >= self.scheduler.batch_size:
+                await flush()
+
+        await flush()
+        await self.scheduler.join()
+        await writes_queue.put(_DONE)
+
+    async def _write_stage(self, writes_queue: asyncio.Queue):
+        while True:
+            item = await writes_queue.get()
+            if item is _DONE:
+                break
+
+            kind, payload = item
+            if kind == "delete":
+                await asyncio.to_thread(self.delete_chunks, payload)
+                continue
+
+            ids, texts, vectors, metadatas = payload
+            await asyncio.to_thread(self.write_chunks, ids, texts, vectors, metadatas)
+            self.chunks_written += len(ids)
+
+            elapsed = time.time() - self.started_at
+            telemetry = self.scheduler.get_stats()
+            print(f"🔄 Progress: {self.chunks_written} chunks from {self.sources_loaded} sources | "
+                  f"Elapsed: {elapsed:.1f}s | Speed: {telemetry['chunks_per_second']:.1f} chunks/s | "
+                  f"Batch: {telemetry['batch_size']} x{telemetry['in_flight']} in flight", end='\r')
+
+    def get_stats(self) -> dict:
+        """Counters for the current or last run"""
+        return {
+            "sources_loaded": self.sources_loaded,
+            "chunks_written": self.chunks_written,
+            "elapsed_seconds": round(time.time() - self.started_at, 3) if self.started_at else 0.0,
+            "embedding": self.scheduler.get_stats()
+        }
+
+async def merge_sources(*iterators: AsyncIterator[Tuple[str, List[Document]]]) -> AsyncIterator[Tuple[str, List[Document]]]:
+    """Interleave several source streams, yielding items as soon as any stream produces one"""
+    queue: asyncio.Queue = asyncio.Queue(maxsize=1)
+    errors: List[Exception] = []
+
+    async def drain(iterator):
+        try:
+            async for item in iterator:
+                await queue.put(item)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            errors.append(e)
+        await queue.put(_DONE)
+
+    tasks = [asyncio.create_task(drain(iterator)) for iterator in iterators]
+    remaining = len(tasks)
+    try:
+        while remaining:
+            item = await queue.get()
+            if item is _DONE:
+                remaining -= 1
+                continue
+            yield item
+        if errors:
+            raise errors[0]
+    finally:
+        for task in tasks:
+            task.cancel()
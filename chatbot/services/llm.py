@@ -1,8 +1,11 @@
 """
 LLM service for generating chat responses using Groq API
 """
-from groq import Groq
-from typing import List, Dict
+import asyncio
+import httpx
+from contextlib import asynccontextmanager
+from groq import AsyncGroq
+from typing import AsyncIterator, List, Dict, Optional
 from chatbot.core.config import settings
 from chatbot.models.schemas import QuestionAnalysis
 
@@ -10,27 +13,54 @@ class LLMService:
     """Service for interacting with Large Language Models via Groq API"""
     
     def __init__(self):
-        self.client = Groq(api_key=settings.GROQ_API_KEY)
         self.model = settings.LLM_MODEL
         self.temperature = settings.LLM_TEMPERATURE
         self.top_p = settings.LLM_TOP_P
+        self.max_in_flight = max(1, settings.LLM_MAX_IN_FLIGHT)
+        self.timeout = httpx.Timeout(settings.LLM_TIMEOUT, connect=settings.LLM_CONNECT_TIMEOUT)
+        
+        # Created on first use and shared by every request, so connections are kept alive
+        self._client: Optional[AsyncGroq] = None
+        self._slots = asyncio.Semaphore(self.max_in_flight)
+        self.in_flight = 0
+        self.waiting = 0
+    
+    @property
+    def client(self) -> AsyncGroq:
+        """Async Groq client backed by one pooled HTTP connection set"""
+        if self._client is None:
+            http_client = httpx.AsyncClient(
+                timeout=self.timeout,
+                limits=httpx.Limits(
+                    max_connections=self.max_in_flight,
+                    max_keepalive_connections=self.max_in_flight
+                )
+            )
+            self._client = AsyncGroq(
+                api_key=settings.GROQ_API_KEY,
+                timeout=self.timeout,
+                max_retries=settings.LLM_MAX_RETRIES,
+                http_client=http_client
+            )
+        return self._client
     
     async def generate_response(
         self,
         messages: List[Dict[str, str]],
         question_analysis: QuestionAnalysis
     ) -> str:
-        """Generate a response using the LLM"""
+        """Generate a response using the LLM, waiting for a free slot beyond max_in_flight"""
         try:
-            chat_completion = self.client.chat.completions.create(
-                messages=messages,
-                model=self.model,
-                temperature=self.temperature,
-                max_tokens=question_analysis.max_tokens,
-                top_p=self.top_p,
-                stream=False,
-                stop=None  # Let the model finish naturally
-            )
+            async with self._acquire_slot():
+                chat_completion = await self.client.chat.completions.create(
+                    messages=messages,
+                    model=self.model,
+                    temperature=self.temperature,
+                    max_tokens=question_analysis.max_tokens,
+                    top_p=self.top_p,
+                    stream=False,
+                    stop=None  # Let the model finish naturally
+                )
             
             response_content = chat_completion.choices[0].message.content
             return response_content or ""
@@ -39,6 +69,67 @@ class LLMService:
             print(f"❌ Error generating LLM response: {e}")
             raise e
     
+    async def stream_response(
+        self,
+        messages: List[Dict[str, str]],
+        question_analysis: QuestionAnalysis
+    ) -> AsyncIterator[str]:
+        """Yield response text as the LLM generates it; holds an in-flight slot until the stream ends"""
+        try:
+            async with self._acquire_slot():
+                stream = await self.client.chat.completions.create(
+                    messages=messages,
+                    model=self.model,
+                    temperature=self.temperature,
+                    max_tokens=question_analysis.max_tokens,
+                    top_p=self.top_p,
+                    stream=True,
+                    stop=None
+                )
+                try:
+                    async for chunk in stream:
+                        if chunk.choices and chunk.choices[0].delta.content:
+                            yield chunk.choices[0].delta.content
+                finally:
+                    await stream.close()
+        
+        except Exception as e:
+            print(f"❌ Error streaming LLM response: {e}")
+            raise e
+    
+    @asynccontextmanager
+    async def _acquire_slot(self):
+        """Hold one of the max_in_flight request slots, counting queued and active requests"""
+        self.waiting += 1
+        try:
+            await self._slots.acquire()
+        finally:
+            self.waiting -= 1
+        self.in_flight += 1
+        try:
+            yield
+        finally:
+            self.in_flight -= 1
+            self._slots.release()
+    
+    async def close(self):
+        """Close pooled connections; a later request opens a fresh client"""
+        if self._client is not None:
+            await self._client.close()
+            self._client = None
+    
+    def settings_fingerprint(self) -> str:
+        """Generation settings that make cached answers incompatible when changed"""
+        return f"{self.model}:{self.temperature}:{self.top_p}"
+    
+    def get_stats(self) -> dict:
+        return {
+            "max_in_flight": self.max_in_flight,
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+            "timeout_seconds": settings.LLM_TIMEOUT
+        }
+    
     def is_available(self) -> bool:
         """Check if the LLM service is properly configured"""
         return bool(settings.GROQ_API_KEY)
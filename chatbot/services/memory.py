@@ -1,63 +1,281 @@
 """
 Chat memory management for session handling and conversation history
+
+ChatMemory defines the session store interface. The in-process store lives
+here; SQLite and Redis stores, which let several workers share sessions, are
+selected with CHAT_MEMORY_BACKEND.
 """
+import asyncio
+import itertools
+import sys
+import time
 import uuid
-from datetime import datetime, timedelta
-from typing import Dict, List, Optional
+from abc import ABC, abstractmethod
+from collections import OrderedDict, deque
+from datetime import datetime
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
 from chatbot.core.config import settings
 
-class ChatMemory:
-    """In-memory chat storage service (use Redis/database for production)"""
+class SessionStoreError(RuntimeError):
+    """Raised when the session store cannot be reached or times out"""
+
+class ChatMessage:
+    """One chat message; slots and an epoch timestamp keep it to a few dozen bytes plus its text"""
+    __slots__ = ("role", "content", "timestamp", "size", "seq")
+    
+    def __init__(self, role: str, content: str, timestamp: float = None, seq: int = 0, size: int = None):
+        self.role = sys.intern(role)  # Only a handful of distinct roles, shared by every message
+        self.content = content
+        self.timestamp = timestamp if timestamp is not None else time.time()
+        self.size = size if size is not None else len(content.encode("utf-8"))
+        self.seq = seq  # Position in the session, assigned by the store
+    
+    def to_dict(self) -> Dict:
+        return {
+            "role": self.role,
+            "content": self.content,
+            "timestamp": datetime.fromtimestamp(self.timestamp)
+        }
+
+class ChatSession:
+    """Messages of one session in a bounded ring buffer, with their total size in bytes"""
+    __slots__ = ("messages", "summary", "created_at", "last_activity", "content_bytes")
+    
+    def __init__(self, max_messages: int):
+        now = time.time()
+        self.messages: Deque[ChatMessage] = deque(maxlen=max_messages)
+        self.summary = ""  # Running summary of older turns folded out of messages
+        self.created_at = now
+        self.last_activity = now
+        self.content_bytes = 0
+
+class ChatMemory(ABC):
+    """
+    Session store interface shared by the in-process, SQLite and Redis backends.
+    
+    Every backend keeps at most `max_messages` user+assistant pairs and
+    `max_session_bytes` of message text per session, dropping the oldest
+    messages first, and expires sessions `session_timeout` seconds after their
+    last activity.
     
-    def __init__(self, max_messages_per_session: int = None, session_timeout_hours: int = None):
-        self.sessions: Dict[str, Dict] = {}
+    Store methods are synchronous. Async code calls them through run(), which
+    moves them to a worker thread for stores that do I/O, so a slow or stalled
+    store never blocks the event loop.
+    """
+    
+    backend_name = "base"
+    # Whether calls do I/O and must stay off the event loop
+    blocking = False
+    # Driver exceptions reported as SessionStoreError
+    errors: Tuple[type, ...] = ()
+    
+    def __init__(
+        self,
+        max_messages_per_session: int = None,
+        session_timeout_hours: int = None,
+        max_sessions: int = None,
+        max_session_bytes: int = None
+    ):
         self.max_messages = max_messages_per_session or settings.MAX_MESSAGES_PER_SESSION
-        self.session_timeout = timedelta(hours=session_timeout_hours or settings.SESSION_TIMEOUT_HOURS)
+        self.session_timeout = 3600.0 * (session_timeout_hours or settings.SESSION_TIMEOUT_HOURS)
+        self.max_sessions = max(1, max_sessions or settings.MAX_SESSIONS)
+        self.max_session_bytes = max_session_bytes or settings.SESSION_MAX_BYTES
+        self._sweeper_task = None
+        self.sessions_expired = 0
+        self.sessions_evicted = 0
+    
+    @property
+    def max_total_messages(self) -> int:
+        # *2 because of user+assistant pairs
+        return self.max_messages * 2
     
+    @abstractmethod
     def create_session(self) -> str:
-        """Create a new chat session"""
-        session_id = str(uuid.uuid4())
-        self.sessions[session_id] = {
-            "messages": [],
-            "created_at": datetime.now(),
-            "last_activity": datetime.now()
+        """Create a new chat session, evicting the least recently used beyond max_sessions"""
+    
+    @abstractmethod
+    def add_message(self, session_id: str, role: str, content: str) -> bool:
+        """Add a message to the session history"""
+    
+    @abstractmethod
+    def get_chat_history(self, session_id: str) -> List[ChatMessage]:
+        """Get a snapshot of the chat history for a session"""
+    
+    @abstractmethod
+    def get_summary(self, session_id: str) -> str:
+        """Get the running summary of turns compacted out of the history"""
+    
+    @abstractmethod
+    def apply_summary(self, session_id: str, summary: str, folded_messages: List[ChatMessage], previous: str) -> bool:
+        """Replace folded messages with a summary that covers them, unless the summary is no longer `previous`"""
+    
+    @abstractmethod
+    def clear_session(self, session_id: str) -> bool:
+        """Clear a specific session"""
+    
+    @abstractmethod
+    def cleanup_expired_sessions(self) -> int:
+        """Remove expired sessions and return count of cleaned sessions"""
+    
+    @abstractmethod
+    def get_session_count(self) -> int:
+        """Get the number of active sessions"""
+    
+    @abstractmethod
+    def session_exists(self, session_id: str) -> bool:
+        """Check if a session exists and is not expired"""
+    
+    @abstractmethod
+    def get_session_info(self, session_id: str) -> Optional[Dict]:
+        """Get session metadata (creation time, last activity, message count)"""
+    
+    def start_turn(self, session_id: str, content: str) -> Tuple[List[ChatMessage], str]:
+        """History and summary before this turn, then record the user's message; stores may batch these"""
+        history = self.get_chat_history(session_id)
+        summary = self.get_summary(session_id)
+        self.add_message(session_id, "user", content)
+        return history, summary
+    
+    async def run(self, fn: Callable, *args) -> Any:
+        """Call a store method from async code, on a worker thread when the store does I/O"""
+        try:
+            if self.blocking:
+                return await asyncio.to_thread(fn, *args)
+            return fn(*args)
+        except self.errors as e:
+            raise SessionStoreError(f"Chat session store '{self.backend_name}' unavailable: {e}") from e
+    
+    async def _sweep_expired_sessions(self, interval_seconds: float):
+        while True:
+            await asyncio.sleep(interval_seconds)
+            try:
+                cleaned = await self.run(self.cleanup_expired_sessions)
+                if cleaned:
+                    print(f"🧹 Expired {cleaned} chat sessions ({await self.run(self.get_session_count)} active)")
+            except SessionStoreError as e:
+                print(f"⚠️ Session sweep failed: {e}")
+    
+    def start_sweeper(self, interval_seconds: float = None):
+        """Periodically remove expired sessions (started from the app lifespan)"""
+        if self._sweeper_task is None or self._sweeper_task.done():
+            interval = interval_seconds or settings.SESSION_SWEEP_INTERVAL
+            self._sweeper_task = asyncio.create_task(self._sweep_expired_sessions(interval))
+    
+    async def stop_sweeper(self):
+        if self._sweeper_task is not None and not self._sweeper_task.done():
+            self._sweeper_task.cancel()
+            try:
+                await self._sweeper_task
+            except asyncio.CancelledError:
+                pass
+        self._sweeper_task = None
+    
+    def close(self):
+        """Release connections held by the store"""
+    
+    def get_stats(self) -> dict:
+        return {
+            "backend": self.backend_name,
+            "active_sessions": self.get_session_count(),
+            "max_sessions": self.max_sessions,
+            "sessions_expired": self.sessions_expired,
+            "sessions_evicted": self.sessions_evicted
         }
+    
+    def memory_report(self, sample_size: int = 1000, target_sessions: int = 100000) -> Dict:
+        """Bytes per session held by this process; external stores hold session data elsewhere"""
+        return {
+            "active_sessions": self.get_session_count(),
+            "sampled_sessions": 0,
+            "max_session_bytes": self.max_session_bytes,
+            "max_messages_per_session": self.max_total_messages
+        }
+
+class InMemoryChatMemory(ChatMemory):
+    """
+    In-process session store for a single worker.
+    
+    Sessions are kept ordered by last activity, least recent first, so expiry
+    only visits expired sessions and the cap on total sessions evicts the
+    least recently used. A background sweeper removes expired sessions.
+    """
+    
+    backend_name = "memory"
+    
+    def __init__(self, **limits):
+        super().__init__(**limits)
+        self.sessions: "OrderedDict[str, ChatSession]" = OrderedDict()
+        self._seq = itertools.count(1)
+    
+    def create_session(self) -> str:
+        """Create a new chat session, evicting the least recently used beyond max_sessions"""
+        self.cleanup_expired_sessions()
+        while len(self.sessions) >= self.max_sessions:
+            self.sessions.popitem(last=False)
+            self.sessions_evicted += 1
+        
+        session_id = str(uuid.uuid4())
+        self.sessions[session_id] = ChatSession(self.max_total_messages)
         return session_id
     
     def add_message(self, session_id: str, role: str, content: str) -> bool:
         """Add a message to the session history"""
-        if session_id not in self.sessions:
+        session = self.sessions.get(session_id)
+        if session is None:
             return False
         
         # Update last activity
-        self.sessions[session_id]["last_activity"] = datetime.now()
+        message = ChatMessage(role, content, seq=next(self._seq))
+        session.last_activity = message.timestamp
+        self.sessions.move_to_end(session_id)
         
-        # Add message
-        message = {
-            "role": role,
-            "content": content,
-            "timestamp": datetime.now()
-        }
-        self.sessions[session_id]["messages"].append(message)
+        # A full ring buffer drops its oldest message on append
+        if len(session.messages) == session.messages.maxlen:
+            session.content_bytes -= session.messages[0].size
+        session.messages.append(message)
+        session.content_bytes += message.size
         
-        # Keep only the last N messages to prevent context overflow
-        max_total_messages = self.max_messages * 2  # *2 because of user+assistant pairs
-        if len(self.sessions[session_id]["messages"]) > max_total_messages:
-            self.sessions[session_id]["messages"] = self.sessions[session_id]["messages"][-max_total_messages:]
+        # Then drop the oldest messages beyond the byte budget, always keeping the new one
+        while session.content_bytes > self.max_session_bytes and len(session.messages) > 1:
+            session.content_bytes -= session.messages.popleft().size
         
         return True
     
-    def get_chat_history(self, session_id: str) -> List[Dict]:
-        """Get chat history for a session"""
-        if session_id not in self.sessions:
+    def _is_expired(self, session: ChatSession, now: float = None) -> bool:
+        return (now or time.time()) - session.last_activity > self.session_timeout
+    
+    def get_chat_history(self, session_id: str) -> List[ChatMessage]:
+        """Get a snapshot of the chat history for a session"""
+        session = self.sessions.get(session_id)
+        if session is None:
             return []
         
         # Check if session has expired
-        if datetime.now() - self.sessions[session_id]["last_activity"] > self.session_timeout:
+        if self._is_expired(session):
             del self.sessions[session_id]
             return []
         
-        return self.sessions[session_id]["messages"]
+        return list(session.messages)
+    
+    def get_summary(self, session_id: str) -> str:
+        """Get the running summary of turns compacted out of the history"""
+        session = self.sessions.get(session_id)
+        return session.summary if session is not None else ""
+    
+    def apply_summary(self, session_id: str, summary: str, folded_messages: List[ChatMessage], previous: str) -> bool:
+        """Replace folded messages with a summary that covers them, unless the summary is no longer `previous`"""
+        session = self.sessions.get(session_id)
+        # A summary applied since `previous` was read may already cover these messages
+        if session is None or session.summary != previous:
+            return False
+        
+        # Messages added or trimmed while the summary was generated are left alone
+        folded_seqs = {message.seq for message in folded_messages}
+        kept = [message for message in session.messages if message.seq not in folded_seqs]
+        session.messages = deque(kept, maxlen=session.messages.maxlen)
+        session.content_bytes = sum(message.size for message in kept)
+        session.summary = summary
+        return True
     
     def clear_session(self, session_id: str) -> bool:
         """Clear a specific session"""
@@ -68,16 +286,18 @@ class ChatMemory:
     
     def cleanup_expired_sessions(self) -> int:
         """Remove expired sessions and return count of cleaned sessions"""
-        now = datetime.now()
-        expired_sessions = [
-            session_id for session_id, data in self.sessions.items()
-            if now - data["last_activity"] > self.session_timeout
-        ]
-        
-        for session_id in expired_sessions:
+        # Oldest activity comes first, so stop at the first session still live
+        now = time.time()
+        cleaned = 0
+        while self.sessions:
+            session_id, session = next(iter(self.sessions.items()))
+            if not self._is_expired(session, now):
+                break
             del self.sessions[session_id]
+            cleaned += 1
         
-        return len(expired_sessions)
+        self.sessions_expired += cleaned
+        return cleaned
     
     def get_session_count(self) -> int:
         """Get the number of active sessions"""
@@ -85,11 +305,12 @@ class ChatMemory:
     
     def session_exists(self, session_id: str) -> bool:
         """Check if a session exists and is not expired"""
-        if session_id not in self.sessions:
+        session = self.sessions.get(session_id)
+        if session is None:
             return False
         
         # Check if session has expired
-        if datetime.now() - self.sessions[session_id]["last_activity"] > self.session_timeout:
+        if self._is_expired(session):
             del self.sessions[session_id]
             return False
         
@@ -100,14 +321,101 @@ class ChatMemory:
         if not self.session_exists(session_id):
             return None
         
-        session_data = self.sessions[session_id]
+        session = self.sessions[session_id]
         return {
             "session_id": session_id,
-            "created_at": session_data["created_at"],
-            "last_activity": session_data["last_activity"],
-            "message_count": len(session_data["messages"]),
+            "created_at": datetime.fromtimestamp(session.created_at),
+            "last_activity": datetime.fromtimestamp(session.last_activity),
+            "message_count": len(session.messages),
+            "content_bytes": session.content_bytes,
+            "has_summary": bool(session.summary),
             "is_expired": False
         }
+    
+    def _session_footprint(self, session_id: str, session: ChatSession) -> int:
+        """Approximate bytes held by one session: records, buffer, texts and its index entry"""
+        size = sys.getsizeof(session_id) + sys.getsizeof(session) + sys.getsizeof(session.messages)
+        size += sys.getsizeof(session.summary)
+        for message in session.messages:
+            size += sys.getsizeof(message) + sys.getsizeof(message.content) + sys.getsizeof(message.timestamp)
+        # The OrderedDict keeps a hash entry and a linked-list node per session
+        return size + 100
+    
+    def memory_report(self, sample_size: int = 1000, target_sessions: int = 100000) -> Dict:
+        """Bytes per session over the most recently active sessions, projected to target_sessions"""
+        sampled = list(itertools.islice(reversed(self.sessions.items()), max(1, sample_size)))
+        footprints = sorted(self._session_footprint(session_id, session) for session_id, session in sampled)
+        if not footprints:
+            return {
+                "active_sessions": 0,
+                "sampled_sessions": 0,
+                "max_session_bytes": self.max_session_bytes,
+                "max_messages_per_session": self.max_total_messages
+            }
+        
+        average = sum(footprints) / len(footprints)
+        
+        # A full session: message texts up to the byte budget, in the most records the ring buffer holds
+        empty = ChatMessage("user", "")
+        per_message = sys.getsizeof(empty) + sys.getsizeof(empty.content) + sys.getsizeof(empty.timestamp)
+        session_overhead = self._session_footprint(str(uuid.uuid4()), ChatSession(self.max_total_messages))
+        worst_case = session_overhead + self.max_total_messages * per_message + self.max_session_bytes
+        return {
+            "active_sessions": len(self.sessions),
+            "sampled_sessions": len(footprints),
+            "avg_bytes_per_session": round(average),
+            "p95_bytes_per_session": footprints[min(len(footprints) - 1, int(0.95 * len(footprints)))],
+            "max_bytes_per_session": footprints[-1],
+            "avg_messages_per_session": round(sum(len(session.messages) for _, session in sampled) / len(sampled), 2),
+            "estimated_total_bytes": round(average * len(self.sessions)),
+            "target_sessions": target_sessions,
+            "projected_bytes_at_target": round(average * target_sessions),
+            "worst_case_bytes_per_session": worst_case,
+            "worst_case_bytes_at_target": worst_case * target_sessions,
+            "max_session_bytes": self.max_session_bytes,
+            "max_messages_per_session": self.max_total_messages
+        }
+
+ChatMemoryFactory = Callable[[], ChatMemory]
+
+CHAT_MEMORY_BACKENDS: Dict[str, ChatMemoryFactory] = {}
+
+def register_chat_memory_backend(name: str) -> Callable[[ChatMemoryFactory], ChatMemoryFactory]:
+    """Register a session store factory under a name selectable via CHAT_MEMORY_BACKEND"""
+    def decorator(factory: ChatMemoryFactory) -> ChatMemoryFactory:
+        CHAT_MEMORY_BACKENDS[name] = factory
+        return factory
+    return decorator
+
+def create_chat_memory(name: str) -> ChatMemory:
+    """Instantiate a registered session store"""
+    if name not in CHAT_MEMORY_BACKENDS:
+        available = ", ".join(sorted(CHAT_MEMORY_BACKENDS))
+        raise ValueError(f"Unknown chat memory backend '{name}' (available: {available})")
+    return CHAT_MEMORY_BACKENDS[name]()
+
+@register_chat_memory_backend("memory")
+def _create_in_memory_chat_memory() -> ChatMemory:
+    return InMemoryChatMemory()
+
+@register_chat_memory_backend("sqlite")
+def _create_sqlite_chat_memory() -> ChatMemory:
+    from chatbot.services.memory_sqlite import SQLiteChatMemory
+    return SQLiteChatMemory(settings.CHAT_MEMORY_SQLITE_PATH, settings.CHAT_MEMORY_TIMEOUT)
+
+@register_chat_memory_backend("redis")
+def _create_redis_chat_memory() -> ChatMemory:
+    from chatbot.services.memory_redis import RedisChatMemory
+    return RedisChatMemory(settings.REDIS_URL, settings.CHAT_MEMORY_REDIS_PREFIX, settings.CHAT_MEMORY_TIMEOUT)
+
+def _create_configured_chat_memory() -> ChatMemory:
+    try:
+        memory = create_chat_memory(settings.CHAT_MEMORY_BACKEND)
+        print(f"💬 Chat sessions stored in: {memory.backend_name}")
+        return memory
+    except Exception as e:
+        print(f"⚠️ Chat memory backend '{settings.CHAT_MEMORY_BACKEND}' unavailable ({e}); sessions stay in this process")
+        return InMemoryChatMemory()
 
 # Global chat memory instance
-chat_memory = ChatMemory()
+chat_memory = _create_configured_chat_memory()
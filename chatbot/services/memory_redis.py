@@ -0,0 +1,212 @@
+"""
+Redis session store shared by every worker and replica
+"""
+import json
+import time
+import uuid
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+import redis
+
+from chatbot.services.memory import ChatMemory, ChatMessage
+
+# KEYS: session hash, message list, activity index
+# ARGV: session ID, now, role, content, size, max messages, max bytes, ttl
+APPEND_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    return 0
+end
+local now = tonumber(ARGV[2])
+local size = tonumber(ARGV[5])
+local seq = redis.call('HINCRBY', KEYS[1], 'seq', 1)
+redis.call('RPUSH', KEYS[2], cjson.encode({seq, ARGV[3], ARGV[4], now, size}))
+local bytes = redis.call('HINCRBY', KEYS[1], 'content_bytes', size)
+local length = redis.call('LLEN', KEYS[2])
+while length > 1 and (length > tonumber(ARGV[6]) or bytes > tonumber(ARGV[7])) do
+    local oldest = cjson.decode(redis.call('LPOP', KEYS[2]))
+    bytes = redis.call('HINCRBY', KEYS[1], 'content_bytes', -oldest[5])
+    length = length - 1
+end
+redis.call('HSET', KEYS[1], 'last_activity', ARGV[2])
+redis.call('EXPIRE', KEYS[1], ARGV[8])
+redis.call('EXPIRE', KEYS[2], ARGV[8])
+redis.call('ZADD', KEYS[3], now, ARGV[1])
+return seq
+"""
+
+# KEYS: session hash, message list
+# ARGV: summary, summary it was built from, then the seqs of folded messages
+SUMMARY_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    return 0
+end
+if (redis.call('HGET', KEYS[1], 'summary') or '') ~= ARGV[2] then
+    return 0
+end
+local folded = {}
+for i = 3, #ARGV do
+    folded[ARGV[i]] = true
+end
+local items = redis.call('LRANGE', KEYS[2], 0, -1)
+redis.call('DEL', KEYS[2])
+local bytes = 0
+for _, item in ipairs(items) do
+    local message = cjson.decode(item)
+    if not folded[tostring(message[1])] then
+        redis.call('RPUSH', KEYS[2], item)
+        bytes = bytes + message[5]
+    end
+end
+redis.call('HSET', KEYS[1], 'summary', ARGV[1], 'content_bytes', bytes)
+local ttl = redis.call('TTL', KEYS[1])
+if ttl > 0 and #items > 0 then
+    redis.call('EXPIRE', KEYS[2], ttl)
+end
+return 1
+"""
+
+class RedisChatMemory(ChatMemory):
+    """
+    Sessions in Redis (or any server speaking its protocol), so a session's next
+    turn can land on any worker or replica.
+
+    A session is a hash plus a list of JSON-encoded messages, both with a TTL
+    refreshed on activity, so Redis itself expires idle sessions. Appends and
+    summary folds run as Lua scripts, which keeps trimming atomic; reads and
+    the start of a turn are pipelined into one round trip. A sorted set of last
+    activity times backs session counts and the least-recently-used cap.
+    """
+
+    backend_name = "redis"
+    blocking = True
+    errors = (redis.RedisError,)
+
+    def __init__(self, url: str, prefix: str = "readle:", timeout: float = 2.0, **limits):
+        super().__init__(**limits)
+        # Bounded connect and read timeouts, so an unreachable or stalled server fails calls quickly
+        self.client = redis.Redis.from_url(
+            url, decode_responses=True, socket_timeout=timeout, socket_connect_timeout=timeout
+        )
+        self.client.ping()
+        self.prefix = prefix
+        self.index_key = f"{prefix}sessions"
+        self._append = self.client.register_script(APPEND_SCRIPT)
+        self._fold = self.client.register_script(SUMMARY_SCRIPT)
+
+    @property
+    def ttl(self) -> int:
+        return max(1, int(self.session_timeout))
+
+    def _session_key(self, session_id: str) -> str:
+        return f"{self.prefix}session:{session_id}"
+
+    def _messages_key(self, session_id: str) -> str:
+        return f"{self.prefix}messages:{session_id}"
+
+    def _append_args(self, session_id: str, role: str, content: str) -> Tuple[List[str], List]:
+        message = ChatMessage(role, content)
+        keys = [self._session_key(session_id), self._messages_key(session_id), self.index_key]
+        args = [
+            session_id, repr(message.timestamp), message.role, message.content, message.size,
+            self.max_total_messages, self.max_session_bytes, self.ttl
+        ]
+        return keys, args
+
+    @staticmethod
+    def _decode_messages(items: List[str]) -> List[ChatMessage]:
+        messages = []
+        for item in items:
+            seq, role, content, timestamp, size = json.loads(item)
+            messages.append(ChatMessage(role, content, timestamp, seq, size))
+        return messages
+
+    def create_session(self) -> str:
+        session_id = str(uuid.uuid4())
+        now = time.time()
+        pipeline = self.client.pipeline(transaction=False)
+        pipeline.zremrangebyscore(self.index_key, "-inf", now - self.session_timeout)
+        pipeline.zcard(self.index_key)
+        expired, active = pipeline.execute()
+        self.sessions_expired += expired
+
+        # Evict the least recently active sessions beyond the cap
+        overflow = active - self.max_sessions + 1
+        if overflow > 0:
+            evicted = [member for member, _ in self.client.zpopmin(self.index_key, overflow)]
+            if evicted:
+                self.client.delete(*[key for sid in evicted for key in (self._session_key(sid), self._messages_key(sid))])
+                self.sessions_evicted += len(evicted)
+
+        pipeline = self.client.pipeline()
+        pipeline.hset(self._session_key(session_id), mapping={
+            "summary": "", "created_at": now, "last_activity": now, "content_bytes": 0, "seq": 0
+        })
+        pipeline.expire(self._session_key(session_id), self.ttl)
+        pipeline.zadd(self.index_key, {session_id: now})
+        pipeline.execute()
+        return session_id
+
+    def add_message(self, session_id: str, role: str, content: str) -> bool:
+        keys, args = self._append_args(session_id, role, content)
+        return bool(self._append(keys=keys, args=args))
+
+    def get_chat_history(self, session_id: str) -> List[ChatMessage]:
+        return self._decode_messages(self.client.lrange(self._messages_key(session_id), 0, -1))
+
+    def start_turn(self, session_id: str, content: str) -> Tuple[List[ChatMessage], str]:
+        """Read the history and summary and append the user's message in one round trip"""
+        keys, args = self._append_args(session_id, "user", content)
+        pipeline = self.client.pipeline(transaction=False)
+        pipeline.lrange(self._messages_key(session_id), 0, -1)
+        pipeline.hget(self._session_key(session_id), "summary")
+        self._append(keys=keys, args=args, client=pipeline)
+        items, summary, _ = pipeline.execute()
+        return self._decode_messages(items), summary or ""
+
+    def get_summary(self, session_id: str) -> str:
+        return self.client.hget(self._session_key(session_id), "summary") or ""
+
+    def apply_summary(self, session_id: str, summary: str, folded_messages: List[ChatMessage], previous: str) -> bool:
+        keys = [self._session_key(session_id), self._messages_key(session_id)]
+        args = [summary, previous] + [message.seq for message in folded_messages]
+        return bool(self._fold(keys=keys, args=args))
+
+    def clear_session(self, session_id: str) -> bool:
+        pipeline = self.client.pipeline()
+        pipeline.delete(self._session_key(session_id), self._messages_key(session_id))
+        pipeline.zrem(self.index_key, session_id)
+        deleted, _ = pipeline.execute()
+        return deleted > 0
+
+    def cleanup_expired_sessions(self) -> int:
+        """Redis expires session data itself; this only prunes the activity index"""
+        cleaned = self.client.zremrangebyscore(self.index_key, "-inf", time.time() - self.session_timeout)
+        self.sessions_expired += cleaned
+        return cleaned
+
+    def get_session_count(self) -> int:
+        return self.client.zcount(self.index_key, time.time() - self.session_timeout, "+inf")
+
+    def session_exists(self, session_id: str) -> bool:
+        return bool(self.client.exists(self._session_key(session_id)))
+
+    def get_session_info(self, session_id: str) -> Optional[Dict]:
+        pipeline = self.client.pipeline(transaction=False)
+        pipeline.hgetall(self._session_key(session_id))
+        pipeline.llen(self._messages_key(session_id))
+        session, message_count = pipeline.execute()
+        if not session:
+            return None
+        return {
+            "session_id": session_id,
+            "created_at": datetime.fromtimestamp(float(session["created_at"])),
+            "last_activity": datetime.fromtimestamp(float(session["last_activity"])),
+            "message_count": message_count,
+            "content_bytes": int(session["content_bytes"]),
+            "has_summary": bool(session["summary"]),
+            "is_expired": False
+        }
+
+    def close(self):
+        self.client.close()
@@ -0,0 +1,247 @@
+"""
+SQLite session store shared by the worker processes of one host
+"""
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from chatbot.services.memory import ChatMemory, ChatMessage
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    id TEXT PRIMARY KEY,
+    summary TEXT NOT NULL DEFAULT '',
+    created_at REAL NOT NULL,
+    last_activity REAL NOT NULL,
+    expires_at REAL NOT NULL,
+    content_bytes INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS sessions_by_expiry ON sessions (expires_at);
+CREATE INDEX IF NOT EXISTS sessions_by_activity ON sessions (last_activity);
+CREATE TABLE IF NOT EXISTS messages (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    session_id TEXT NOT NULL REFERENCES sessions (id) ON DELETE CASCADE,
+    role TEXT NOT NULL,
+    content TEXT NOT NULL,
+    timestamp REAL NOT NULL,
+    size INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS messages_by_session ON messages (session_id, seq);
+"""
+
+class SQLiteChatMemory(ChatMemory):
+    """
+    Sessions in one SQLite database in WAL mode, so every uvicorn worker on the
+    host sees the same sessions and readers never wait for writers.
+
+    Each operation is one short transaction on a per-thread connection. Expiry
+    is stored per session (`expires_at`, indexed), so lookups ignore expired
+    sessions and the sweeper deletes them with one indexed range delete.
+    """
+
+    backend_name = "sqlite"
+    blocking = True
+    errors = (sqlite3.Error,)
+
+    def __init__(self, path: str, timeout: float = 2.0, **limits):
+        super().__init__(**limits)
+        self.path = path
+        self.timeout = timeout
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+        self._connections_lock = threading.Lock()
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._connection().executescript(SCHEMA)
+
+    def _connection(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            # Autocommit mode; transactions are opened explicitly with BEGIN IMMEDIATE
+            # A write lock held longer than `timeout` fails the call with "database is locked".
+            # Each connection is used by one thread only; close() may run on another.
+            connection = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None, check_same_thread=False)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.execute("PRAGMA foreign_keys=ON")
+            self._local.connection = connection
+            with self._connections_lock:
+                self._connections.append(connection)
+        return connection
+
+    def _write(self):
+        """Transaction that takes the write lock up front, avoiding upgrade deadlocks between workers"""
+        return _Transaction(self._connection())
+
+    def create_session(self) -> str:
+        session_id = str(uuid.uuid4())
+        now = time.time()
+        with self._write() as db:
+            db.execute("DELETE FROM sessions WHERE expires_at < ?", (now,))
+
+            # Evict the least recently active sessions beyond the cap
+            overflow = db.execute("SELECT COUNT(*) FROM sessions").fetchone()[0] - self.max_sessions + 1
+            if overflow > 0:
+                db.execute(
+                    "DELETE FROM sessions WHERE id IN (SELECT id FROM sessions ORDER BY last_activity LIMIT ?)",
+                    (overflow,)
+                )
+                self.sessions_evicted += overflow
+
+            db.execute(
+                "INSERT INTO sessions (id, created_at, last_activity, expires_at) VALUES (?, ?, ?, ?)",
+                (session_id, now, now, now + self.session_timeout)
+            )
+        return session_id
+
+    def _append(self, db: sqlite3.Connection, session_id: str, role: str, content: str) -> bool:
+        message = ChatMessage(role, content)
+        updated = db.execute(
+            "UPDATE sessions SET last_activity = ?, expires_at = ?, content_bytes = content_bytes + ? "
+            "WHERE id = ? AND expires_at >= ?",
+            (message.timestamp, message.timestamp + self.session_timeout, message.size, session_id, message.timestamp)
+        ).rowcount
+        if not updated:
+            return False
+
+        db.execute(
+            "INSERT INTO messages (session_id, role, content, timestamp, size) VALUES (?, ?, ?, ?, ?)",
+            (session_id, message.role, message.content, message.timestamp, message.size)
+        )
+
+        # Drop the oldest messages beyond the message count and byte budget, always keeping the new one
+        rows = db.execute(
+            "SELECT seq, size FROM messages WHERE session_id = ? ORDER BY seq DESC", (session_id,)
+        ).fetchall()
+        kept_bytes = 0
+        for position, (seq, size) in enumerate(rows):
+            if position and (position >= self.max_total_messages or kept_bytes + size > self.max_session_bytes):
+                db.execute("DELETE FROM messages WHERE session_id = ? AND seq <= ?", (session_id, seq))
+                db.execute("UPDATE sessions SET content_bytes = ? WHERE id = ?", (kept_bytes, session_id))
+                break
+            kept_bytes += size
+        return True
+
+    def add_message(self, session_id: str, role: str, content: str) -> bool:
+        with self._write() as db:
+            return self._append(db, session_id, role, content)
+
+    def _read_history(self, db: sqlite3.Connection, session_id: str) -> Tuple[bool, List[ChatMessage], str]:
+        row = db.execute(
+            "SELECT summary FROM sessions WHERE id = ? AND expires_at >= ?", (session_id, time.time())
+        ).fetchone()
+        if row is None:
+            return False, [], ""
+        messages = [
+            ChatMessage(role, content, timestamp, seq, size)
+            for seq, role, content, timestamp, size in db.execute(
+                "SELECT seq, role, content, timestamp, size FROM messages WHERE session_id = ? ORDER BY seq",
+                (session_id,)
+            )
+        ]
+        return True, messages, row[0]
+
+    def get_chat_history(self, session_id: str) -> List[ChatMessage]:
+        with _Transaction(self._connection(), "BEGIN") as db:
+            return self._read_history(db, session_id)[1]
+
+    def start_turn(self, session_id: str, content: str) -> Tuple[List[ChatMessage], str]:
+        """Read the history and append the user's message in one transaction"""
+        with self._write() as db:
+            exists, history, summary = self._read_history(db, session_id)
+            if exists:
+                self._append(db, session_id, "user", content)
+            return history, summary
+
+    def get_summary(self, session_id: str) -> str:
+        row = self._connection().execute(
+            "SELECT summary FROM sessions WHERE id = ? AND expires_at >= ?", (session_id, time.time())
+        ).fetchone()
+        return row[0] if row else ""
+
+    def apply_summary(self, session_id: str, summary: str, folded_messages: List[ChatMessage], previous: str) -> bool:
+        with self._write() as db:
+            # Compare-and-set: another worker may have folded this session since `previous` was read
+            updated = db.execute(
+                "UPDATE sessions SET summary = ? WHERE id = ? AND summary = ? AND expires_at >= ?",
+                (summary, session_id, previous, time.time())
+            ).rowcount
+            if not updated:
+                return False
+            db.executemany(
+                "DELETE FROM messages WHERE session_id = ? AND seq = ?",
+                [(session_id, message.seq) for message in folded_messages]
+            )
+            db.execute(
+                "UPDATE sessions SET content_bytes = "
+                "(SELECT COALESCE(SUM(size), 0) FROM messages WHERE session_id = ?) WHERE id = ?",
+                (session_id, session_id)
+            )
+            return True
+
+    def clear_session(self, session_id: str) -> bool:
+        with self._write() as db:
+            return db.execute("DELETE FROM sessions WHERE id = ?", (session_id,)).rowcount > 0
+
+    def cleanup_expired_sessions(self) -> int:
+        with self._write() as db:
+            cleaned = db.execute("DELETE FROM sessions WHERE expires_at < ?", (time.time(),)).rowcount
+        self.sessions_expired += cleaned
+        return cleaned
+
+    def get_session_count(self) -> int:
+        return self._connection().execute(
+            "SELECT COUNT(*) FROM sessions WHERE expires_at >= ?", (time.time(),)
+        ).fetchone()[0]
+
+    def session_exists(self, session_id: str) -> bool:
+        return self._connection().execute(
+            "SELECT 1 FROM sessions WHERE id = ? AND expires_at >= ?", (session_id, time.time())
+        ).fetchone() is not None
+
+    def get_session_info(self, session_id: str) -> Optional[Dict]:
+        row = self._connection().execute(
+            "SELECT created_at, last_activity, content_bytes, summary != '', "
+            "(SELECT COUNT(*) FROM messages WHERE session_id = sessions.id) "
+            "FROM sessions WHERE id = ? AND expires_at >= ?",
+            (session_id, time.time())
+        ).fetchone()
+        if row is None:
+            return None
+        created_at, last_activity, content_bytes, has_summary, message_count = row
+        return {
+            "session_id": session_id,
+            "created_at": datetime.fromtimestamp(created_at),
+            "last_activity": datetime.fromtimestamp(last_activity),
+            "message_count": message_count,
+            "content_bytes": content_bytes,
+            "has_summary": bool(has_summary),
+            "is_expired": False
+        }
+
+    def close(self):
+        """Close the connections of every thread that used the store"""
+        with self._connections_lock:
+            connections, self._connections = self._connections, []
+        for connection in connections:
+            connection.close()
+        self._local = threading.local()
+
+class _Transaction:
+    """BEGIN ... COMMIT around a block on an autocommit connection, rolled back on error"""
+
+    def __init__(self, connection: sqlite3.Connection, begin: str = "BEGIN IMMEDIATE"):
+        self.connection = connection
+        self.begin = begin
+
+    def __enter__(self) -> sqlite3.Connection:
+        self.connection.execute(self.begin)
+        return self.connection
+
+    def __exit__(self, exc_type, exc, tb):
+        self.connection.execute("ROLLBACK" if exc_type else "COMMIT")
+        return False
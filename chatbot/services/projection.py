@@ -0,0 +1,90 @@
+"""
+Dimensionality reduction for stored and query embeddings (PCA or Matryoshka truncation)
+"""
+import os
+from typing import Optional
+
+import numpy as np
+
+PROJECTIONS = ("none", "pca", "truncate")
+
+# Bumped whenever projected vectors change, so indexes built with older projections are rebuilt
+PROJECTION_FORMAT = 2
+
+# Rows used to estimate principal axes; more adds build time without changing the axes much
+FIT_SAMPLE_ROWS = 20000
+
+# Rows projected per block, bounding temporary memory
+PROJECT_BLOCK_ROWS = 8192
+
+def principal_axes(vectors: np.ndarray, max_dim: int, sample_rows: int = FIT_SAMPLE_ROWS, seed: int = 0) -> np.ndarray:
+    """
+    Top `max_dim` uncentred principal axes (right singular vectors), one per row.
+
+    The mean is deliberately not removed, so the axes capture the directions
+    that carry the most of every dot product, shared offset included.
+    """
+    rng = np.random.default_rng(seed)
+    n = len(vectors)
+    rows = np.sort(rng.choice(n, size=min(n, sample_rows), replace=False))
+    sample = np.asarray(vectors[rows], dtype=np.float64)
+
+    gram = sample.T @ sample
+    eigenvalues, eigenvectors = np.linalg.eigh(gram)
+    order = np.argsort(eigenvalues)[::-1][:max_dim]
+    return np.ascontiguousarray(eigenvectors[:, order].T, dtype=np.float32)
+
+class VectorProjection:
+    """
+    Linear map from normalized embeddings to `output_dim` dimensions.
+
+    "pca" projects onto the top principal axes; "truncate" keeps the leading
+    dimensions, which is how Matryoshka-trained models are meant to be
+    shortened. Either way the result is re-normalized to unit length: dropped
+    components take part of each vector's length with them, and without this
+    projected dot products would shrink by varying amounts and no longer be
+    cosines, shifting distances against RAG_THRESHOLD and the semantic cache
+    cutoff.
+    """
+
+    def __init__(self, kind: str, input_dim: int, components: Optional[np.ndarray] = None, output_dim: int = 0):
+        if kind not in PROJECTIONS or kind == "none":
+            raise ValueError(f"Unknown vector projection '{kind}'")
+        self.kind = kind
+        self.input_dim = input_dim
+        self.components = components
+        self.output_dim = components.shape[0] if components is not None else output_dim
+
+    @classmethod
+    def fit(cls, vectors: np.ndarray, kind: str, output_dim: int) -> "VectorProjection":
+        input_dim = vectors.shape[1]
+        output_dim = min(output_dim, input_dim)
+        if kind == "pca":
+            return cls(kind, input_dim, principal_axes(vectors, output_dim))
+        return cls(kind, input_dim, output_dim=output_dim)
+
+    def apply(self, vectors: np.ndarray) -> np.ndarray:
+        """Project rows into the reduced space, as unit vectors"""
+        projected = np.empty((len(vectors), self.output_dim), dtype=np.float32)
+        for start in range(0, len(vectors), PROJECT_BLOCK_ROWS):
+            block = np.asarray(vectors[start:start + PROJECT_BLOCK_ROWS], dtype=np.float32)
+            if self.kind == "pca":
+                reduced = block @ self.components.T
+            else:
+                reduced = block[:, :self.output_dim]
+            norms = np.linalg.norm(reduced, axis=1, keepdims=True)
+            norms[norms == 0] = 1.0
+            projected[start:start + len(block)] = reduced / norms
+        return projected
+
+    def save(self, path: str):
+        components = self.components if self.components is not None else np.empty((0, self.input_dim), dtype=np.float32)
+        np.savez(f"{path}.tmp.npz", kind=self.kind, input_dim=self.input_dim, output_dim=self.output_dim, components=components)
+        os.replace(f"{path}.tmp.npz", path)
+
+    @classmethod
+    def load(cls, path: str) -> "VectorProjection":
+        with np.load(path) as data:
+            kind = str(data["kind"])
+            components = data["components"] if kind == "pca" else None
+            return cls(kind, int(data["input_dim"]), components, int(data["output_dim"]))
@@ -3,21 +3,50 @@ RAG (Retrieval-Augmented Generation) service for document processing and retriev
 """
 import os
 import glob
+import asyncio
+import multiprocessing
 import re
 import pickle
 import hashlib
+import json
+import shutil
 import time
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import List, Tuple
-from langchain_community.embeddings import OllamaEmbeddings
-from langchain.embeddings import FakeEmbeddings
+from typing import AsyncIterator, Dict, List, Optional, Tuple
 from langchain_community.vectorstores import Chroma
-from langchain_community.document_loaders import WebBaseLoader, PyPDFLoader
+from langchain_core.vectorstores import VectorStore
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 from langchain.schema import Document
 
 from chatbot.core.config import settings
 from chatbot.models.schemas import RAGResult
+from chatbot.services.embedding_cache import EmbeddingCache, CachedEmbeddings
+from chatbot.services.embeddings import create_embeddings
+from chatbot.services.ingestion import IngestionPipeline, merge_sources
+from chatbot.services.projection import PROJECTION_FORMAT
+from chatbot.services.vector_index import IVFVectorIndex, NumpyVectorIndex
+from chatbot.utils.cache import LRUCache
+from chatbot.utils.executor import BoundedThreadPool
+from chatbot.utils.file_lock import FileLock
+from chatbot.utils.pdf_extraction import extract_pdf_pages
+from chatbot.utils.text_processing import normalize_query
+from chatbot.utils.web_loading import iter_web_documents
+
+# Manifest key for the built-in content used when no source could be loaded
+FALLBACK_SOURCE_KEY = "fallback:builtin"
+
+# Per-version file mapping each source to its fingerprint and chunk IDs
+MANIFEST_FILENAME = "source_manifest.json"
+
+# Held by the one worker per host that builds, switches and prunes index versions
+BUILD_LOCK_FILENAME = "build.lock"
+
+# Per-version file each worker holds a shared lock on while serving the version, so it is not pruned
+LEASE_FILENAME = ".lease"
+
+# Query used to verify a new index version before it goes live
+SMOKE_TEST_QUERY = "dyslexia"
 
 class RAGService:
     """Enhanced RAG System with relevance scoring"""
@@ -25,12 +54,30 @@ class RAGService:
     def __init__(self, relevance_threshold: float = None):
         self.relevance_threshold = relevance_threshold or settings.RAG_THRESHOLD
         self.embeddings = None
+        self.embedding_model_id = "none"
+        self.embedding_cache = None
+        self.ingestion_pipeline = None
         self.vectorstore = None
         self.retriever = None
+        self.index_state = "disabled" if settings.DISABLE_RAG else "not_started"
+        self._build_lock = asyncio.Lock()
+        self._build_task = None
         self.pdf_folder = settings.PDF_FOLDER
         self.default_websites = settings.DEFAULT_WEBSITES
         self.vector_store_cache_file = os.path.join(settings.CHROMA_DIR, "vectorstore_cache.pkl")
-        self.content_hash_file = os.path.join(settings.CHROMA_DIR, "content_hash.txt")
+        self.versions_dir = os.path.join(settings.CHROMA_DIR, "versions")
+        self.current_version_file = os.path.join(settings.CHROMA_DIR, "CURRENT")
+        self.index_version = None
+        self.build_file_lock = FileLock(os.path.join(settings.CHROMA_DIR, BUILD_LOCK_FILENAME))
+        self._version_lease: Optional[FileLock] = None
+        self._watch_task = None
+        self.ivf_nprobe = settings.IVF_NPROBE
+        # Query vectors depend only on the embedding model; results also on the index and threshold
+        self.query_vector_cache = LRUCache(settings.QUERY_CACHE_SIZE, settings.QUERY_CACHE_TTL)
+        self.query_result_cache = LRUCache(settings.QUERY_CACHE_SIZE, settings.QUERY_CACHE_TTL)
+        # Query embedding and vector search block, so request handlers run them here
+        self.retrieval_pool = BoundedThreadPool(settings.RETRIEVAL_WORKERS, settings.RETRIEVAL_QUEUE_SIZE, "retrieval")
+        self.embedding_cache_dir = os.path.join(settings.CHROMA_DIR, "embedding_cache")
         
         # Check GPU availability
         self.gpu_info = self._check_gpu_availability()
@@ -38,92 +85,275 @@ class RAGService:
         self._initialize_embeddings()
     
     def _initialize_embeddings(self):
-        """Initialize embeddings with GPU acceleration and fallback to fake embeddings"""
+        """Initialize the configured embedding provider with fallback to fake embeddings"""
+        if settings.DISABLE_RAG:
+            print("⚠️ RAG disabled via configuration")
+            return
+        
         try:
-            if not settings.DISABLE_RAG:
-                # Try to use GPU acceleration for Ollama
-                print("🔍 Attempting to initialize Ollama embeddings with GPU acceleration...")
-                self.embeddings = OllamaEmbeddings(
-                    model=settings.OLLAMA_MODEL,
-                    # Add GPU-specific options if available in your Ollama setup
-                    # These may vary depending on your Ollama configuration
-                )
-                print(f"✅ Ollama embeddings initialized with model: {settings.OLLAMA_MODEL}")
-                print("🚀 GPU acceleration enabled (if Ollama is configured with CUDA)")
-            else:
-                print("⚠️ RAG disabled via configuration")
+            print(f"🔍 Initializing '{settings.EMBEDDING_PROVIDER}' embeddings...")
+            self.embeddings, self.embedding_model_id = create_embeddings(settings.EMBEDDING_PROVIDER)
+            print(f"✅ Embeddings initialized: {self.embedding_model_id}")
         except Exception as e:
-            print(f"⚠️ Ollama embeddings unavailable ({e}). Falling back to fake embeddings.")
-            # FakeEmbeddings: deterministic small vectors for API compatibility
-            self.embeddings = FakeEmbeddings(size=384)
-    
-    def _calculate_content_hash(self, urls: List[str], include_pdfs: bool) -> str:
-        """Calculate a hash of the content sources to detect changes"""
-        content_info = {
-            "urls": sorted(urls) if urls else [],
-            "include_pdfs": include_pdfs,
-            "pdf_files": []
-        }
+            print(f"⚠️ {settings.EMBEDDING_PROVIDER} embeddings unavailable ({e}). Falling back to fake embeddings.")
+            self.embeddings, self.embedding_model_id = create_embeddings("fake")
+        
+        if settings.EMBEDDING_CACHE_ENABLED:
+            try:
+                self.embedding_cache = EmbeddingCache(
+                    self.embedding_cache_dir,
+                    max_bytes=settings.EMBEDDING_CACHE_MAX_MB * 1024 * 1024
+                )
+                self.embeddings = CachedEmbeddings(self.embeddings, self.embedding_cache, self.embedding_model_id)
+                print(f"🗄️ Embedding cache enabled ({len(self.embedding_cache.entries)} cached vectors)")
+            except Exception as e:
+                print(f"⚠️ Embedding cache unavailable ({e}). Embedding without cache.")
+    
+    def _source_key(self, source_type: str, location: str) -> str:
+        """Build the manifest key for a PDF path or website URL"""
+        return f"{source_type}:{location}"
+    
+    def _discover_sources(self, urls: List[str], include_pdfs: bool) -> Dict[str, Dict]:
+        """Map every configured source to its current fingerprint"""
+        sources = {}
         
-        # Add PDF file info if PDFs are included
         if include_pdfs:
-            pdf_files = glob.glob(os.path.join(self.pdf_folder, "*.pdf"))
-            for pdf_file in pdf_files:
+            for pdf_file in sorted(glob.glob(os.path.join(self.pdf_folder, "*.pdf"))):
                 try:
                     stat = os.stat(pdf_file)
-                    content_info["pdf_files"].append({
-                        "name": os.path.basename(pdf_file),
-                        "size": stat.st_size,
-                        "modified": stat.st_mtime
-                    })
                 except OSError:
                     continue
-            content_info["pdf_files"].sort(key=lambda x: x["name"])
+                sources[self._source_key("pdf", pdf_file)] = {
+                    "source_type": "pdf",
+                    "location": pdf_file,
+                    "fingerprint": f"{stat.st_size}:{stat.st_mtime}"
+                }
+        
+        # Websites are only re-fetched when they are added to the list
+        for url in dict.fromkeys(urls or []):
+            sources[self._source_key("website", url)] = {
+                "source_type": "website",
+                "location": url,
+                "fingerprint": url
+            }
         
-        # Create hash of the content info
-        content_str = str(content_info)
-        return hashlib.md5(content_str.encode()).hexdigest()
+        return sources
+    
+    def _index_config_fingerprint(self) -> str:
+        """Fingerprint of settings that invalidate every stored chunk when changed"""
+        config = {
+            "engine": settings.VECTOR_INDEX_ENGINE,
+            "chunk_size": settings.CHUNK_SIZE,
+            "chunk_overlap": settings.CHUNK_OVERLAP,
+            "embeddings": self.embedding_model_id
+        }
+        if settings.VECTOR_INDEX_ENGINE != "chroma" and settings.VECTOR_PROJECTION != "none":
+            config["projection"] = f"{settings.VECTOR_PROJECTION}:{settings.VECTOR_PROJECTION_DIM}:{PROJECTION_FORMAT}"
+        return hashlib.md5(json.dumps(config, sort_keys=True).encode()).hexdigest()
+    
+    def _chunk_ids(self, source_key: str, count: int) -> List[str]:
+        """Deterministic index IDs for the chunks of one source"""
+        prefix = hashlib.sha1(source_key.encode()).hexdigest()[:16]
+        return [f"{prefix}-{i}" for i in range(count)]
     
-    def _save_content_hash(self, content_hash: str):
-        """Save the content hash to file"""
-        os.makedirs(os.path.dirname(self.content_hash_file), exist_ok=True)
-        with open(self.content_hash_file, 'w') as f:
-            f.write(content_hash)
+    def _version_dir(self, version: str) -> str:
+        """Directory holding one index version and its manifest"""
+        return os.path.join(self.versions_dir, version)
     
-    def _load_content_hash(self) -> str:
-        """Load the saved content hash"""
-        if os.path.exists(self.content_hash_file):
+    def _list_versions(self) -> List[str]:
+        """All index versions on disk, oldest first"""
+        if not os.path.isdir(self.versions_dir):
+            return []
+        return sorted(
+            entry for entry in os.listdir(self.versions_dir)
+            if os.path.isdir(self._version_dir(entry))
+        )
+    
+    def _read_current_version(self) -> Optional[str]:
+        """Version named by the CURRENT pointer, if it still exists"""
+        try:
+            with open(self.current_version_file, 'r') as f:
+                version = f.read().strip()
+        except OSError:
+            return None
+        return version if version and os.path.isdir(self._version_dir(version)) else None
+    
+    def _switch_current_version(self, version: str):
+        """Atomically point CURRENT at a version"""
+        os.makedirs(settings.CHROMA_DIR, exist_ok=True)
+        tmp_file = f"{self.current_version_file}.tmp"
+        with open(tmp_file, 'w') as f:
+            f.write(version)
+        os.replace(tmp_file, self.current_version_file)
+    
+    def _new_version_id(self) -> str:
+        """Sortable, unique name for a new index version (UTC, so DST changes cannot reorder versions)"""
+        now = time.time_ns()
+        return f"{time.strftime('%Y%m%d-%H%M%S', time.gmtime(now // 10**9))}-{now % 10**9:09d}"
+    
+    def _discard_version(self, version: str):
+        """Remove a version directory that never went live"""
+        shutil.rmtree(self._version_dir(version), ignore_errors=True)
+        print(f"🗑️ Discarded index version {version}")
+    
+    def _prune_versions(self):
+        """Keep the newest RAG_KEEP_VERSIONS versions, the active one and any another worker still serves"""
+        versions = self._list_versions()
+        keep = set(versions[-max(1, settings.RAG_KEEP_VERSIONS):])
+        keep.add(self.index_version)
+        for version in versions:
+            if version in keep:
+                continue
+            lease = FileLock(os.path.join(self._version_dir(version), LEASE_FILENAME))
+            if not lease.acquire(blocking=False):
+                print(f"📌 Keeping old index version {version}: another worker still serves it")
+                continue
             try:
-                with open(self.content_hash_file, 'r') as f:
-                    return f.read().strip()
-            except Exception:
-                pass
-        return ""
+                shutil.rmtree(self._version_dir(version), ignore_errors=True)
+            finally:
+                lease.release()
+            print(f"🧹 Pruned old index version {version}")
+    
+    def _load_manifest(self, version: Optional[str]) -> Dict:
+        """Load a version's per-source manifest, or an empty one if missing or unreadable"""
+        manifest_file = os.path.join(self._version_dir(version), MANIFEST_FILENAME) if version else None
+        if manifest_file and os.path.exists(manifest_file):
+            try:
+                with open(manifest_file, 'r') as f:
+                    manifest = json.load(f)
+                if isinstance(manifest.get("sources"), dict):
+                    return manifest
+            except Exception as e:
+                print(f"⚠️ Could not read source manifest: {e}")
+        return {"config": None, "sources": {}}
+    
+    def _save_manifest(self, version: str, manifest: Dict):
+        """Atomically write a version's per-source manifest"""
+        manifest_file = os.path.join(self._version_dir(version), MANIFEST_FILENAME)
+        tmp_file = f"{manifest_file}.tmp"
+        with open(tmp_file, 'w') as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(tmp_file, manifest_file)
+    
+    def _open_vectorstore(self, version: str) -> VectorStore:
+        """Open a version with the configured index engine"""
+        if settings.VECTOR_INDEX_ENGINE == "numpy":
+            return NumpyVectorIndex(
+                self._version_dir(version),
+                self.embeddings,
+                quantization=settings.VECTOR_QUANTIZATION,
+                rescore_factor=settings.VECTOR_RESCORE_FACTOR,
+                projection=settings.VECTOR_PROJECTION,
+                projection_dim=settings.VECTOR_PROJECTION_DIM
+            )
+        if settings.VECTOR_INDEX_ENGINE == "ivf":
+            return IVFVectorIndex(
+                self._version_dir(version),
+                self.embeddings,
+                quantization=settings.VECTOR_QUANTIZATION,
+                rescore_factor=settings.VECTOR_RESCORE_FACTOR,
+                projection=settings.VECTOR_PROJECTION,
+                projection_dim=settings.VECTOR_PROJECTION_DIM,
+                nlist=settings.IVF_NLIST,
+                nprobe=self.ivf_nprobe,
+                min_train_size=settings.IVF_MIN_TRAIN_SIZE
+            )
+        return Chroma(
+            persist_directory=self._version_dir(version),
+            embedding_function=self.embeddings
+        )
+    
+    def _count_chunks(self, vectorstore: VectorStore) -> int:
+        if isinstance(vectorstore, NumpyVectorIndex):
+            return vectorstore.count()
+        return vectorstore._collection.count()
     
-    def _load_existing_vectorstore(self) -> bool:
-        """Try to load an existing vector store from Chroma persistence"""
+    def _upsert_chunks(self, vectorstore: VectorStore, ids, texts, vectors, metadatas):
+        """Write precomputed embeddings to either index engine"""
+        if isinstance(vectorstore, NumpyVectorIndex):
+            vectorstore.upsert_embeddings(ids, vectors, texts, metadatas)
+        else:
+            vectorstore._collection.upsert(
+                ids=ids, embeddings=vectors, metadatas=metadatas, documents=texts
+            )
+    
+    def _smoke_test(self, vectorstore: VectorStore, expected_chunks: int):
+        """Raise if a freshly built or restored index is incomplete or cannot answer a query"""
+        count = self._count_chunks(vectorstore)
+        if count != expected_chunks:
+            raise RuntimeError(f"index holds {count} chunks, manifest expects {expected_chunks}")
+        if expected_chunks and not vectorstore.similarity_search_with_relevance_scores(SMOKE_TEST_QUERY, k=1):
+            raise RuntimeError("smoke query returned no results")
+    
+    def _pdf_worker_count(self, file_count: int) -> int:
+        """Resolve the configured PDF worker count for a batch of files"""
+        workers = settings.PDF_WORKERS or os.cpu_count() or 1
+        return max(1, min(workers, file_count))
+    
+    async def iter_pdf_documents(self, pdf_files: List[str]) -> AsyncIterator[Tuple[str, List[Document]]]:
+        """
+        Extract PDFs in a process pool and yield (pdf_file, pages) as each file finishes.
+        Files that fail to load are logged and skipped without affecting the others.
+        """
+        if not pdf_files:
+            return
+        
+        loop = asyncio.get_running_loop()
+        workers = self._pdf_worker_count(len(pdf_files))
+        
+        if workers == 1:
+            # Sequential mode: still keep extraction off the event loop
+            executor = None
+        else:
+            print(f"⚙️ Extracting PDFs with {workers} worker processes")
+            # spawn avoids forking the running event loop and its threads
+            executor = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        
+        # Keep a bounded window of files in flight so finished pages are
+        # consumed as they arrive instead of piling up in memory
+        window = workers * 2 if executor is not None else 1
+        remaining = iter(pdf_files)
+        pending = set()
+        
+        def submit_next() -> bool:
+            pdf_file = next(remaining, None)
+            if pdf_file is None:
+                return False
+            pending.add(loop.run_in_executor(executor, extract_pdf_pages, pdf_file))
+            return True
+        
         try:
-            if os.path.exists(settings.CHROMA_DIR) and os.listdir(settings.CHROMA_DIR):
-                print("📂 Loading existing vector store from Chroma...")
-                self.vectorstore = Chroma(
-                    persist_directory=settings.CHROMA_DIR,
-                    embedding_function=self.embeddings
-                )
-                
-                # Create retriever
-                self.retriever = self.vectorstore.as_retriever(
-                    search_type="similarity_score_threshold",
-                    search_kwargs={
-                        "k": settings.RETRIEVAL_K,
-                        "score_threshold": settings.SIMILARITY_THRESHOLD
-                    }
-                )
-                
-                print("✅ Successfully loaded existing vector store")
-                return True
-        except Exception as e:
-            print(f"⚠️ Could not load existing vector store: {e}")
-        return False
+            while len(pending) < window and submit_next():
+                pass
+            
+            while pending:
+                done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for future in done:
+                    pending.discard(future)
+                    submit_next()
+                    
+                    try:
+                        pdf_file, pages, error = future.result()
+                    except Exception as e:
+                        # Worker crashed (e.g. BrokenProcessPool); the file is unknown here
+                        print(f"❌ PDF worker failed: {e}")
+                        continue
+                    
+                    if error:
+                        print(f"❌ Error loading PDF {pdf_file}: {error}")
+                        continue
+                    
+                    docs = [Document(page_content=text, metadata=metadata) for text, metadata in pages]
+                    print(f"✅ Loaded {len(docs)} pages from {os.path.basename(pdf_file)}")
+                    yield pdf_file, docs
+        finally:
+            for future in pending:
+                future.cancel()
+            if executor is not None:
+                executor.shutdown(wait=False, cancel_futures=True)
     
     async def load_pdfs_from_folder(self, folder_path: str = None) -> List[Document]:
         """Load all PDF files from the specified folder"""
@@ -136,56 +366,177 @@ class RAGService:
         
         print(f"📄 Found {len(pdf_files)} PDF files in {folder_path}")
         
-        for pdf_file in pdf_files:
-            try:
-                print(f"📖 Loading PDF: {os.path.basename(pdf_file)}")
-                loader = PyPDFLoader(pdf_file)
-                pdf_docs = loader.load()
-                
-                # Add metadata to each document
-                for doc in pdf_docs:
-                    doc.metadata.update({
-                        "source": pdf_file,
-                        "source_type": "pdf",
-                        "filename": os.path.basename(pdf_file)
-                    })
-                
-                documents.extend(pdf_docs)
-                print(f"✅ Loaded {len(pdf_docs)} pages from {os.path.basename(pdf_file)}")
-                
-            except Exception as e:
-                print(f"❌ Error loading PDF {pdf_file}: {e}")
-                continue
+        async for _, pdf_docs in self.iter_pdf_documents(pdf_files):
+            documents.extend(pdf_docs)
         
         return documents
     
+    async def iter_website_documents(self, urls: List[str]) -> AsyncIterator[Tuple[str, List[Document]]]:
+        """Fetch websites concurrently and yield (url, documents) as each one finishes"""
+        async for url, docs, error in iter_web_documents(
+            urls,
+            concurrency=settings.WEB_FETCH_CONCURRENCY,
+            limit_per_host=settings.WEB_FETCH_LIMIT_PER_HOST,
+            timeout_seconds=settings.WEB_FETCH_TIMEOUT
+        ):
+            if error:
+                print(f"❌ Error loading {url}: {error}")
+                continue
+            
+            # Add metadata to each document
+            for doc in docs:
+                doc.metadata.update({
+                    "source_type": "website",
+                    "url": url
+                })
+            
+            print(f"✅ Loaded content from {url}")
+            yield url, docs
+    
     async def load_websites(self, urls: List[str]) -> List[Document]:
         """Load content from websites"""
         documents = []
-        for url in urls:
-            try:
-                print(f"🌐 Loading website: {url}")
-                loader = WebBaseLoader(url)
-                docs = loader.load()
-                
-                # Add metadata to each document
-                for doc in docs:
-                    doc.metadata.update({
-                        "source_type": "website",
-                        "url": url
-                    })
-                
-                documents.extend(docs)
-                print(f"✅ Loaded content from {url}")
-                
-            except Exception as e:
-                print(f"❌ Error loading {url}: {e}")
-                continue
+        print(f"🌐 Loading {len(urls)} websites (concurrency {settings.WEB_FETCH_CONCURRENCY})")
+        
+        async for _, docs in self.iter_website_documents(urls):
+            documents.extend(docs)
         
         return documents
     
-    async def initialize_vectorstore(self, urls: List[str] = None, include_pdfs: bool = None) -> bool:
-        """Initialize the vector store with documents"""
+    async def _iter_changed_sources(self, changed: Dict[str, Dict], indexed: Dict[str, Dict]) -> AsyncIterator[Tuple[str, List[Document]]]:
+        """Stream documents of new or changed sources, falling back to built-in content if nothing is indexed"""
+        pdf_files = [info["location"] for info in changed.values() if info["source_type"] == "pdf"]
+        urls = [info["location"] for info in changed.values() if info["source_type"] == "website"]
+        print(f"📄 Loading {len(pdf_files)} new or changed PDF files and {len(urls)} new websites")
+        
+        async def pdf_sources():
+            async for pdf_file, docs in self.iter_pdf_documents(pdf_files):
+                yield self._source_key("pdf", pdf_file), docs
+        
+        async def website_sources():
+            async for url, docs in self.iter_website_documents(urls):
+                yield self._source_key("website", url), docs
+        
+        loaded_any = False
+        async for source_key, docs in merge_sources(pdf_sources(), website_sources()):
+            loaded_any = True
+            yield source_key, docs
+        
+        # Fallback content is only kept while no real source is indexed
+        has_real_sources = loaded_any or any(key != FALLBACK_SOURCE_KEY for key in indexed)
+        if not has_real_sources and FALLBACK_SOURCE_KEY not in indexed:
+            print("⚠️ No documents loaded, using fallback content")
+            yield FALLBACK_SOURCE_KEY, [
+                Document(
+                    page_content=content,
+                    metadata={"source": "fallback", "source_type": "fallback"}
+                ) for content in self._create_fallback_content()
+            ]
+    
+    def _delete_chunks(self, vectorstore: VectorStore, chunk_ids: List[str]):
+        """Delete chunks by ID, ignoring empty lists"""
+        if chunk_ids:
+            vectorstore.delete(ids=chunk_ids)
+    
+    def _activate_vectorstore(self, vectorstore: VectorStore, version: str):
+        """
+        Make a vector store the one used for retrieval.
+        Both attributes are assigned without yielding to the event loop, and
+        in-flight queries keep the reference they already took.
+        """
+        retriever = vectorstore.as_retriever(
+            search_type="similarity_score_threshold",
+            search_kwargs={
+                "k": settings.RETRIEVAL_K,
+                "score_threshold": settings.SIMILARITY_THRESHOLD
+            }
+        )
+        lease = FileLock(os.path.join(self._version_dir(version), LEASE_FILENAME))
+        lease.acquire(shared=True)
+        self.vectorstore, self.retriever, self.index_version = vectorstore, retriever, version
+        self.query_result_cache.clear()
+        previous, self._version_lease = self._version_lease, lease
+        if previous is not None:
+            previous.release()
+    
+    def _adopt_current_version(self) -> bool:
+        """Serve the version named by CURRENT, which another worker may have published"""
+        version = self._read_current_version()
+        if version is None:
+            return False
+        if version != self.index_version:
+            self._activate_vectorstore(self._open_vectorstore(version), version)
+            print(f"🔗 Serving RAG index version {version} published by another worker")
+        return True
+    
+    @property
+    def is_ready(self) -> bool:
+        """Whether a retriever is available for RAG queries"""
+        return self.retriever is not None
+    
+    def start_background_initialization(self, urls: List[str] = None, include_pdfs: bool = None) -> asyncio.Task:
+        """Build or update the index in the background while the API keeps serving"""
+        if self._build_task is None or self._build_task.done():
+            self._build_task = asyncio.create_task(self.initialize_vectorstore(urls, include_pdfs))
+        if not settings.DISABLE_RAG and (self._watch_task is None or self._watch_task.done()):
+            self._watch_task = asyncio.create_task(self._watch_published_versions())
+        return self._build_task
+    
+    async def _watch_published_versions(self):
+        """Adopt versions other workers publish, and take over building if the worker we waited for is gone"""
+        while True:
+            await asyncio.sleep(settings.RAG_VERSION_POLL_SECONDS)
+            try:
+                if self._build_lock.locked():
+                    continue
+                if self._read_current_version() not in (None, self.index_version):
+                    async with self._build_lock:
+                        if self._adopt_current_version():
+                            self.index_state = "ready"
+                elif self.index_state == "waiting" and self._build_file_lock_free():
+                    # The worker we waited for exited without publishing; build in its place
+                    await self.initialize_vectorstore()
+            except Exception as e:
+                print(f"⚠️ Error following published index versions: {e}")
+    
+    def _build_file_lock_free(self) -> bool:
+        """Whether no worker on this host currently holds the build lock"""
+        probe = FileLock(self.build_file_lock.path)
+        if not probe.acquire(blocking=False):
+            return False
+        probe.release()
+        return True
+    
+    async def stop_background_initialization(self):
+        """Cancel a background build and version watching that are still running (used on shutdown)"""
+        for task in (self._build_task, self._watch_task):
+            if task is not None and not task.done():
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+    
+    async def initialize_vectorstore(self, urls: List[str] = None, include_pdfs: bool = None, rebuild: bool = False) -> bool:
+        """Bring the vector store up to date; concurrent builds are serialized"""
+        async with self._build_lock:
+            self.index_state = "building"
+            try:
+                success = await self._update_vectorstore(urls, include_pdfs, rebuild)
+            finally:
+                # A failed update keeps serving the previously active index
+                if self.is_ready:
+                    self.index_state = "ready"
+                elif self.index_state != "waiting":
+                    self.index_state = "disabled" if settings.DISABLE_RAG else "failed"
+            return success
+    
+    async def _update_vectorstore(self, urls: List[str] = None, include_pdfs: bool = None, rebuild: bool = False) -> bool:
+        """
+        Build the next index version next to the live one and switch to it only
+        after it passes a smoke test. Unchanged versions are reused; a failed build
+        is discarded and the live index keeps serving.
+        """
         if settings.DISABLE_RAG:
             print("⚠️ RAG disabled via configuration. Skipping vectorstore initialization.")
             return False
@@ -196,138 +547,157 @@ class RAGService:
         if include_pdfs is None:
             include_pdfs = settings.INCLUDE_PDFS
         
-        try:
-            # Calculate hash of current content sources
-            current_hash = self._calculate_content_hash(urls, include_pdfs)
-            saved_hash = self._load_content_hash()
-            
-            # Check if we can use existing vector store
-            if current_hash == saved_hash and self._load_existing_vectorstore():
-                print("🚀 Using cached vector store (no changes detected)")
+        # One worker per host builds; the others serve what it publishes
+        if not self.build_file_lock.acquire(blocking=False):
+            if self._adopt_current_version():
                 return True
+            print("⏳ Another worker is building the RAG index; waiting for it to publish")
+            self.index_state = "waiting"
+            return False
+        
+        try:
+            # Pick up vectors cached by whichever worker built last
+            if self.embedding_cache:
+                self.embedding_cache.reload()
+            current_sources = self._discover_sources(urls, include_pdfs)
+            current_version = self._read_current_version()
+            config_fingerprint = self._index_config_fingerprint()
             
-            print("🔄 Content changes detected or no cache found. Creating new vector store...")
-            
-            all_documents = []
-            
-            # Load PDFs if enabled
-            if include_pdfs:
-                pdf_documents = await self.load_pdfs_from_folder()
-                print(f"📚 Loaded {len(pdf_documents)} PDF documents")
-                all_documents.extend(pdf_documents)
-            
-            # Load websites
-            print("🌐 Starting to load websites...")
-            web_documents = await self.load_websites(urls)
-            print(f"✅ Loaded {len(web_documents)} web documents")
-            all_documents.extend(web_documents)
-            
-            # Use fallback content if no documents loaded
-            if not all_documents:
-                print("⚠️ No documents loaded, using fallback content")
-                fallback_content = self._create_fallback_content()
-                all_documents = [
-                    Document(
-                        page_content=content,
-                        metadata={"source": "fallback", "source_type": "fallback"}
-                    ) for content in fallback_content
-                ]
-            
-            # Split documents into chunks
-            print("✂️ Starting document splitting...")
-            text_splitter = RecursiveCharacterTextSplitter(
-                chunk_size=settings.CHUNK_SIZE,
-                chunk_overlap=settings.CHUNK_OVERLAP,
-                length_function=len
-            )
-            splits = text_splitter.split_documents(all_documents)
-            total_chunks = len(splits)
-            print(f"📋 Created {total_chunks} document chunks")
-            
-            # Create vector store with GPU acceleration, timing, and progress tracking
-            print("🔗 Creating vector store with GPU acceleration...")
-            start_time = time.time()
-            
-            # Initialize empty Chroma store
-            self.vectorstore = Chroma(
-                persist_directory=settings.CHROMA_DIR,
-                embedding_function=self.embeddings
-            )
-            
-            # Benchmark embedding speed with a small sample
-            print("🧪 Testing embedding speed...")
-            sample_size = min(5, total_chunks)
-            sample_docs = splits[:sample_size]
-            sample_texts = [doc.page_content for doc in sample_docs]
-            
-            sample_start = time.time()
-            _ = self.embeddings.embed_documents(sample_texts)
-            sample_end = time.time()
-            
-            time_per_chunk = (sample_end - sample_start) / sample_size
-            estimated_total_time = time_per_chunk * total_chunks
-            
-            print(f"⏱️ Embedding speed: {time_per_chunk:.3f}s per chunk")
-            print(f"📊 Estimated total time: {estimated_total_time:.1f}s ({estimated_total_time/60:.2f} minutes)")
-            print(f"🎮 Using RTX 3050 GPU acceleration via Ollama")
-            
-            # Process documents in batches for better GPU utilization
-            batch_size = 32  # Optimal for RTX 3050
-            processed = 0
-            
-            print("🚀 Processing document batches...")
-            batch_start = time.time()
-            
-            for i in range(0, total_chunks, batch_size):
-                batch_docs = splits[i:i + batch_size]
-                batch_texts = [doc.page_content for doc in batch_docs]
-                batch_metadata = [doc.metadata for doc in batch_docs]
-                
-                # Add batch to vector store (embeddings computed on GPU)
-                self.vectorstore.add_texts(texts=batch_texts, metadatas=batch_metadata)
-                
-                processed += len(batch_docs)
-                elapsed = time.time() - batch_start
-                avg_time_per_chunk = elapsed / processed
-                remaining_chunks = total_chunks - processed
-                eta = remaining_chunks * avg_time_per_chunk
-                
-                progress_percent = (processed / total_chunks) * 100
-                print(f"🔄 Progress: {processed}/{total_chunks} ({progress_percent:.1f}%) | "
-                      f"Elapsed: {elapsed:.1f}s | ETA: {eta:.1f}s | "
-                      f"Speed: {avg_time_per_chunk:.3f}s/chunk", end='\r')
-            
-            print()  # New line after progress updates
+            base_version = None if rebuild else current_version
+            manifest = self._load_manifest(base_version)
             
-            # Persist the vector store
-            print("💾 Persisting vector store to disk...")
-            self.vectorstore.persist()
+            # Versions built with other chunking or embedding settings cannot be updated in place
+            if manifest["config"] != config_fingerprint:
+                if base_version:
+                    print("🔄 Index settings changed. Building a fresh index version...")
+                base_version = None
+                manifest = {"config": config_fingerprint, "sources": {}}
             
-            total_time = time.time() - start_time
-            print(f"✅ Vector store created successfully in {total_time:.1f}s ({total_time/60:.2f} minutes)")
-            print(f"🏎️ Average speed: {total_time/total_chunks:.3f}s per chunk with GPU acceleration")
+            indexed = manifest["sources"]
+            removed = [key for key in indexed if key not in current_sources and key != FALLBACK_SOURCE_KEY]
+            changed = {
+                key: info for key, info in current_sources.items()
+                if indexed.get(key, {}).get("fingerprint") != info["fingerprint"]
+            }
             
-            print(f"🏎️ Average speed: {total_time/total_chunks:.3f}s per chunk with GPU acceleration")
+            if base_version and not removed and not changed and indexed:
+                if self.index_version != base_version:
+                    self._activate_vectorstore(self._open_vectorstore(base_version), base_version)
+                print(f"🚀 Using cached vector store {base_version} (no changes detected)")
+                return True
             
-            # Create retriever
-            self.retriever = self.vectorstore.as_retriever(
-                search_type="similarity_score_threshold",
-                search_kwargs={
-                    "k": settings.RETRIEVAL_K,
-                    "score_threshold": settings.SIMILARITY_THRESHOLD
-                }
-            )
+            print(f"🔄 {len(changed)} new or changed sources, {len(removed)} removed sources")
             
-            # Save the content hash for future reference
-            self._save_content_hash(current_hash)
+            # Build into a new sibling directory; the live version is never written to
+            version = self._new_version_id()
+            if base_version:
+                print(f"📋 Copying index version {base_version} to {version}")
+                await asyncio.to_thread(shutil.copytree, self._version_dir(base_version), self._version_dir(version))
+            else:
+                os.makedirs(self._version_dir(version))
             
-            print(f"🎯 RAG system initialized with {total_chunks} document chunks")
-            return True
+            try:
+                published = await self._build_version(version, manifest, current_sources, removed, changed)
+            except BaseException:
+                self._discard_version(version)
+                raise
+            return published
             
         except Exception as e:
             print(f"❌ Error initializing RAG system: {e}")
             return False
+        finally:
+            self.build_file_lock.release()
     
+    async def _build_version(
+        self,
+        version: str,
+        manifest: Dict,
+        current_sources: Dict[str, Dict],
+        removed: List[str],
+        changed: Dict[str, Dict]
+    ) -> bool:
+        """Apply source changes to a new index version, verify it and make it live"""
+        indexed = manifest["sources"]
+        vectorstore = self._open_vectorstore(version)
+        
+        # Drop chunks of sources that no longer exist
+        for key in removed:
+            self._delete_chunks(vectorstore, indexed.pop(key).get("chunk_ids", []))
+            print(f"🗑️ Removed {key}")
+        
+        text_splitter = RecursiveCharacterTextSplitter(
+            chunk_size=settings.CHUNK_SIZE,
+            chunk_overlap=settings.CHUNK_OVERLAP,
+            length_function=len
+        )
+        
+        def split_source(key: str, docs: List[Document]):
+            """Split one source into chunks with stable IDs and record it in the manifest"""
+            chunks = text_splitter.split_documents(docs)
+            ids = self._chunk_ids(key, len(chunks))
+            
+            # New chunks overwrite old ones with the same ID; only the surplus is stale
+            new_ids = set(ids)
+            stale_ids = [i for i in indexed.get(key, {}).get("chunk_ids", []) if i not in new_ids]
+            
+            if key == FALLBACK_SOURCE_KEY:
+                entry = {"source_type": "fallback", "location": "fallback", "fingerprint": "fallback"}
+            else:
+                entry = dict(current_sources[key])
+            entry["chunk_ids"] = ids
+            indexed[key] = entry
+            return ids, chunks, stale_ids
+        
+        # Load, split, embed and write concurrently with bounded queues
+        print("🚀 Starting streaming ingestion pipeline...")
+        pipeline = IngestionPipeline(
+            embeddings=self.embeddings,
+            split_source=split_source,
+            write_chunks=lambda *batch: self._upsert_chunks(vectorstore, *batch),
+            delete_chunks=lambda ids: self._delete_chunks(vectorstore, ids),
+            batch_size=settings.EMBED_BATCH_SIZE,
+            min_batch_size=settings.EMBED_BATCH_MIN,
+            max_batch_size=settings.EMBED_BATCH_MAX,
+            max_in_flight=settings.EMBED_MAX_IN_FLIGHT,
+            queue_size=settings.INGEST_QUEUE_SIZE
+        )
+        self.ingestion_pipeline = pipeline
+        stats = await pipeline.run(self._iter_changed_sources(changed, indexed))
+        
+        if stats["chunks_written"]:
+            total_time = stats["elapsed_seconds"]
+            telemetry = stats["embedding"]
+            print(f"✅ Embedded {stats['chunks_written']} chunks from {stats['sources_loaded']} sources "
+                  f"in {total_time:.1f}s ({total_time/60:.2f} minutes)")
+            print(f"🏎️ Throughput: {telemetry['chunks_per_second']:.1f} chunks/s, "
+                  f"settled batch size {telemetry['batch_size']}")
+        
+        # Drop the fallback once real sources are indexed
+        if FALLBACK_SOURCE_KEY in indexed and any(key != FALLBACK_SOURCE_KEY for key in indexed):
+            self._delete_chunks(vectorstore, indexed.pop(FALLBACK_SOURCE_KEY).get("chunk_ids", []))
+        
+        # Persist the vector store
+        print("💾 Persisting vector store to disk...")
+        vectorstore.persist()
+        
+        total_indexed = sum(len(info.get("chunk_ids", [])) for info in indexed.values())
+        print("🧪 Running smoke test on the new index...")
+        await asyncio.to_thread(self._smoke_test, vectorstore, total_indexed)
+        
+        # Save the manifest only after every chunk is written
+        self._save_manifest(version, manifest)
+        if self.embedding_cache:
+            self.embedding_cache.flush()
+        
+        # Switch the pointer, then the in-process index, then clean up
+        self._switch_current_version(version)
+        self._activate_vectorstore(vectorstore, version)
+        self._prune_versions()
+        
+        print(f"🎯 RAG index {version} live with {total_indexed} document chunks from {len(indexed)} sources")
+        return True
+
     def _check_gpu_availability(self) -> dict:
         """Check GPU availability and return system information"""
         gpu_info = {
@@ -366,26 +736,53 @@ class RAGService:
         return gpu_info
     
     async def force_rebuild_vectorstore(self, urls: List[str] = None, include_pdfs: bool = None) -> bool:
-        """Force rebuild the vector store by clearing cache and recreating"""
+        """
+        Rebuild the whole index into a new version. The live index keeps serving
+        until the new one passes its smoke test; the embedding cache is reused.
+        """
         try:
-            # Clear existing cache
-            if os.path.exists(self.content_hash_file):
-                os.remove(self.content_hash_file)
-                print("🗑️ Cleared content hash cache")
-            
-            # Clear Chroma directory
-            if os.path.exists(settings.CHROMA_DIR):
-                import shutil
-                shutil.rmtree(settings.CHROMA_DIR)
-                print("🗑️ Cleared existing vector store")
-            
-            # Rebuild
-            return await self.initialize_vectorstore(urls, include_pdfs)
-            
+            return await self.initialize_vectorstore(urls, include_pdfs, rebuild=True)
         except Exception as e:
             print(f"❌ Error force rebuilding vector store: {e}")
             return False
     
+    async def rollback_vectorstore(self, version: str = None) -> Optional[str]:
+        """
+        Switch back to a previous index version (by default the one before the
+        active version). Returns the version now live, or None if there is none.
+        """
+        async with self._build_lock:
+            if not self.build_file_lock.acquire(blocking=False):
+                raise RuntimeError("another worker is building the index; try again once it is live")
+            try:
+                return await self._rollback_locked(version)
+            finally:
+                self.build_file_lock.release()
+    
+    async def _rollback_locked(self, version: Optional[str]) -> Optional[str]:
+        """Rollback itself; the caller holds both the in-process and the host build lock"""
+        versions = self._list_versions()
+        current = self.index_version or self._read_current_version()
+        
+        if version is None:
+            older = [v for v in versions if current is None or v < current]
+            if not older:
+                return None
+            version = older[-1]
+        elif version not in versions:
+            return None
+        
+        vectorstore = self._open_vectorstore(version)
+        manifest = self._load_manifest(version)
+        expected = sum(len(info.get("chunk_ids", [])) for info in manifest["sources"].values())
+        await asyncio.to_thread(self._smoke_test, vectorstore, expected)
+        
+        self._switch_current_version(version)
+        self._activate_vectorstore(vectorstore, version)
+        self.index_state = "ready"
+        print(f"⏪ Rolled back RAG index to version {version}")
+        return version
+    
     def _create_fallback_content(self) -> List[str]:
         """Create fallback content when external sources can't be loaded"""
         return [
@@ -428,17 +825,31 @@ class RAGService:
         Retrieve relevant content and determine if it's relevant enough to use
         Returns: RAGResult with content, should_use_rag flag, and relevance score
         """
-        if not self.retriever:
-            return RAGResult(content="", should_use_rag=False, relevance_score=0.0)
+        # Take one reference so a concurrent index swap cannot affect this query
+        vectorstore, version = self.vectorstore, self.index_version
+        if not self.retriever or vectorstore is None:
+            # Until the first build finishes, answers lack the context they will normally have
+            return RAGResult(
+                content="", should_use_rag=False, relevance_score=0.0,
+                degraded=self.index_state in ("not_started", "building", "waiting")
+            )
+        
+        # Version and threshold in the key keep a result computed just before a swap from being reused
+        normalized = normalize_query(query)
+        result_key = (version, self.relevance_threshold, normalized)
+        cached = self.query_result_cache.get(result_key)
+        if cached is not None:
+            print(f"⚡ Query cache hit: {query}")
+            return cached
         
         try:
-            # Get documents with similarity scores
-            docs_with_scores = self.vectorstore.similarity_search_with_relevance_scores(
-                query, k=3
-            )
+            # Get documents with similarity scores off the event loop
+            docs_with_scores = await self.retrieval_pool.run(self._retrieve_documents, vectorstore, query, normalized)
             
             if not docs_with_scores:
-                return RAGResult(content="", should_use_rag=False, relevance_score=0.0)
+                result = RAGResult(content="", should_use_rag=False, relevance_score=0.0)
+                self.query_result_cache.put(result_key, result)
+                return result
             
             # Get the best relevance score
             max_relevance_score = max(score for _, score in docs_with_scores)
@@ -467,21 +878,65 @@ class RAGService:
                         formatted_content.append(f"{content}{source_info}")
                 
                 content = "\n\n".join(formatted_content)
-                return RAGResult(
+                result = RAGResult(
                     content=content,
                     should_use_rag=True,
-                    relevance_score=max_relevance_score
+                    relevance_score=max_relevance_score,
+                    context_digest=hashlib.sha1(content.encode()).hexdigest()[:16],
+                    chunks=formatted_content
                 )
             else:
-                return RAGResult(
+                result = RAGResult(
                     content="",
                     should_use_rag=False,
                     relevance_score=max_relevance_score
                 )
+            
+            self.query_result_cache.put(result_key, result)
+            return result
                 
         except Exception as e:
             print(f"❌ Error retrieving content: {e}")
-            return RAGResult(content="", should_use_rag=False, relevance_score=0.0)
+            return RAGResult(content="", should_use_rag=False, relevance_score=0.0, degraded=True)
+    
+    def retrieval_state_digest(self) -> str:
+        """Identifies everything retrieval results depend on besides the query: live index version and threshold"""
+        state = f"{self.index_version}:{self.relevance_threshold}"
+        return hashlib.sha1(state.encode()).hexdigest()[:16]
+    
+    def _cached_query_vector(self, query: str, normalized: str) -> List[float]:
+        query_vector = self.query_vector_cache.get(normalized)
+        if query_vector is None:
+            query_vector = self.embeddings.embed_query(query)
+            self.query_vector_cache.put(normalized, query_vector)
+        return query_vector
+    
+    def _retrieve_documents(self, vectorstore: VectorStore, query: str, normalized: str) -> List[Tuple[Document, float]]:
+        query_vector = self._cached_query_vector(query, normalized)
+        return self._search_with_relevance(vectorstore, query_vector, k=3)
+    
+    async def embed_query(self, query: str) -> Optional[List[float]]:
+        """Query embedding through the query vector cache; None when embeddings are unavailable"""
+        if self.embeddings is None:
+            return None
+        normalized = normalize_query(query)
+        if normalized in self.query_vector_cache:
+            return self._cached_query_vector(query, normalized)
+        try:
+            return await self.retrieval_pool.run(self._cached_query_vector, query, normalized)
+        except Exception as e:
+            print(f"❌ Error embedding query: {e}")
+            return None
+    
+    def _search_with_relevance(self, vectorstore: VectorStore, query_vector: List[float], k: int) -> List[Tuple[Document, float]]:
+        """Search by a precomputed query vector and convert distances to relevance scores"""
+        if isinstance(vectorstore, NumpyVectorIndex):
+            docs_with_distances = vectorstore.similarity_search_by_vector_with_score(query_vector, k=k)
+        else:
+            # Despite its name, Chroma returns distances here
+            docs_with_distances = vectorstore.similarity_search_by_vector_with_relevance_scores(query_vector, k=k)
+        relevance_fn = vectorstore._select_relevance_score_fn()
+        return [(doc, relevance_fn(distance)) for doc, distance in docs_with_distances]
     
     def _clean_document_content(self, content: str) -> str:
         """Clean document content to remove unwanted characters and formatting"""
@@ -513,20 +968,60 @@ class RAGService:
         
         return {
             "initialized": self.retriever is not None,
+            "index_state": self.index_state,
+            "index_engine": settings.VECTOR_INDEX_ENGINE,
+            "index_version": self.index_version,
+            "ivf_nprobe": self.ivf_nprobe if settings.VECTOR_INDEX_ENGINE == "ivf" else None,
+            "index_memory": self.vectorstore.memory_stats() if isinstance(self.vectorstore, NumpyVectorIndex) else None,
+            "available_versions": self._list_versions(),
             "vectorstore_available": self.vectorstore is not None,
             "relevance_threshold": self.relevance_threshold,
             "default_websites": self.default_websites,
             "pdf_folder": self.pdf_folder,
             "pdf_files_found": [os.path.basename(f) for f in pdf_files],
             "total_pdf_files": len(pdf_files),
-            "embeddings_type": type(self.embeddings).__name__ if self.embeddings else "None"
+            "embeddings_type": type(getattr(self.embeddings, "underlying", self.embeddings)).__name__ if self.embeddings else "None",
+            "embedding_cache": self.embedding_cache.get_stats() if self.embedding_cache else None,
+            "query_cache": {
+                "vectors": self.query_vector_cache.get_stats(),
+                "results": self.query_result_cache.get_stats()
+            },
+            "ingestion": self.ingestion_pipeline.get_stats() if self.ingestion_pipeline else None,
+            "retrieval_pool": self.retrieval_pool.get_stats()
         }
     
     def update_threshold(self, new_threshold: float) -> Tuple[float, float]:
         """Update relevance threshold and return old and new values"""
         old_threshold = self.relevance_threshold
         self.relevance_threshold = new_threshold
+        self.query_result_cache.clear()
         return old_threshold, new_threshold
+    
+    def update_nprobe(self, new_nprobe: int) -> Tuple[int, int]:
+        """Update the IVF lists scanned per query and return old and new values"""
+        old_nprobe = self.ivf_nprobe
+        self.ivf_nprobe = new_nprobe
+        if isinstance(self.vectorstore, IVFVectorIndex):
+            self.vectorstore.nprobe = new_nprobe
+        return old_nprobe, new_nprobe
+    
+    async def measure_index_recall(self, k: int = 3, sample_size: int = 100, nprobe: Optional[int] = None) -> Optional[dict]:
+        """Compare configured search with exact search on the live index; None for Chroma or no index"""
+        vectorstore = self.vectorstore
+        if isinstance(vectorstore, IVFVectorIndex):
+            return await asyncio.to_thread(vectorstore.measure_recall, k, sample_size, None, nprobe)
+        if isinstance(vectorstore, NumpyVectorIndex):
+            return await asyncio.to_thread(vectorstore.measure_recall, k, sample_size)
+        return None
+    
+    async def projection_report(self, dims: List[int], k: int = 3, sample_size: int = 100) -> Optional[dict]:
+        """Recall and relevance drift of projection sizes on the live index; None for Chroma or no index"""
+        vectorstore = self.vectorstore
+        if not isinstance(vectorstore, NumpyVectorIndex):
+            return None
+        return await asyncio.to_thread(
+            vectorstore.projection_report, dims, k, sample_size, threshold=self.relevance_threshold
+        )
 
 # Global RAG service instance
 rag_service = RAGService()
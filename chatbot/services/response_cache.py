@@ -0,0 +1,261 @@
+"""
+Response caches for first-turn questions: exact-match and semantic (near-duplicate)
+"""
+import os
+import shutil
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from chatbot.core.config import settings
+from chatbot.models.schemas import QuestionAnalysis, RAGResult
+from chatbot.services.rag import rag_service
+from chatbot.services.vector_index import IVFVectorIndex
+from chatbot.utils.cache import LRUCache
+from chatbot.utils.text_processing import normalize_query
+
+# Nearest cached questions checked per lookup; the closest one may have the wrong type or context
+LOOKUP_CANDIDATES = 5
+
+class ExactResponseCache:
+    """
+    First-turn replies keyed on the normalized question and everything else that
+    shapes the answer: question type and format, retrieval state, and LLM settings.
+    A hit needs neither retrieval nor generation.
+    """
+
+    def __init__(self, max_entries: int = 2048, ttl_seconds: float = 3600):
+        self._cache = LRUCache(max_entries, ttl_seconds)
+
+    @staticmethod
+    def make_key(message: str, analysis: QuestionAnalysis, retrieval_digest: str, llm_settings: str) -> Tuple:
+        return (normalize_query(message), analysis.type, analysis.format, retrieval_digest, llm_settings)
+
+    def get(self, key: Tuple) -> Optional[Dict]:
+        return self._cache.get(key)
+
+    def put(self, key: Tuple, reply: Dict):
+        self._cache.put(key, reply)
+
+    def __contains__(self, key: Tuple) -> bool:
+        return key in self._cache
+
+    def clear(self) -> int:
+        """Drop every cached reply and return how many there were"""
+        count = len(self._cache)
+        self._cache.clear()
+        return count
+
+    def get_stats(self) -> dict:
+        return self._cache.get_stats()
+
+class SemanticResponseCache:
+    """
+    Answers to first-turn questions indexed by their query embedding.
+
+    A lookup finds the nearest cached questions with an IVF index and returns
+    the first one above `similarity_threshold` whose question type, answer
+    format, RAG context and LLM settings match the new request. Entries expire
+    after `ttl_seconds` and the least recently used are evicted beyond
+    `max_entries`. The index lives in `persist_directory` and is persisted every
+    `persist_every` changes, which also compacts evicted entries and trains the
+    IVF lists once the cache is large enough.
+    """
+
+    def __init__(
+        self,
+        persist_directory: str,
+        embedding_model_id: str,
+        similarity_threshold: float = 0.95,
+        max_entries: int = 5000,
+        ttl_seconds: float = 86400,
+        persist_every: int = 64
+    ):
+        self.persist_directory = persist_directory
+        self.embedding_model_id = embedding_model_id
+        self.similarity_threshold = similarity_threshold
+        self.max_entries = max(1, max_entries)
+        self.ttl_seconds = ttl_seconds
+        self.persist_every = max(1, persist_every)
+        self._lock = threading.Lock()
+        self._changes = 0
+
+        # Entry ID -> expiry timestamp, least recently used first
+        self._entries: "OrderedDict[str, float]" = OrderedDict()
+
+        self.lookups = 0
+        self.hits = 0
+        self.llm_calls = 0
+
+        self.index = self._open_index()
+        self._restore_entries()
+
+    def _open_index(self) -> IVFVectorIndex:
+        return IVFVectorIndex(self.persist_directory, None, nprobe=8, min_train_size=1024)
+
+    def _restore_entries(self):
+        """Rebuild the LRU order from persisted entries, dropping expired or incompatible ones"""
+        now = time.time()
+        stale = []
+        entries = sorted(self.index.live_metadata().items(), key=lambda item: item[1].get("last_used", 0))
+        for entry_id, metadata in entries:
+            if metadata.get("embeddings") != self.embedding_model_id or metadata.get("expires_at", 0) <= now:
+                stale.append(entry_id)
+            else:
+                self._entries[entry_id] = metadata["expires_at"]
+        if stale:
+            self.index.delete(stale)
+        if self._entries:
+            print(f"🧠 Semantic response cache restored {len(self._entries)} answers")
+
+    @staticmethod
+    def context_key(rag_result: RAGResult) -> str:
+        """Identifies the knowledge an answer was grounded on; general answers share one key"""
+        return rag_result.context_digest if rag_result.should_use_rag else "general"
+
+    def lookup(
+        self,
+        query_vector: List[float],
+        analysis: QuestionAnalysis,
+        rag_result: RAGResult,
+        llm_settings: str
+    ) -> Optional[Dict]:
+        """Cached answer for a semantically equivalent question asked in the same context, if any"""
+        self.lookups += 1
+        candidates = self.index.similarity_search_by_vector_with_score(query_vector, k=LOOKUP_CANDIDATES)
+        context = self.context_key(rag_result)
+        now = time.time()
+
+        with self._lock:
+            for doc, distance in candidates:
+                # Distances are 2 - 2·cos for normalized vectors
+                similarity = 1.0 - distance / 2.0
+                if similarity < self.similarity_threshold:
+                    break
+
+                metadata = doc.metadata
+                entry_id = metadata.get("entry_id")
+                if entry_id not in self._entries or self._entries[entry_id] <= now:
+                    continue
+                if (metadata.get("type"), metadata.get("format")) != (analysis.type, analysis.format):
+                    continue
+                if metadata.get("context") != context or metadata.get("llm") != llm_settings:
+                    continue
+
+                self._entries.move_to_end(entry_id)
+                self.hits += 1
+                return {
+                    "response": doc.page_content,
+                    "similarity": similarity,
+                    "question": metadata.get("question", "")
+                }
+        return None
+
+    def store(
+        self,
+        query_vector: List[float],
+        question: str,
+        analysis: QuestionAnalysis,
+        rag_result: RAGResult,
+        llm_settings: str,
+        response: str
+    ):
+        """Cache a freshly generated first-turn answer"""
+        if self.index.input_dim and len(query_vector) != self.index.input_dim:
+            self._reset()
+
+        now = time.time()
+        entry_id = str(uuid.uuid4())
+        metadata = {
+            "entry_id": entry_id,
+            "question": question,
+            "type": analysis.type,
+            "format": analysis.format,
+            "context": self.context_key(rag_result),
+            "llm": llm_settings,
+            "embeddings": self.embedding_model_id,
+            "expires_at": now + self.ttl_seconds,
+            "last_used": now
+        }
+        self.index.upsert_embeddings([entry_id], [query_vector], [response], [metadata])
+
+        with self._lock:
+            self._entries[entry_id] = metadata["expires_at"]
+            evicted = self._evict(now)
+            self._changes += 1 + len(evicted)
+            should_persist = self._changes >= self.persist_every
+            if should_persist:
+                self._changes = 0
+
+        if evicted:
+            self.index.delete(evicted)
+        if should_persist:
+            self.index.persist()
+
+    def record_llm_call(self):
+        """Count a request that went to the LLM, for the avoided-calls percentage"""
+        self.llm_calls += 1
+
+    def _evict(self, now: float) -> List[str]:
+        """Drop expired entries and the least recently used beyond max_entries"""
+        evicted = [entry_id for entry_id, expires_at in self._entries.items() if expires_at <= now]
+        for entry_id in evicted:
+            del self._entries[entry_id]
+        while len(self._entries) > self.max_entries:
+            entry_id, _ = self._entries.popitem(last=False)
+            evicted.append(entry_id)
+        return evicted
+
+    def _reset(self):
+        """Drop every entry and start over with an empty index"""
+        with self._lock:
+            self._entries.clear()
+            self._changes = 0
+        shutil.rmtree(self.persist_directory, ignore_errors=True)
+        os.makedirs(self.persist_directory, exist_ok=True)
+        self.index = self._open_index()
+
+    def clear(self) -> int:
+        """Drop every cached answer and return how many there were"""
+        count = len(self._entries)
+        self._reset()
+        return count
+
+    def persist(self):
+        self.index.persist()
+
+    def get_stats(self) -> dict:
+        answered = self.hits + self.llm_calls
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "similarity_threshold": self.similarity_threshold,
+            "ttl_seconds": self.ttl_seconds,
+            "lookups": self.lookups,
+            "hits": self.hits,
+            "hit_rate": round(self.hits / self.lookups, 4) if self.lookups else 0.0,
+            "llm_calls": self.llm_calls,
+            "llm_calls_avoided_pct": round(100.0 * self.hits / answered, 2) if answered else 0.0,
+            "ann_trained": self.index.trained
+        }
+
+def _create_semantic_response_cache() -> Optional[SemanticResponseCache]:
+    if not settings.SEMANTIC_CACHE_ENABLED or rag_service.embeddings is None:
+        return None
+    try:
+        return SemanticResponseCache(
+            os.path.join(settings.CHROMA_DIR, "response_cache"),
+            rag_service.embedding_model_id,
+            similarity_threshold=settings.SEMANTIC_CACHE_THRESHOLD,
+            max_entries=settings.SEMANTIC_CACHE_SIZE,
+            ttl_seconds=settings.SEMANTIC_CACHE_TTL
+        )
+    except Exception as e:
+        print(f"⚠️ Semantic response cache unavailable ({e})")
+        return None
+
+# Global response cache instances (the semantic cache is None when disabled)
+exact_response_cache = ExactResponseCache(settings.EXACT_CACHE_SIZE, settings.EXACT_CACHE_TTL)
+semantic_response_cache = _create_semantic_response_cache()
@@ -0,0 +1,109 @@
+"""
+Rolling conversation summarization that compacts long chat sessions
+"""
+import asyncio
+from typing import List, Set
+
+from chatbot.core.config import settings
+from chatbot.models.schemas import QuestionAnalysis
+from chatbot.services.llm import llm_service
+from chatbot.services.memory import ChatMemory, ChatMessage, chat_memory
+from chatbot.utils.prompt_builder import prompt_builder
+
+SUMMARY_SYSTEM_PROMPT = """You maintain a running summary of a conversation between a user and Readle, an assistant that supports children with dyslexia and their parents.
+
+Update the summary with the new messages. Keep the facts the user shared about themselves or their child, the questions asked, the advice already given and any open follow-ups. Write short plain sentences in the third person, with no preamble.
+"""
+
+class ConversationSummarizer:
+    """
+    Folds the older turns of long sessions into a running summary.
+
+    After each turn, a session whose raw history exceeds `trigger_tokens` gets a
+    background task that summarizes everything but the last `keep_messages`
+    messages, together with the previous summary. The summary then replaces
+    those messages, so the prompt carries one short summary instead of a growing
+    history. At most one summarization runs per session in a worker, and it
+    never delays the reply that triggered it. Workers sharing a store may still
+    race; the store only applies a summary built on the one it currently holds.
+    """
+
+    def __init__(self, memory: ChatMemory, trigger_tokens: int = 1500, keep_messages: int = 4, max_tokens: int = 250):
+        self.memory = memory
+        self.trigger_tokens = trigger_tokens
+        self.keep_messages = max(2, keep_messages)
+        self.analysis = QuestionAnalysis(type="summary", max_tokens=max_tokens, style="brief", format="paragraph")
+        self._running: Set[str] = set()
+        self._tasks: Set[asyncio.Task] = set()
+
+        self.summaries_created = 0
+        self.messages_folded = 0
+        self.failures = 0
+
+    def _history_tokens(self, messages: List[ChatMessage]) -> int:
+        return sum(prompt_builder.tokens.count(message.content) for message in messages)
+
+    async def maybe_schedule(self, session_id: str):
+        """Start compacting the session in the background if its history has grown too long"""
+        if session_id in self._running:
+            return
+        messages = await self.memory.run(self.memory.get_chat_history, session_id)
+        if len(messages) <= self.keep_messages or self._history_tokens(messages) < self.trigger_tokens:
+            return
+
+        self._running.add(session_id)
+        task = asyncio.create_task(self._compact(session_id))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _compact(self, session_id: str):
+        try:
+            # Summary before history: a fold landing in between changes the summary, so applying ours fails
+            previous = await self.memory.run(self.memory.get_summary, session_id)
+            messages = await self.memory.run(self.memory.get_chat_history, session_id)
+            folded = messages[:-self.keep_messages]
+            if not folded:
+                return
+            transcript = "\n".join(f"{message.role.capitalize()}: {message.content}" for message in folded)
+            prompt = f"Current summary:\n{previous or '(none yet)'}\n\nNew messages:\n{transcript}"
+
+            summary = await llm_service.generate_response(
+                [{"role": "system", "content": SUMMARY_SYSTEM_PROMPT}, {"role": "user", "content": prompt}],
+                self.analysis
+            )
+            summary = summary.strip()
+            # Dropped if another worker folded the session meanwhile; its summary already covers these turns
+            if summary and await self.memory.run(self.memory.apply_summary, session_id, summary, folded, previous):
+                self.summaries_created += 1
+                self.messages_folded += len(folded)
+                print(f"🗜️ Folded {len(folded)} messages of session {session_id[:8]} into its summary")
+        except Exception as e:
+            self.failures += 1
+            print(f"⚠️ Error summarizing session {session_id[:8]}: {e}")
+        finally:
+            self._running.discard(session_id)
+
+    async def stop(self):
+        """Cancel summarizations still running (used on shutdown)"""
+        tasks = list(self._tasks)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def get_stats(self) -> dict:
+        return {
+            "trigger_tokens": self.trigger_tokens,
+            "keep_messages": self.keep_messages,
+            "running": len(self._running),
+            "summaries_created": self.summaries_created,
+            "messages_folded": self.messages_folded,
+            "failures": self.failures
+        }
+
+# Global summarizer instance (None when compaction is disabled)
+conversation_summarizer = ConversationSummarizer(
+    chat_memory,
+    trigger_tokens=settings.SUMMARY_TRIGGER_TOKENS,
+    keep_messages=settings.SUMMARY_KEEP_MESSAGES,
+    max_tokens=settings.SUMMARY_MAX_TOKENS
+) if settings.SUMMARY_ENABLED else None
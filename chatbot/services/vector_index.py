@@ -0,0 +1,833 @@
+"""
+In-process NumPy vector indexes (exact and IVF), alternative retrieval engines to Chroma
+"""
+import copy
+import json
+import os
+import threading
+import time
+import uuid
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from langchain.schema import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.vectorstores import VectorStore
+
+from chatbot.services.projection import PROJECTIONS, VectorProjection
+
+VECTORS_FILENAME = "vectors.npy"
+RECORDS_FILENAME = "records.json"
+IVF_FILENAME = "ivf.npz"
+CODES_FILENAME = "codes.npz"
+FULL_VECTORS_FILENAME = "full_vectors.npy"
+PROJECTION_FILENAME = "projection.npz"
+
+QUANTIZATIONS = ("none", "int8", "binary")
+
+# Rows processed per block when assigning centroids or scanning codes; small scan
+# blocks keep the dequantized block in cache
+ASSIGN_BLOCK_ROWS = 8192
+SCAN_BLOCK_ROWS = 1024
+
+# ±1 signs of the 8 bits of every byte value, most significant first as np.packbits writes them
+BYTE_SIGNS = np.unpackbits(np.arange(256, dtype=np.uint8)[:, None], axis=1).astype(np.float32) * 2 - 1
+
+def normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    """L2-normalize each row so dot products are cosine similarities"""
+    matrix = np.asarray(matrix, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+def top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the k highest scores, best first, using argpartition"""
+    k = min(k, scores.shape[0])
+    if k <= 0:
+        return np.empty(0, dtype=np.int64)
+    if k < scores.shape[0]:
+        candidates = np.argpartition(-scores, k - 1)[:k]
+    else:
+        candidates = np.arange(scores.shape[0])
+    return candidates[np.argsort(-scores[candidates], kind="stable")]
+
+def fit_quantizer(vectors: np.ndarray, kind: str) -> np.ndarray:
+    """
+    Per-dimension quantizer parameters: for int8 the absolute maximum mapped onto
+    ±127, for binary the mean that is subtracted before taking signs (embeddings
+    such as llama2's are far from zero-centred, so raw signs carry little signal).
+    """
+    params = np.zeros(vectors.shape[1], dtype=np.float64)
+    for start in range(0, len(vectors), ASSIGN_BLOCK_ROWS):
+        block = np.asarray(vectors[start:start + ASSIGN_BLOCK_ROWS], dtype=np.float32)
+        if kind == "int8":
+            np.maximum(params, np.abs(block).max(axis=0), out=params)
+        else:
+            params += block.sum(axis=0)
+    if kind == "int8":
+        params[params == 0] = 1.0
+    elif len(vectors):
+        params /= len(vectors)
+    return params.astype(np.float32)
+
+def quantize(vectors: np.ndarray, kind: str, params: np.ndarray) -> np.ndarray:
+    """Scalar int8 codes (one byte per dimension) or packed sign bits (one bit per dimension)"""
+    codes = []
+    for start in range(0, len(vectors), ASSIGN_BLOCK_ROWS):
+        block = np.asarray(vectors[start:start + ASSIGN_BLOCK_ROWS], dtype=np.float32)
+        if kind == "int8":
+            codes.append(np.clip(np.rint(block / params * 127.0), -127, 127).astype(np.int8))
+        else:
+            codes.append(np.packbits(block > params, axis=1))
+    if not codes:
+        width = vectors.shape[1] if kind == "int8" else (vectors.shape[1] + 7) // 8
+        return np.empty((0, width), dtype=np.int8 if kind == "int8" else np.uint8)
+    return np.vstack(codes)
+
+def relevance_from_similarity(similarities: np.ndarray) -> np.ndarray:
+    """Relevance scores as LangChain derives them from the 2 - 2·cos distances this index reports"""
+    return 1.0 - np.maximum(0.0, 2.0 - 2.0 * similarities) / np.sqrt(2.0)
+
+class NumpyVectorIndex(VectorStore):
+    """
+    Exact top-k search over a contiguous float32 matrix.
+
+    Vectors are stored L2-normalized in `vectors.npy` and memory-mapped on load;
+    ids, texts and metadata live in parallel arrays in `records.json`. Search is a
+    single matrix-vector product followed by argpartition. Distances are reported
+    as squared L2 (2 - 2·cos), the same scale Chroma uses, so relevance scores and
+    RAG_THRESHOLD mean the same thing for normalized embeddings on both engines.
+
+    Updates append new rows and mark replaced or deleted rows as dead; persist()
+    compacts the matrix and rewrites both files. Writers swap in new arrays
+    rather than changing them in place, so searches only hold the lock long
+    enough to take a snapshot and then scan concurrently.
+
+    With `quantization` set to "int8" or "binary", only compact codes (4x or 32x
+    smaller) are held in memory and scanned. The best `k * rescore_factor`
+    candidates are then rescored against the memory-mapped float32 rows, so the
+    returned distances are always exact and only recall depends on the codes.
+
+    With a `projection` ("pca" or "truncate") and `projection_dim`, persist()
+    fits the projection once the index holds enough rows, and from then on the
+    search matrix, codes and queries all live in the reduced space. The
+    unreduced rows are kept memory-mapped in `full_vectors.npy` for refitting
+    and for projection_report().
+    """
+
+    def __init__(
+        self,
+        persist_directory: Optional[str],
+        embedding_function: Embeddings,
+        quantization: str = "none",
+        rescore_factor: int = 10,
+        projection: str = "none",
+        projection_dim: int = 0
+    ):
+        if quantization not in QUANTIZATIONS:
+            raise ValueError(f"Unknown vector quantization '{quantization}'")
+        if projection not in PROJECTIONS:
+            raise ValueError(f"Unknown vector projection '{projection}'")
+        self.persist_directory = persist_directory
+        self._embedding = embedding_function
+        self._lock = threading.RLock()
+        self.quantization = quantization
+        self.rescore_factor = max(1, rescore_factor)
+        self._codes: Optional[np.ndarray] = None
+        self._pending_codes: List[np.ndarray] = []
+        self._quantizer: Optional[np.ndarray] = None
+        self.projection = projection
+        self.projection_dim = projection_dim
+        self._projection: Optional[VectorProjection] = None
+        self._full = np.empty((0, 0), dtype=np.float32)
+        self._pending_full: List[np.ndarray] = []
+
+        self._vectors = np.empty((0, 0), dtype=np.float32)
+        self._pending: List[np.ndarray] = []
+        self._alive = np.empty(0, dtype=bool)
+        self._ids: List[str] = []
+        self._texts: List[str] = []
+        self._metadatas: List[Dict] = []
+        self._id_to_row: Dict[str, int] = {}
+
+        if persist_directory:
+            os.makedirs(persist_directory, exist_ok=True)
+            self._load()
+
+    @property
+    def embeddings(self) -> Embeddings:
+        return self._embedding
+
+    @property
+    def dim(self) -> int:
+        if self._vectors.shape[0]:
+            return self._vectors.shape[1]
+        if self._pending:
+            return self._pending[0].shape[1]
+        return 0
+
+    @property
+    def input_dim(self) -> int:
+        """Dimension of incoming embeddings, before any projection"""
+        return self._projection.input_dim if self._projection is not None else self.dim
+
+    def _load(self):
+        vectors_file = os.path.join(self.persist_directory, VECTORS_FILENAME)
+        records_file = os.path.join(self.persist_directory, RECORDS_FILENAME)
+        if not (os.path.exists(vectors_file) and os.path.exists(records_file)):
+            return
+
+        with open(records_file, 'r') as f:
+            records = json.load(f)
+        self._ids = records["ids"]
+        self._texts = records["texts"]
+        self._metadatas = records["metadatas"]
+        self._id_to_row = {chunk_id: row for row, chunk_id in enumerate(self._ids)}
+        self._vectors = np.load(vectors_file, mmap_mode='r')
+        self._alive = np.ones(len(self._ids), dtype=bool)
+
+        projection_file = os.path.join(self.persist_directory, PROJECTION_FILENAME)
+        full_vectors_file = os.path.join(self.persist_directory, FULL_VECTORS_FILENAME)
+        if os.path.exists(projection_file) and os.path.exists(full_vectors_file):
+            self._projection = VectorProjection.load(projection_file)
+            self._full = np.load(full_vectors_file, mmap_mode='r')
+
+        if self.quantization != "none":
+            self._load_codes()
+
+    def _load_codes(self):
+        """Load stored codes, or quantize the matrix when they are missing or were built differently"""
+        codes_file = os.path.join(self.persist_directory, CODES_FILENAME)
+        if os.path.exists(codes_file):
+            with np.load(codes_file) as data:
+                if str(data["kind"]) == self.quantization and data["codes"].shape[0] == len(self._ids):
+                    self._codes = data["codes"]
+                    self._quantizer = data["params"]
+                    return
+        self._quantizer = fit_quantizer(self._vectors, self.quantization)
+        self._codes = quantize(self._vectors, self.quantization, self._quantizer)
+
+    def _matrix(self) -> np.ndarray:
+        """All rows as one contiguous matrix, folding in rows appended since the last load"""
+        if self._pending:
+            parts = [self._vectors] if self._vectors.shape[0] else []
+            self._vectors = np.ascontiguousarray(np.vstack(parts + self._pending), dtype=np.float32)
+            self._pending = []
+        return self._vectors
+
+    def _full_matrix(self) -> np.ndarray:
+        """Unreduced rows; the search matrix itself when no projection is fitted"""
+        if self._projection is None:
+            return self._matrix()
+        if self._pending_full:
+            parts = [self._full] if self._full.shape[0] else []
+            self._full = np.ascontiguousarray(np.vstack(parts + self._pending_full), dtype=np.float32)
+            self._pending_full = []
+        return self._full
+
+    def _code_matrix(self) -> np.ndarray:
+        """All quantized codes, folding in codes of rows appended since the last load"""
+        if self._pending_codes:
+            parts = [self._codes] if self._codes is not None and self._codes.shape[0] else []
+            self._codes = np.vstack(parts + self._pending_codes)
+            self._pending_codes = []
+        return self._codes
+
+    def count(self) -> int:
+        """Number of live chunks"""
+        return int(self._alive.sum())
+
+    def live_metadata(self) -> Dict[str, Dict]:
+        """Metadata of every live chunk, keyed by chunk ID"""
+        with self._lock:
+            return {chunk_id: dict(self._metadatas[row]) for chunk_id, row in self._id_to_row.items()}
+
+    def upsert_embeddings(
+        self,
+        ids: List[str],
+        embeddings: List[List[float]],
+        texts: List[str],
+        metadatas: Optional[List[Dict]] = None
+    ):
+        """Add precomputed vectors, replacing existing chunks with the same IDs"""
+        if not ids:
+            return
+        metadatas = metadatas or [{} for _ in ids]
+        vectors = normalize_rows(np.asarray(embeddings, dtype=np.float32))
+
+        with self._lock:
+            if self.input_dim and vectors.shape[1] != self.input_dim:
+                raise ValueError(f"embedding dimension {vectors.shape[1]} does not match index dimension {self.input_dim}")
+            if self._projection is not None:
+                self._pending_full.append(vectors)
+                vectors = self._projection.apply(vectors)
+
+            start = len(self._ids)
+            self._kill([chunk_id for chunk_id in ids if chunk_id in self._id_to_row])
+            for offset, (chunk_id, text, metadata) in enumerate(zip(ids, texts, metadatas)):
+                self._ids.append(chunk_id)
+                self._texts.append(text)
+                self._metadatas.append(dict(metadata))
+                self._id_to_row[chunk_id] = start + offset
+
+            self._pending.append(vectors)
+            self._alive = np.concatenate([self._alive, np.ones(len(ids), dtype=bool)])
+            if self.quantization != "none":
+                if self._quantizer is None:
+                    # Provisional parameters from the first batch; persist() refits them over all rows
+                    self._quantizer = fit_quantizer(vectors, self.quantization)
+                self._pending_codes.append(quantize(vectors, self.quantization, self._quantizer))
+            self._rows_appended(vectors)
+
+    def _rows_appended(self, vectors: np.ndarray):
+        """Hook for subclasses that keep per-row structures alongside the matrix"""
+
+    def _kill(self, ids: Iterable[str]):
+        rows = [row for row in (self._id_to_row.pop(chunk_id, None) for chunk_id in ids) if row is not None]
+        if rows:
+            # Copy on write: searches may be scanning the current mask without the lock
+            alive = self._alive.copy()
+            alive[rows] = False
+            self._alive = alive
+
+    def add_texts(
+        self,
+        texts: Iterable[str],
+        metadatas: Optional[List[Dict]] = None,
+        ids: Optional[List[str]] = None,
+        **kwargs: Any
+    ) -> List[str]:
+        texts = list(texts)
+        if ids is None:
+            ids = [str(uuid.uuid4()) for _ in texts]
+        self.upsert_embeddings(ids, self._embedding.embed_documents(texts), texts, metadatas)
+        return ids
+
+    def delete(self, ids: Optional[List[str]] = None, **kwargs: Any) -> Optional[bool]:
+        if not ids:
+            return False
+        with self._lock:
+            self._kill(ids)
+        return True
+
+    def persist(self):
+        """Compact dead rows and write the matrix and records to disk"""
+        if not self.persist_directory:
+            return
+        with self._lock:
+            matrix = self._matrix()
+            keep = np.flatnonzero(self._alive)
+            dim = self.dim
+
+            vectors = np.ascontiguousarray(matrix[keep], dtype=np.float32) if keep.size else np.empty((0, dim), dtype=np.float32)
+            vectors = self._persist_projection(keep, vectors)
+            records = {
+                "ids": [self._ids[row] for row in keep],
+                "texts": [self._texts[row] for row in keep],
+                "metadatas": [self._metadatas[row] for row in keep]
+            }
+
+            vectors_file = os.path.join(self.persist_directory, VECTORS_FILENAME)
+            records_file = os.path.join(self.persist_directory, RECORDS_FILENAME)
+            # np.save appends .npy to names without it, so keep the suffix on the temp file
+            np.save(f"{vectors_file}.tmp.npy", vectors)
+            with open(f"{records_file}.tmp", 'w') as f:
+                json.dump(records, f)
+            os.replace(f"{vectors_file}.tmp.npy", vectors_file)
+            os.replace(f"{records_file}.tmp", records_file)
+            self._persist_codes(vectors)
+            self._persist_extra(keep, vectors)
+
+            self._vectors = np.empty((0, 0), dtype=np.float32)
+            self._pending = []
+            self._codes, self._pending_codes, self._quantizer = None, [], None
+            self._projection, self._full, self._pending_full = None, np.empty((0, 0), dtype=np.float32), []
+            self._alive = np.empty(0, dtype=bool)
+            self._ids, self._texts, self._metadatas, self._id_to_row = [], [], [], {}
+            self._load()
+
+    def _persist_projection(self, keep: np.ndarray, vectors: np.ndarray) -> np.ndarray:
+        """Fit the projection when due, write the unreduced rows, and return the search rows to store"""
+        projection_file = os.path.join(self.persist_directory, PROJECTION_FILENAME)
+        full_vectors_file = os.path.join(self.persist_directory, FULL_VECTORS_FILENAME)
+
+        if self._projection is None:
+            # PCA needs at least as many rows as output dimensions
+            wanted = self.projection != "none" and 0 < self.projection_dim < vectors.shape[1]
+            if not wanted or (self.projection == "pca" and len(keep) < self.projection_dim):
+                for path in (projection_file, full_vectors_file):
+                    if os.path.exists(path):
+                        os.remove(path)
+                return vectors
+            start = time.time()
+            self._projection = VectorProjection.fit(vectors, self.projection, self.projection_dim)
+            print(f"📐 Fitted {self.projection} projection {vectors.shape[1]} → {self._projection.output_dim} dims "
+                  f"in {time.time() - start:.1f}s")
+            full, vectors = vectors, self._projection.apply(vectors)
+        else:
+            full = np.ascontiguousarray(self._full_matrix()[keep], dtype=np.float32)
+
+        np.save(f"{full_vectors_file}.tmp.npy", full)
+        os.replace(f"{full_vectors_file}.tmp.npy", full_vectors_file)
+        self._projection.save(projection_file)
+        return vectors
+
+    def _persist_codes(self, vectors: np.ndarray):
+        """Requantize the compacted rows with parameters fitted to all of them"""
+        codes_file = os.path.join(self.persist_directory, CODES_FILENAME)
+        if self.quantization == "none" or not vectors.shape[0]:
+            if os.path.exists(codes_file):
+                os.remove(codes_file)
+            return
+        params = fit_quantizer(vectors, self.quantization)
+        codes = quantize(vectors, self.quantization, params)
+        np.savez(f"{codes_file}.tmp.npz", kind=self.quantization, codes=codes, params=params)
+        os.replace(f"{codes_file}.tmp.npz", codes_file)
+
+    def _persist_extra(self, keep: np.ndarray, vectors: np.ndarray):
+        """Hook for subclasses to write their own files; `keep` maps new rows to old ones"""
+
+    def _score(self, query: np.ndarray) -> np.ndarray:
+        """Cosine similarity of the query against every row; dead rows score -inf"""
+        scores = self._matrix() @ query
+        scores[~self._alive] = -np.inf
+        return scores
+
+    def _results(self, rows: np.ndarray, similarities: np.ndarray) -> List[Tuple[Document, float]]:
+        results = []
+        for row, similarity in zip(rows, similarities):
+            if not np.isfinite(similarity):
+                continue
+            doc = Document(page_content=self._texts[row], metadata=dict(self._metadatas[row]))
+            results.append((doc, float(max(0.0, 2.0 - 2.0 * similarity))))
+        return results
+
+    def _approximate_scores(self, query: np.ndarray, rows: Optional[np.ndarray] = None) -> np.ndarray:
+        """Similarity estimates from the quantized codes; higher is closer, dead rows score -inf"""
+        codes = self._code_matrix()
+        count = len(rows) if rows is not None else codes.shape[0]
+        scores = np.empty(count, dtype=np.float32)
+
+        if self.quantization == "int8":
+            # Fold the dequantization scale into the query instead of every row
+            scaled_query = query * self._quantizer / 127.0
+        else:
+            # The query stays in float: a lookup table gives each code byte's dot product
+            # with the matching 8 query dimensions, so scoring is one gather per byte
+            padded = np.zeros(codes.shape[1] * 8, dtype=np.float32)
+            padded[:query.shape[0]] = query
+            byte_scores = padded.reshape(-1, 8) @ BYTE_SIGNS.T
+            byte_columns = np.arange(codes.shape[1])
+
+        for start in range(0, count, SCAN_BLOCK_ROWS):
+            block_rows = slice(start, start + SCAN_BLOCK_ROWS)
+            block = codes[rows[block_rows]] if rows is not None else codes[block_rows]
+            if self.quantization == "int8":
+                scores[block_rows] = block.astype(np.float32) @ scaled_query
+            else:
+                scores[block_rows] = byte_scores[byte_columns, block].sum(axis=1)
+
+        if rows is None:
+            scores[~self._alive] = -np.inf
+        return scores
+
+    def _rank(self, query: np.ndarray, k: int, rows: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Top-k of `rows` (every row when None) by exact cosine similarity, shortlisting on codes when quantized"""
+        if self.quantization == "none":
+            if rows is None:
+                return self._search_exact(query, k)
+            similarities = np.asarray(self._matrix()[rows], dtype=np.float32) @ query
+            best = top_k(similarities, k)
+            return rows[best], similarities[best]
+
+        estimates = self._approximate_scores(query, rows)
+        shortlist = top_k(estimates, k * self.rescore_factor)
+        shortlist = shortlist[np.isfinite(estimates[shortlist])]
+        candidates = np.sort(shortlist if rows is None else rows[shortlist])
+
+        # Rescore with full precision so distances and the relevance threshold stay exact
+        similarities = np.asarray(self._matrix()[candidates], dtype=np.float32) @ query
+        best = top_k(similarities, k)
+        return candidates[best], similarities[best]
+
+    def _search_exact(self, query: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Exhaustive full-precision top-k, the ground truth for recall checks"""
+        scores = self._score(query)
+        rows = top_k(scores, k)
+        return rows, scores[rows]
+
+    def _search_rows(self, query: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Rows and cosine similarities of the k best matches for a normalized query"""
+        return self._rank(query, k)
+
+    def _search_view(self) -> "NumpyVectorIndex":
+        """Shallow copy of the index, with pending rows folded in, that can be searched without the lock"""
+        with self._lock:
+            self._matrix()
+            self._code_matrix()
+            view = copy.copy(self)
+        # Rows appended after the snapshot must not be folded into it
+        view._pending, view._pending_codes, view._pending_full = [], [], []
+        return view
+
+    def memory_stats(self) -> dict:
+        """Bytes of vector data scanned by search versus unreduced float32 storage"""
+        with self._lock:
+            rows, dim = len(self._ids), self.dim
+            full_precision = rows * self.input_dim * 4
+            if self.quantization == "none":
+                in_memory = rows * dim * 4
+            else:
+                codes = self._code_matrix()
+                in_memory = codes.nbytes if codes is not None else 0
+            return {
+                "quantization": self.quantization,
+                "projection": self._projection.kind if self._projection is not None else "none",
+                "rows": rows,
+                "input_dim": self.input_dim,
+                "dim": dim,
+                "full_precision_bytes": full_precision,
+                "search_bytes": in_memory,
+                "compression": round(full_precision / in_memory, 1) if in_memory else 1.0
+            }
+
+    def _sample_queries(self, matrix: np.ndarray, rows: np.ndarray, sample_size: int) -> np.ndarray:
+        """Stored rows with added noise, standing in for real queries (an unchanged row would always find itself)"""
+        rng = np.random.default_rng(0)
+        picked = np.sort(rng.choice(rows, size=min(sample_size, rows.size), replace=False))
+        base = np.asarray(matrix[picked], dtype=np.float32)
+        return normalize_rows(base + 0.75 * rng.standard_normal(base.shape).astype(np.float32) / np.sqrt(base.shape[1]))
+
+    def projection_report(
+        self,
+        dims: List[int],
+        k: int = 3,
+        sample_size: int = 100,
+        corpus_size: int = 20000,
+        threshold: Optional[float] = None
+    ) -> dict:
+        """
+        Recall@k and relevance-score drift of candidate projection sizes against unreduced vectors.
+
+        Every size is fitted on and evaluated against a sample of the corpus with
+        an exact scan, so the numbers isolate the projection from IVF and
+        quantization. Drift compares the relevance of each returned chunk in the
+        reduced space with its relevance computed from the unreduced vectors.
+        """
+        with self._lock:
+            if self._projection is not None:
+                kind = self._projection.kind
+            else:
+                kind = self.projection if self.projection != "none" else "pca"
+            full = self._full_matrix()
+            input_dim = self.input_dim
+            live = np.flatnonzero(self._alive)
+            rng = np.random.default_rng(0)
+            corpus_rows = np.sort(rng.choice(live, size=min(corpus_size, live.size), replace=False)) if live.size else live
+            corpus = np.asarray(full[corpus_rows], dtype=np.float32) if live.size else np.empty((0, input_dim), dtype=np.float32)
+
+        report = {
+            "projection": kind,
+            "input_dim": input_dim,
+            "active_dim": self._projection.output_dim if self._projection is not None else None,
+            "k": k,
+            "corpus_rows": len(corpus),
+            "queries": 0,
+            "threshold": threshold,
+            "dimensions": []
+        }
+        if not len(corpus):
+            return report
+
+        queries = self._sample_queries(corpus, np.arange(len(corpus)), sample_size)
+        report["queries"] = len(queries)
+        exact = queries @ corpus.T
+        truth = [set(top_k(scores, k).tolist()) for scores in exact]
+        exact_top_relevance = relevance_from_similarity(exact.max(axis=1))
+
+        for dim in sorted(d for d in set(dims) if 0 < d < input_dim):
+            if kind == "pca" and dim > len(corpus):
+                continue
+            projection = VectorProjection.fit(corpus, kind, dim)
+            reduced = projection.apply(queries) @ projection.apply(corpus).T
+
+            found = 0
+            drifts = []
+            top_relevance = np.empty(len(queries), dtype=np.float32)
+            for i, scores in enumerate(reduced):
+                rows = top_k(scores, k)
+                found += len(truth[i] & set(rows.tolist()))
+                relevance = relevance_from_similarity(scores[rows])
+                drifts.append(np.abs(relevance - relevance_from_similarity(exact[i, rows])))
+                top_relevance[i] = relevance[0]
+            drifts = np.concatenate(drifts)
+
+            entry = {
+                "dim": dim,
+                "recall_at_k": round(found / (len(queries) * min(k, len(corpus))), 4),
+                "mean_score_drift": round(float(drifts.mean()), 4),
+                "max_score_drift": round(float(drifts.max()), 4),
+                "bytes_per_vector": dim * 4
+            }
+            if threshold is not None:
+                # Share of queries whose use-RAG decision is unchanged by the projection
+                agree = (top_relevance >= threshold) == (exact_top_relevance >= threshold)
+                entry["threshold_agreement"] = round(float(agree.mean()), 4)
+            report["dimensions"].append(entry)
+
+        return report
+
+    def measure_recall(self, k: int = 3, sample_size: int = 100, queries: Optional[np.ndarray] = None) -> dict:
+        """
+        Recall@k of the configured search against an exact scan, with mean latency of both.
+
+        Both searches run in the index's search space, so this measures IVF and
+        quantization; projection_report() covers the projection itself.
+        """
+        return self._search_view()._measure_recall(k, sample_size, queries)
+
+    def _measure_recall(self, k: int, sample_size: int, queries: Optional[np.ndarray]) -> dict:
+        live = np.flatnonzero(self._alive)
+        if queries is None:
+            if not live.size:
+                queries = np.empty((0, self.dim), dtype=np.float32)
+            else:
+                queries = self._sample_queries(self._matrix(), live, sample_size)
+        queries = normalize_rows(queries)
+
+        found = expected = 0
+        exact_seconds = ann_seconds = 0.0
+        for query in queries:
+            start = time.perf_counter()
+            exact_rows, _ = self._search_exact(query, k)
+            exact_seconds += time.perf_counter() - start
+
+            start = time.perf_counter()
+            ann_rows, _ = self._search_rows(query, k)
+            ann_seconds += time.perf_counter() - start
+
+            found += len(set(exact_rows.tolist()) & set(ann_rows.tolist()))
+            expected += len(exact_rows)
+
+        count = len(queries)
+        return {
+            "k": k,
+            "quantization": self.quantization,
+            "chunks": int(live.size),
+            "queries": count,
+            "recall_at_k": round(found / expected, 4) if expected else 1.0,
+            "exact_ms": round(exact_seconds * 1000 / count, 3) if count else 0.0,
+            "ann_ms": round(ann_seconds * 1000 / count, 3) if count else 0.0
+        }
+
+    def similarity_search_by_vector_with_score(self, embedding: List[float], k: int = 4) -> List[Tuple[Document, float]]:
+        """Top-k documents for a query vector with squared L2 distances (lower is closer)"""
+        view = self._search_view()
+        if not view._ids or not view.dim:
+            return []
+        query = normalize_rows(np.asarray(embedding, dtype=np.float32)[None, :])
+        if view._projection is not None:
+            query = view._projection.apply(query)
+        rows, similarities = view._search_rows(query[0], k)
+        return view._results(rows, similarities)
+
+    def similarity_search_with_score(self, query: str, k: int = 4, **kwargs: Any) -> List[Tuple[Document, float]]:
+        return self.similarity_search_by_vector_with_score(self._embedding.embed_query(query), k)
+
+    def similarity_search(self, query: str, k: int = 4, **kwargs: Any) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_with_score(query, k)]
+
+    def _select_relevance_score_fn(self) -> Callable[[float], float]:
+        return self._euclidean_relevance_score_fn
+
+    @classmethod
+    def from_texts(
+        cls,
+        texts: List[str],
+        embedding: Embeddings,
+        metadatas: Optional[List[Dict]] = None,
+        ids: Optional[List[str]] = None,
+        persist_directory: Optional[str] = None,
+        **kwargs: Any
+    ) -> "NumpyVectorIndex":
+        index = cls(persist_directory, embedding)
+        index.add_texts(texts, metadatas=metadatas, ids=ids)
+        return index
+
+class IVFVectorIndex(NumpyVectorIndex):
+    """
+    Approximate top-k search with an inverted-file (IVF) index.
+
+    Rows are clustered around `nlist` k-means centroids. A query scores the
+    centroids first and then only the rows in the `nprobe` closest lists, so a
+    search reads about nprobe/nlist of the matrix. Candidates are scored against
+    the full-precision vectors, so returned distances match the exact index and
+    only recall is traded for latency; raise `nprobe` to buy recall back.
+
+    New rows are assigned to the nearest existing centroid as they arrive.
+    persist() trains the centroids once the index holds `min_train_size` rows and
+    retrains after it has grown `retrain_growth` times; until the first training
+    search falls back to an exact scan. Centroids and row assignments are stored
+    in `ivf.npz` next to the matrix.
+    """
+
+    def __init__(
+        self,
+        persist_directory: Optional[str],
+        embedding_function: Embeddings,
+        quantization: str = "none",
+        rescore_factor: int = 10,
+        projection: str = "none",
+        projection_dim: int = 0,
+        nlist: int = 0,
+        nprobe: int = 16,
+        min_train_size: int = 4096,
+        retrain_growth: float = 4.0,
+        train_iterations: int = 10,
+        seed: int = 0
+    ):
+        self.nlist = nlist
+        self.nprobe = max(1, nprobe)
+        self.min_train_size = max(1, min_train_size)
+        self.retrain_growth = retrain_growth
+        self.train_iterations = train_iterations
+        self.seed = seed
+
+        self._centroids: Optional[np.ndarray] = None
+        self._assignments = np.empty(0, dtype=np.int32)
+        self._trained_size = 0
+        self._lists: Optional[Tuple[np.ndarray, np.ndarray, int]] = None
+        super().__init__(persist_directory, embedding_function, quantization, rescore_factor, projection, projection_dim)
+
+    @property
+    def trained(self) -> bool:
+        return self._centroids is not None
+
+    def _load(self):
+        self._centroids = None
+        self._trained_size = 0
+        self._lists = None
+        super()._load()
+        self._assignments = np.full(len(self._ids), -1, dtype=np.int32)
+
+        ivf_file = os.path.join(self.persist_directory, IVF_FILENAME)
+        if not os.path.exists(ivf_file):
+            return
+        with np.load(ivf_file) as data:
+            assignments = data["assignments"]
+            # A mismatch means the matrix was written without its IVF file; the next persist retrains
+            if assignments.shape[0] != len(self._ids):
+                return
+            self._centroids = np.ascontiguousarray(data["centroids"], dtype=np.float32)
+            self._assignments = assignments.astype(np.int32)
+            self._trained_size = int(data["trained_size"])
+
+    def _rows_appended(self, vectors: np.ndarray):
+        if self._centroids is not None:
+            assignments = self._assign(vectors, self._centroids)
+        else:
+            assignments = np.full(len(vectors), -1, dtype=np.int32)
+        self._assignments = np.concatenate([self._assignments, assignments])
+        self._lists = None
+
+    def _persist_extra(self, keep: np.ndarray, vectors: np.ndarray):
+        ivf_file = os.path.join(self.persist_directory, IVF_FILENAME)
+        live = len(keep)
+        assignments = self._assignments[keep]
+
+        needs_training = live >= self.min_train_size and (
+            self._centroids is None
+            or live >= self._trained_size * self.retrain_growth
+            # A newly fitted projection changes the space the centroids live in
+            or self._centroids.shape[1] != vectors.shape[1]
+        )
+        if needs_training:
+            start = time.time()
+            centroids = self._train(vectors)
+            assignments = self._assign(vectors, centroids)
+            trained_size = live
+            print(f"🧭 Trained IVF index: {len(centroids)} lists over {live} chunks in {time.time() - start:.1f}s")
+        elif self._centroids is not None:
+            centroids, trained_size = self._centroids, self._trained_size
+        else:
+            if os.path.exists(ivf_file):
+                os.remove(ivf_file)
+            return
+
+        np.savez(f"{ivf_file}.tmp.npz", centroids=centroids, assignments=assignments, trained_size=trained_size)
+        os.replace(f"{ivf_file}.tmp.npz", ivf_file)
+
+    def _assign(self, vectors: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+        """Index of the most similar centroid for every row"""
+        labels = np.empty(len(vectors), dtype=np.int32)
+        for start in range(0, len(vectors), ASSIGN_BLOCK_ROWS):
+            block = np.asarray(vectors[start:start + ASSIGN_BLOCK_ROWS], dtype=np.float32)
+            labels[start:start + len(block)] = np.argmax(block @ centroids.T, axis=1)
+        return labels
+
+    def _train(self, vectors: np.ndarray) -> np.ndarray:
+        """Spherical k-means on a sample of the rows"""
+        n = len(vectors)
+        # At least 39 training points per list, the usual floor for stable k-means
+        nlist = self.nlist or int(np.sqrt(n))
+        nlist = max(1, min(nlist, n // 39 or 1))
+
+        rng = np.random.default_rng(self.seed)
+        sample_rows = np.sort(rng.choice(n, size=min(n, nlist * 64), replace=False))
+        sample = np.ascontiguousarray(vectors[sample_rows], dtype=np.float32)
+        centroids = sample[rng.choice(len(sample), size=nlist, replace=False)].copy()
+
+        for _ in range(self.train_iterations):
+            labels = self._assign(sample, centroids)
+            counts = np.bincount(labels, minlength=nlist)
+            order = np.argsort(labels, kind="stable")
+            nonempty = np.flatnonzero(counts)
+            starts = (np.cumsum(counts) - counts)[nonempty]
+
+            sums = np.zeros_like(centroids)
+            sums[nonempty] = np.add.reduceat(sample[order], starts, axis=0)
+            # Re-seed empty lists from random sample rows
+            empty = np.flatnonzero(counts == 0)
+            if empty.size:
+                sums[empty] = sample[rng.choice(len(sample), size=empty.size, replace=False)]
+            centroids = normalize_rows(sums)
+
+        return centroids
+
+    def _inverted_lists(self) -> Tuple[np.ndarray, np.ndarray, int]:
+        """Rows grouped by list: (row order, list offsets into it, count of unassigned rows)"""
+        if self._lists is None:
+            unassigned = int((self._assignments < 0).sum())
+            order = np.argsort(self._assignments, kind="stable")
+            counts = np.bincount(self._assignments[self._assignments >= 0], minlength=len(self._centroids))
+            offsets = np.concatenate([[0], np.cumsum(counts)]) + unassigned
+            self._lists = (order, offsets, unassigned)
+        return self._lists
+
+    def _search_rows(self, query: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        if self._centroids is None:
+            return super()._search_rows(query, k)
+
+        order, offsets, unassigned = self._inverted_lists()
+        probes = top_k(self._centroids @ query, self.nprobe)
+        parts = [order[:unassigned]] + [order[offsets[c]:offsets[c + 1]] for c in probes]
+        rows = np.sort(np.concatenate(parts))
+        return self._rank(query, k, rows[self._alive[rows]])
+
+    def _search_view(self) -> "IVFVectorIndex":
+        with self._lock:
+            if self._centroids is not None:
+                self._inverted_lists()
+            return super()._search_view()
+
+    def measure_recall(self, k: int = 3, sample_size: int = 100, queries: Optional[np.ndarray] = None, nprobe: Optional[int] = None) -> dict:
+        """Recall@k against an exact scan, optionally at a different nprobe than the configured one"""
+        view = self._search_view()
+        view.nprobe = nprobe or self.nprobe
+        report = view._measure_recall(k, sample_size, queries)
+        report.update({
+            "nprobe": view.nprobe,
+            "nlist": len(view._centroids) if view._centroids is not None else 0,
+            "trained": view.trained
+        })
+        return report
@@ -0,0 +1,94 @@
+"""
+Bounded in-process caches with least-recently-used eviction and expiry
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable
+
+# Distinguishes "not cached" from a cached None
+_MISSING = object()
+
+class LRUCache:
+    """
+    Thread-safe LRU cache whose entries also expire `ttl_seconds` after being stored.
+
+    Expired entries are dropped lazily when looked up or when they reach the
+    least-recently-used end, so no background sweeper is needed. A ttl of 0
+    disables expiry.
+    """
+
+    def __init__(self, max_size: int, ttl_seconds: float = 0):
+        self.max_size = max(1, max_size)
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def _expired(self, stored_at: float, now: float) -> bool:
+        return bool(self.ttl_seconds) and now - stored_at > self.ttl_seconds
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Return the cached value and mark it most recently used"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key, _MISSING)
+            if entry is not _MISSING and self._expired(entry[1], now):
+                del self._entries[key]
+                self.expirations += 1
+                entry = _MISSING
+
+            if entry is _MISSING:
+                self.misses += 1
+                return default
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key: Hashable, value: Any):
+        now = time.monotonic()
+        with self._lock:
+            self._entries[key] = (value, now)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                _, (_, stored_at) = self._entries.popitem(last=False)
+                if self._expired(stored_at, now):
+                    self.expirations += 1
+                else:
+                    self.evictions += 1
+
+    def __contains__(self, key: Hashable) -> bool:
+        """Membership test that neither counts as a lookup nor refreshes recency"""
+        with self._lock:
+            entry = self._entries.get(key, _MISSING)
+            return entry is not _MISSING and not self._expired(entry[1], time.monotonic())
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._entries.pop(key, _MISSING)
+        return default if entry is _MISSING else entry[0]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get_stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations
+        }
@@ -0,0 +1,94 @@
+"""
+Bounded thread pool for running blocking calls from async request handlers
+"""
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+class ExecutorBusyError(RuntimeError):
+    """Raised when a call is submitted while the pool's queue is full"""
+
+class BoundedThreadPool:
+    """
+    Fixed-size thread pool with a cap on queued calls and queue-depth metrics.
+
+    `run` awaits the result without blocking the event loop. Once `max_queue`
+    calls are waiting for a worker, further calls fail fast with
+    ExecutorBusyError instead of piling up behind a slow dependency. Threads
+    are created on first use, and `shutdown` lets a later call start a new pool.
+    """
+
+    def __init__(self, max_workers: int, max_queue: int, name: str):
+        self.max_workers = max(1, max_workers)
+        self.max_queue = max(0, max_queue)
+        self.name = name
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+
+        self.queued = 0
+        self.active = 0
+        self.peak_queued = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self._total_wait = 0.0
+        self._total_run = 0.0
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix=self.name)
+        return self._executor
+
+    async def run(self, fn: Callable[..., Any], *args) -> Any:
+        """Run `fn(*args)` on a pool thread and return its result"""
+        with self._lock:
+            if self.queued >= self.max_queue + max(0, self.max_workers - self.active):
+                self.rejected += 1
+                raise ExecutorBusyError(f"{self.name} pool is busy ({self.queued} calls queued)")
+            self.queued += 1
+            self.peak_queued = max(self.peak_queued, self.queued)
+        submitted_at = time.perf_counter()
+
+        def call():
+            started_at = time.perf_counter()
+            with self._lock:
+                self.queued -= 1
+                self.active += 1
+                self._total_wait += started_at - submitted_at
+            try:
+                return fn(*args)
+            except Exception:
+                with self._lock:
+                    self.failed += 1
+                raise
+            finally:
+                with self._lock:
+                    self.active -= 1
+                    self.completed += 1
+                    self._total_run += time.perf_counter() - started_at
+
+        return await asyncio.get_running_loop().run_in_executor(self._get_executor(), call)
+
+    def shutdown(self):
+        """Stop the worker threads once submitted calls finish"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            completed = self.completed
+            return {
+                "max_workers": self.max_workers,
+                "max_queue": self.max_queue,
+                "active": self.active,
+                "queued": self.queued,
+                "peak_queued": self.peak_queued,
+                "completed": completed,
+                "failed": self.failed,
+                "rejected": self.rejected,
+                "avg_wait_ms": round(1000 * self._total_wait / completed, 2) if completed else 0.0,
+                "avg_run_ms": round(1000 * self._total_run / completed, 2) if completed else 0.0
+            }
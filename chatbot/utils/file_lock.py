@@ -0,0 +1,58 @@
+"""
+Advisory file locks shared by the worker processes of one host
+"""
+import os
+from typing import Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows: a single dev worker, so locking is skipped
+    fcntl = None
+
+class FileLock:
+    """
+    fcntl.flock lock on a file, exclusive or shared.
+
+    The operating system releases the lock when the holding process exits, so
+    a crashed holder never leaves it stuck. Locks are per open file, so two
+    FileLock objects on the same path exclude each other even within one
+    process. Where fcntl is unavailable, every acquire succeeds.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._fd: Optional[int] = None
+
+    @property
+    def held(self) -> bool:
+        return self._fd is not None
+
+    def acquire(self, blocking: bool = True, shared: bool = False) -> bool:
+        """Take the lock; with blocking=False, return False instead of waiting for another holder"""
+        if self._fd is not None:
+            return True
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        if fcntl is not None:
+            flags = fcntl.LOCK_SH if shared else fcntl.LOCK_EX
+            try:
+                fcntl.flock(fd, flags if blocking else flags | fcntl.LOCK_NB)
+            except BlockingIOError:
+                os.close(fd)
+                return False
+        self._fd = fd
+        return True
+
+    def release(self):
+        if self._fd is not None:
+            # Closing the descriptor drops the lock
+            os.close(self._fd)
+            self._fd = None
+
+    def __enter__(self) -> "FileLock":
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.release()
+        return False
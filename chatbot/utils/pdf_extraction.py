@@ -0,0 +1,32 @@
+"""
+PDF text extraction helpers that are safe to run inside worker processes
+"""
+import os
+from typing import Dict, List, Optional, Tuple
+
+# (pdf_file, [(page_content, metadata), ...], error message or None)
+PDFExtractionResult = Tuple[str, List[Tuple[str, Dict]], Optional[str]]
+
+def extract_pdf_pages(pdf_file: str) -> PDFExtractionResult:
+    """
+    Extract all pages of a single PDF file.
+
+    Runs in a worker process, so it only imports the loader it needs and returns
+    plain tuples instead of Document objects to keep pickling cheap. Errors are
+    returned rather than raised so one broken file never takes down the pool.
+    """
+    try:
+        from langchain_community.document_loaders import PyPDFLoader
+
+        pages = []
+        for doc in PyPDFLoader(pdf_file).load():
+            metadata = dict(doc.metadata)
+            metadata.update({
+                "source": pdf_file,
+                "source_type": "pdf",
+                "filename": os.path.basename(pdf_file)
+            })
+            pages.append((doc.page_content, metadata))
+        return pdf_file, pages, None
+    except Exception as e:
+        return pdf_file, [], str(e)
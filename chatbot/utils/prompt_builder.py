@@ -0,0 +1,149 @@
+"""
+Token-budgeted prompt assembly: system prompt, RAG chunks and recent history
+"""
+import threading
+from typing import Dict, List, Optional
+
+from chatbot.core.config import settings
+from chatbot.models.schemas import QuestionAnalysis, RAGResult
+from chatbot.services.memory import ChatMessage
+from chatbot.utils.cache import LRUCache
+from chatbot.utils.text_processing import create_system_prompt_general, create_system_prompt_with_rag
+
+# Chat format overhead per message (role markers and separators), as counted by OpenAI-style APIs
+MESSAGE_OVERHEAD_TOKENS = 4
+
+# Chat history has always been capped at the last 8 messages; the budget may allow fewer
+MAX_HISTORY_MESSAGES = 8
+
+class TokenCounter:
+    """
+    Counts tokens with tiktoken, falling back to ~4 characters per token when
+    tiktoken or its encoding files are unavailable. Counts are cached per text,
+    so history messages and retrieved chunks are only tokenized once.
+    """
+
+    def __init__(self, encoding_name: str, cache_size: int = 4096):
+        self.encoding_name = encoding_name
+        self._encoding = None
+        self._loaded = False
+        self._load_lock = threading.Lock()
+        self._cache = LRUCache(cache_size)
+
+    def _get_encoding(self):
+        if not self._loaded:
+            with self._load_lock:
+                if not self._loaded:
+                    try:
+                        import tiktoken
+                        self._encoding = tiktoken.get_encoding(self.encoding_name)
+                        print(f"🧮 Token counting with tiktoken ({self.encoding_name})")
+                    except Exception as e:
+                        print(f"⚠️ tiktoken unavailable ({e}); estimating 4 characters per token")
+                    self._loaded = True
+        return self._encoding
+
+    def count(self, text: str) -> int:
+        tokens = self._cache.get(text)
+        if tokens is None:
+            encoding = self._get_encoding()
+            tokens = len(encoding.encode(text, disallowed_special=())) if encoding else len(text) // 4 + 1
+            self._cache.put(text, tokens)
+        return tokens
+
+    @property
+    def backend(self) -> str:
+        return f"tiktoken:{self.encoding_name}" if self._get_encoding() else "chars/4"
+
+    def get_stats(self) -> dict:
+        return {"backend": self.backend, **self._cache.get_stats()}
+
+def _system_prompt(chunks: List[str], question_analysis: QuestionAnalysis, summary: str = "") -> str:
+    if chunks:
+        prompt = create_system_prompt_with_rag("\n\n".join(chunks), question_analysis)
+    else:
+        prompt = create_system_prompt_general(question_analysis)
+    if summary:
+        prompt += f"\nSummary of the earlier conversation:\n{summary}\n"
+    return prompt
+
+class PromptBuilder:
+    """
+    Packs the prompt for one turn into the token budget for its question type.
+
+    The system prompt (with the session's running summary, if any) and the
+    user's message are always included. Retrieved chunks are added in
+    relevance order, using at most `context_share` of what is left; the most
+    recent history messages then fill the remainder, oldest dropped first. Chunks that do not fit are skipped so a smaller, less
+    relevant one can still be used.
+    """
+
+    def __init__(self, budgets: Dict[str, int], default_budget: int, context_share: float, token_counter: TokenCounter):
+        self.budgets = budgets
+        self.default_budget = default_budget
+        self.context_share = context_share
+        self.tokens = token_counter
+
+    def budget_for(self, question_analysis: QuestionAnalysis) -> int:
+        return self.budgets.get(question_analysis.type, self.default_budget)
+
+    def _message_tokens(self, content: str) -> int:
+        return self.tokens.count(content) + MESSAGE_OVERHEAD_TOKENS
+
+    def build(
+        self,
+        message: str,
+        chat_history: List[ChatMessage],
+        rag_result: Optional[RAGResult],
+        question_analysis: QuestionAnalysis,
+        summary: str = ""
+    ) -> List[Dict[str, str]]:
+        """LLM messages for this turn: system prompt (with selected context), history, user message"""
+        budget = self.budget_for(question_analysis)
+        use_rag = rag_result is not None and rag_result.should_use_rag and bool(rag_result.content)
+        candidates = (rag_result.chunks or [rag_result.content]) if use_rag else []
+
+        # The prompt template without context, and the question itself, always go in
+        base_prompt = _system_prompt([""] if candidates else [], question_analysis, summary)
+        remaining = budget - self._message_tokens(base_prompt) - self._message_tokens(message)
+
+        chunks = []
+        context_budget = int(max(0, remaining) * self.context_share)
+        for chunk in candidates:
+            # "\n\n" separators are about one token each
+            chunk_tokens = self.tokens.count(chunk) + 1
+            if chunk_tokens <= context_budget:
+                chunks.append(chunk)
+                context_budget -= chunk_tokens
+                remaining -= chunk_tokens
+
+        history = []
+        for msg in reversed(chat_history[-MAX_HISTORY_MESSAGES:]):
+            if msg.role not in ["user", "assistant"]:
+                continue
+            msg_tokens = self._message_tokens(msg.content)
+            if msg_tokens > remaining:
+                break
+            history.append({"role": msg.role, "content": msg.content})
+            remaining -= msg_tokens
+        history.reverse()
+
+        if candidates and len(chunks) < len(candidates):
+            print(f"🧮 Prompt budget {budget}: kept {len(chunks)}/{len(candidates)} chunks, {len(history)} history messages")
+
+        # A RAG turn whose chunks are all too large for the budget answers from general knowledge
+        messages = [{"role": "system", "content": _system_prompt(chunks, question_analysis, summary)}]
+        messages.extend(history)
+        messages.append({"role": "user", "content": message})
+        return messages
+
+    def count_messages(self, messages: List[Dict[str, str]]) -> int:
+        return sum(self._message_tokens(msg["content"]) for msg in messages)
+
+# Global prompt builder instance
+prompt_builder = PromptBuilder(
+    settings.PROMPT_TOKEN_BUDGETS,
+    settings.PROMPT_TOKEN_BUDGET_DEFAULT,
+    settings.PROMPT_CONTEXT_SHARE,
+    TokenCounter(settings.PROMPT_TOKENIZER, settings.PROMPT_TOKEN_CACHE_SIZE)
+)
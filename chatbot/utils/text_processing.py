@@ -126,18 +126,25 @@ Key guidelines:
 Important: You can discuss general topics about dyslexia, learning strategies, educational support, and provide encouragement to families dealing with learning differences. Always provide complete responses.
 """
 
+# Characters that end a sentence; only text up to the last one is safe to show mid-stream
+SENTENCE_ENDINGS = ('.', '!', '?')
+
+EMPTY_RESPONSE_TEXT = "I apologize, but I wasn't able to generate a proper response. Could you please try asking again?"
+
+def _clean_lines(text: str) -> str:
+    """Strip each line, collapse repeated spaces and drop blank lines"""
+    text = text.encode('utf-8', errors='ignore').decode('utf-8')
+    lines = text.split('\n')
+    cleaned_lines = [re.sub(r' +', ' ', line.strip()) for line in lines if line.strip()]
+    return '\n'.join(cleaned_lines)
+
 def clean_response_text(text: str) -> str:
     """Clean and validate response text while preserving newline characters"""
     if not text:
-        return "I apologize, but I wasn't able to generate a proper response. Could you please try asking again?"
-    
-    # Remove any potential encoding issues
-    text = text.encode('utf-8', errors='ignore').decode('utf-8')
+        return EMPTY_RESPONSE_TEXT
     
     # Split the text into lines and clean each line
-    lines = text.split('\n')
-    cleaned_lines = [re.sub(r' +', ' ', line.strip()) for line in lines if line.strip()]
-    cleaned_text = '\n'.join(cleaned_lines)
+    cleaned_text = _clean_lines(text)
     
     # Ensure the response doesn't end abruptly
     if cleaned_text and not cleaned_text.endswith(('.', '!', '?', ':')):
@@ -153,6 +160,59 @@ def clean_response_text(text: str) -> str:
     
     return cleaned_text
 
+class StreamingResponseCleaner:
+    """
+    Incremental counterpart of clean_response_text for streamed completions.
+    
+    `feed` returns only cleaned text up to the last sentence ending seen so far,
+    so nothing already shown ever needs to be taken back. `finish` returns the
+    rest: the held-back tail if it ends cleanly (or is all there is, with a
+    period added), otherwise nothing, which drops a final incomplete sentence.
+    """
+    
+    def __init__(self):
+        self._raw = ""
+        self._flushed_upto = 0
+        self._emitted = ""
+    
+    def _emit_upto(self, end: int, suffix: str = "") -> str:
+        # A prefix cut right after a non-space character cleans to a prefix of the full cleaned text
+        cleaned = _clean_lines(self._raw[:end]) + suffix
+        delta = cleaned[len(self._emitted):]
+        self._emitted = cleaned
+        self._flushed_upto = end
+        return delta
+    
+    def feed(self, delta: str) -> str:
+        """Add streamed text and return the newly completed, cleaned part (may be empty)"""
+        self._raw += delta
+        cut = max(self._raw.rfind(ending) for ending in SENTENCE_ENDINGS) + 1
+        if cut <= self._flushed_upto:
+            return ""
+        return self._emit_upto(cut)
+    
+    def finish(self) -> str:
+        """Return whatever should still be shown once the stream has ended"""
+        tail = _clean_lines(self._raw[self._flushed_upto:])
+        if not self._emitted and not tail:
+            self._emitted = EMPTY_RESPONSE_TEXT
+            return EMPTY_RESPONSE_TEXT
+        if tail.endswith(':'):
+            return self._emit_upto(len(self._raw))
+        if not self._emitted and tail:
+            return self._emit_upto(len(self._raw), suffix='.')
+        return ""
+    
+    @property
+    def text(self) -> str:
+        """Everything emitted so far: the full cleaned response once finished"""
+        return self._emitted
+
+def normalize_query(query: str) -> str:
+    """Canonical form of a user query for cache keys: case, spacing and trailing punctuation ignored"""
+    normalized = re.sub(r'\s+', ' ', query.strip().lower())
+    return normalized.rstrip('?!. ')
+
 def format_reasoning(should_use_rag: bool, relevance_score: float) -> str:
     """Format reasoning for why RAG was or wasn't used"""
     if should_use_rag:
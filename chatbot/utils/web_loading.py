@@ -0,0 +1,77 @@
+"""
+Concurrent website fetching for RAG ingestion using a shared aiohttp session
+"""
+import asyncio
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+import aiohttp
+from bs4 import BeautifulSoup
+from langchain.schema import Document
+
+DEFAULT_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (compatible; ReadleBot/2.1; +https://readle-sigma.vercel.app)",
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+    "Accept-Language": "en-US,en;q=0.5",
+}
+
+# (url, documents, error message or None)
+WebFetchResult = Tuple[str, List[Document], Optional[str]]
+
+def parse_html_document(url: str, html: str) -> Document:
+    """Turn raw HTML into a Document with the same metadata WebBaseLoader produces"""
+    soup = BeautifulSoup(html, "html.parser")
+    metadata: Dict[str, str] = {"source": url}
+
+    if soup.title and soup.title.string:
+        metadata["title"] = soup.title.string.strip()
+    description = soup.find("meta", attrs={"name": "description"})
+    if description and description.get("content"):
+        metadata["description"] = description.get("content")
+    html_tag = soup.find("html")
+    if html_tag and html_tag.get("lang"):
+        metadata["language"] = html_tag.get("lang")
+
+    return Document(page_content=soup.get_text(), metadata=metadata)
+
+async def iter_web_documents(
+    urls: List[str],
+    concurrency: int = 8,
+    limit_per_host: int = 4,
+    timeout_seconds: float = 20.0
+) -> AsyncIterator[WebFetchResult]:
+    """
+    Fetch URLs concurrently and yield results in completion order.
+
+    All requests share one session so connections are pooled and reused per host;
+    a semaphore bounds the number of requests in flight and every URL gets its own
+    timeout, so one slow site only delays itself.
+    """
+    if not urls:
+        return
+
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    connector = aiohttp.TCPConnector(limit=max(1, concurrency), limit_per_host=max(1, limit_per_host))
+    timeout = aiohttp.ClientTimeout(total=timeout_seconds)
+
+    async with aiohttp.ClientSession(connector=connector, headers=DEFAULT_HEADERS) as session:
+        async def fetch(url: str) -> WebFetchResult:
+            try:
+                async with semaphore:
+                    async with session.get(url, timeout=timeout) as response:
+                        response.raise_for_status()
+                        html = await response.text(errors="replace")
+                # HTML parsing is CPU-bound, keep it off the event loop
+                doc = await asyncio.to_thread(parse_html_document, url, html)
+                return url, [doc], None
+            except asyncio.TimeoutError:
+                return url, [], f"timed out after {timeout_seconds:.0f}s"
+            except Exception as e:
+                return url, [], str(e) or type(e).__name__
+
+        tasks = [asyncio.create_task(fetch(url)) for url in dict.fromkeys(urls)]
+        try:
+            for task in asyncio.as_completed(tasks):
+                yield await task
+        finally:
+            for task in tasks:
+                task.cancel()
@@ -5,7 +5,7 @@ from groq import Groq
 from langchain_community.embeddings import OllamaEmbeddings
 from langchain.embeddings import FakeEmbeddings
 from langchain_community.vectorstores import Chroma
-from langchain_community.document_loaders import WebBaseLoader, PyPDFLoader
+from langchain_community.document_loaders import PyPDFLoader
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 from langchain.schema import Document
 import os
@@ -17,6 +17,7 @@ from pathlib import Path
 import uuid
 from datetime import datetime, timedelta
 import re
+from chatbot.utils.web_loading import iter_web_documents
 
 load_dotenv()
 
@@ -148,23 +149,24 @@ class RAGSystem:
         return documents
     
     async def load_websites(self, urls: List[str]) -> List[Document]:
-        """Load content from websites"""
+        """Load content from websites concurrently over a shared aiohttp session"""
         documents = []
-        for url in urls:
-            try:
-                print(f"Loading website: {url}")
-                loader = WebBaseLoader(url)
-                docs = loader.load()
-                
-                for doc in docs:
-                    doc.metadata.update({"source_type": "website"})
-                
-                documents.extend(docs)
-                print(f"Loaded content from {url}")
-                
-            except Exception as e:
-                print(f"Error loading {url}: {e}")
+        print(f"Loading {len(urls)} websites")
+        async for url, docs, error in iter_web_documents(
+            urls,
+            concurrency=int(os.getenv("WEB_FETCH_CONCURRENCY", "8")),
+            limit_per_host=int(os.getenv("WEB_FETCH_LIMIT_PER_HOST", "4")),
+            timeout_seconds=float(os.getenv("WEB_FETCH_TIMEOUT", "20"))
+        ):
+            if error:
+                print(f"Error loading {url}: {error}")
                 continue
+            
+            for doc in docs:
+                doc.metadata.update({"source_type": "website"})
+            
+            documents.extend(docs)
+            print(f"Loaded content from {url}")
         
         return documents
     
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Test that a writer dying mid-compaction never leaves the embedding cache serving wrong vectors
+"""
+
+import json
+import os
+import tempfile
+
+from chatbot.services.embedding_cache import FLOAT_SIZE, EmbeddingCache
+
+DIM = 4
+
+def vector(i: int):
+    return [float(i)] * DIM
+
+def check_cache(cache: EmbeddingCache, count: int):
+    """Every cached key must still map to its own vector"""
+    keys = [f"k{i}" for i in range(count)]
+    for i, cached in enumerate(cache.get_many(keys)):
+        assert cached is None or cached == vector(i), f"k{i} returned {cached}"
+    return sum(cached is not None for cached in cache.get_many(keys))
+
+def fill(cache_dir: str, count: int) -> EmbeddingCache:
+    # Budget for 10 vectors, so the eleventh put compacts the file
+    cache = EmbeddingCache(cache_dir, max_bytes=10 * DIM * FLOAT_SIZE, flush_every=1)
+    for i in range(count):
+        cache.put_many([f"k{i}"], [vector(i)])
+    return cache
+
+def test_crash_before_index_publish():
+    with tempfile.TemporaryDirectory() as cache_dir:
+        cache = fill(cache_dir, 10)
+
+        # Die after writing the compacted vectors but before publishing the index
+        def crash():
+            raise SystemExit("killed")
+        cache._flush_locked = crash
+        try:
+            cache.put_many(["k10"], [vector(10)])
+        except SystemExit:
+            pass
+
+        cached = check_cache(EmbeddingCache(cache_dir, max_bytes=1 << 20), 11)
+        assert cached == 10, f"expected the 10 vectors of the published index, found {cached}"
+        print(f"crash before publish: {cached} vectors, all correct")
+
+def test_crash_after_index_publish():
+    with tempfile.TemporaryDirectory() as cache_dir:
+        cache = fill(cache_dir, 10)
+
+        # Die after publishing the compacted index but before deleting the old vector file
+        cache._remove_stale_generations = lambda: None
+        cache.put_many(["k10"], [vector(10)])
+        assert len([name for name in os.listdir(cache_dir) if name.endswith(".f32")]) == 2
+
+        reopened = EmbeddingCache(cache_dir, max_bytes=1 << 20)
+        cached = check_cache(reopened, 11)
+        assert 0 < cached < 11, f"expected only the compacted entries, found {cached}"
+        reopened.flush()
+        assert len([name for name in os.listdir(cache_dir) if name.endswith(".f32")]) == 1
+        print(f"crash after publish: {cached} vectors, all correct, stale file removed")
+
+def test_index_for_missing_generation_is_refused():
+    with tempfile.TemporaryDirectory() as cache_dir:
+        fill(cache_dir, 3)
+
+        # An index naming a vector file that is gone must not be read against another one
+        index_file = os.path.join(cache_dir, "index.json")
+        with open(index_file) as f:
+            index = json.load(f)
+        index["generation"] = "gone"
+        with open(index_file, "w") as f:
+            json.dump(index, f)
+
+        assert not EmbeddingCache(cache_dir, max_bytes=1 << 20).entries
+        print("index for a missing vector file refused")
+
+if __name__ == "__main__":
+    print("Embedding Cache Crash Test")
+    print("=" * 50)
+    test_crash_before_index_publish()
+    test_crash_after_index_publish()
+    test_index_for_missing_generation_is_refused()
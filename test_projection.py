@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+Test that projected embeddings stay unit length, so distances keep the cosine scale
+"""
+
+import tempfile
+
+import numpy as np
+
+from chatbot.services.projection import VectorProjection
+from chatbot.services.vector_index import NumpyVectorIndex, normalize_rows
+
+def near_duplicate(vector: np.ndarray, rng: np.random.Generator) -> np.ndarray:
+    return normalize_rows(vector[None, :] + 0.01 * rng.standard_normal((1, vector.shape[0])).astype(np.float32))[0]
+
+def test_projection_keeps_cosine_scale():
+    rng = np.random.default_rng(0)
+    corpus = normalize_rows(rng.standard_normal((2000, 256)).astype(np.float32))
+
+    for kind in ["pca", "truncate"]:
+        projection = VectorProjection.fit(corpus, kind, 64)
+        projected = projection.apply(corpus)
+        norms = np.linalg.norm(projected, axis=1)
+        assert np.allclose(norms, 1.0, atol=1e-5), f"{kind}: norms range {norms.min():.3f}-{norms.max():.3f}"
+
+        # A near-duplicate must stay near on the 2 - 2·cos distance scale
+        similarity = float(projection.apply(near_duplicate(corpus[0], rng)[None, :])[0] @ projected[0])
+        distance = 2.0 - 2.0 * similarity
+        assert distance < 0.05, f"{kind}: near-duplicate distance {distance:.3f}"
+        print(f"{kind}: unit norms, near-duplicate distance {distance:.4f}")
+
+def test_projected_index_distances():
+    rng = np.random.default_rng(1)
+    corpus = normalize_rows(rng.standard_normal((500, 128)).astype(np.float32))
+
+    with tempfile.TemporaryDirectory() as workdir:
+        index = NumpyVectorIndex(workdir, None, projection="pca", projection_dim=32)
+        index.upsert_embeddings([f"chunk-{i}" for i in range(len(corpus))], corpus, [str(i) for i in range(len(corpus))])
+        index.persist()
+        assert index.dim == 32
+
+        doc, distance = index.similarity_search_by_vector_with_score(near_duplicate(corpus[7], rng).tolist(), k=1)[0]
+        assert doc.page_content == "7", f"near-duplicate matched chunk {doc.page_content}"
+        assert distance < 0.05, f"near-duplicate distance {distance:.3f}"
+        print(f"pca index: near-duplicate distance {distance:.4f}")
+
+if __name__ == "__main__":
+    print("Projection Scale Test")
+    print("=" * 50)
+    test_projection_keeps_cosine_scale()
+    test_projected_index_distances()
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Test that two workers compacting one session never lose the turns between their folds
+"""
+
+import os
+import tempfile
+from unittest import mock
+
+import fakeredis
+import redis
+
+from chatbot.services.memory import ChatMemory, InMemoryChatMemory
+from chatbot.services.memory_redis import RedisChatMemory
+from chatbot.services.memory_sqlite import SQLiteChatMemory
+
+def check_racing_folds(worker_a: ChatMemory, worker_b: ChatMemory, first: str):
+    session_id = worker_a.create_session()
+    for i in range(6):
+        worker_a.add_message(session_id, "user", f"m{i}")
+
+    # Worker A starts folding m0-m3; while its LLM call runs, B folds m0-m5
+    previous_a = worker_a.get_summary(session_id)
+    folded_a = worker_a.get_chat_history(session_id)[:4]
+    for i in range(6, 8):
+        worker_b.add_message(session_id, "user", f"m{i}")
+    previous_b = worker_b.get_summary(session_id)
+    folded_b = worker_b.get_chat_history(session_id)[:6]
+
+    fold_a = lambda: worker_a.apply_summary(session_id, "summary of m0-m3", folded_a, previous_a)
+    fold_b = lambda: worker_b.apply_summary(session_id, "summary of m0-m5", folded_b, previous_b)
+    if first == "a":
+        assert fold_a() and not fold_b(), "the fold built on a stale summary was applied"
+        expected_summary, expected_history = "summary of m0-m3", ["m4", "m5", "m6", "m7"]
+    else:
+        assert fold_b() and not fold_a(), "the fold built on a stale summary was applied"
+        expected_summary, expected_history = "summary of m0-m5", ["m6", "m7"]
+
+    for worker in (worker_a, worker_b):
+        assert worker.get_summary(session_id) == expected_summary
+        assert [message.content for message in worker.get_chat_history(session_id)] == expected_history
+
+def test_in_memory_racing_folds():
+    for first in ("a", "b"):
+        memory = InMemoryChatMemory()
+        check_racing_folds(memory, memory, first)
+    print("in-memory: stale fold rejected")
+
+def test_sqlite_racing_folds():
+    with tempfile.TemporaryDirectory() as workdir:
+        path = os.path.join(workdir, "sessions.db")
+        worker_a, worker_b = SQLiteChatMemory(path), SQLiteChatMemory(path)
+        try:
+            for first in ("a", "b"):
+                check_racing_folds(worker_a, worker_b, first)
+        finally:
+            worker_a.close()
+            worker_b.close()
+    print("sqlite: stale fold rejected")
+
+def test_redis_racing_folds():
+    server = fakeredis.FakeServer()
+    connect = lambda *args, **kwargs: fakeredis.FakeRedis(server=server, decode_responses=True)
+    with mock.patch.object(redis.Redis, "from_url", connect):
+        worker_a, worker_b = RedisChatMemory("redis://fake"), RedisChatMemory("redis://fake")
+    for first in ("a", "b"):
+        check_racing_folds(worker_a, worker_b, first)
+    print("redis: stale fold rejected")
+
+if __name__ == "__main__":
+    print("Concurrent Summary Fold Test")
+    print("=" * 50)
+    test_in_memory_racing_folds()
+    test_sqlite_racing_folds()
+    test_redis_racing_folds()